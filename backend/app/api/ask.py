@@ -1,134 +1,105 @@
 # backend/app/api/ask.py
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any, Tuple
 
 from app.core.config import settings
+from app.services.chunk_index import ChunkIndex, get_upload_index
+from app.services.chunk_store import MAX_CHUNK_TOKENS, MIN_CHUNK_TOKENS, check_chunking, get_upload_chunks
+from app.services.chunking import Chunk
+from app.services.embeddings import get_upload_vectors
 from app.services.metrics_store import load_metrics
 from app.services.parsing import load_extracted_pages
-from app.services.qa import answer_numbers_first, build_citations_for_keywords
+from app.services.qa import answer_numbers_first, answer_numbers_first_many, build_citations_for_keywords
+from app.services.sections import NOTES, OPERATIONS, OTHER
 from app.services.variance import compute_variance_drivers
 from app.services.narrative import build_variance_narrative
-from app.services.llm import explain_variance
+from app.services.llm import explain_variance, explain_variance_many
 
 
 router = APIRouter(tags=["ask"])
 
 
-class AskRequest(BaseModel):
+class _ChunkingParams(BaseModel):
+    # chunk sets other than the default 700/120 are built in memory, never persisted
+    max_tokens: int = Field(700, ge=MIN_CHUNK_TOKENS, le=MAX_CHUNK_TOKENS)
+    overlap_tokens: int = Field(120, ge=0)
+
+    @model_validator(mode="after")
+    def _overlap_below_max(self):
+        check_chunking(self.max_tokens, self.overlap_tokens)
+        return self
+
+
+class AskRequest(_ChunkingParams):
     question: str
     compare_upload_id: Optional[str] = None
-    max_tokens: int = 700
-    overlap_tokens: int = 120
 
 
-def _looks_like_cashflow(text: str) -> bool:
-    """
-    Heuristic filter:
-    Avoid cash flow citations such as "Payments for taxes related to..."
-    """
-    t = (text or "").lower()
-    markers = [
-        "cash flow",
-        "cash generated",
-        "cash used",
-        "operating activities",
-        "investing activities",
-        "financing activities",
-        "payments for",
-        "net cash",
-    ]
-    return any(m in t for m in markers)
-
-
-def _looks_like_balance_sheet(text: str) -> bool:
-    """
-    Heuristic filter:
-    Avoid balance sheet citations such as "LIABILITIES AND SHAREHOLDERS’ EQUITY"
-    """
-    t = (text or "").lower()
-    markers = [
-        "liabilities and shareholders",
-        "shareholders’ equity",
-        "shareholders' equity",
-        "total assets",
-        "total liabilities",
-        "current liabilities",
-        "accounts payable",
-        "deferred revenue",
-        "commercial paper",
-    ]
-    return any(m in t for m in markers)
-
-
-def _filter_income_statement_only(citations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Remove citations that look like cash flow or balance sheet.
-    Keep ordering (ranker already sorted them).
-    """
-    out: List[Dict[str, Any]] = []
-    for c in citations:
-        preview = str(c.get("text_preview", ""))
-        if _looks_like_cashflow(preview):
-            continue
-        if _looks_like_balance_sheet(preview):
-            continue
-        out.append(c)
-    return out
+class AskBatchRequest(_ChunkingParams):
+    questions: List[str] = Field(..., min_length=1, max_length=50)
+    compare_upload_id: Optional[str] = None
 
 
-@router.post("/ask/{upload_id}")
-def ask(upload_id: str, req: AskRequest):
-    # --- base metrics ---
-    try:
-        base_payload = load_metrics(settings.storage_dir, upload_id)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="metrics not found (run /metrics first)")
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+# citations come from income-statement chunks only: sections are assigned at
+# chunking time (app.services.sections), and the index skips other chunks before scoring
+_CITATION_SECTIONS = (OPERATIONS, NOTES, OTHER)
 
-    base_metrics = base_payload.get("metrics", {})
 
-    # --- base extracted pages ---
-    try:
-        base_pages = load_extracted_pages(settings.storage_dir, upload_id)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="extraction not found (run /extract first)")
-    except ValueError as e:
-        raise HTTPException(status_code=422, detail=str(e))
+# Keep these tight so citations come from the Statements of Operations.
+_DRIVER_KEYWORDS = [
+    # income statement line items
+    "other income/(expense), net",
+    "provision for income taxes",
+    "income before provision for income taxes",
+    "income before income taxes",
+    "operating income",
+    "net income",
+    # header anchors to lock chunks onto the right statement
+    "condensed consolidated statements of operations",
+    "statements of operations",
+]
 
-    # ✅ single-doc mode (no compare)
-    if not req.compare_upload_id:
-        return answer_numbers_first(
-            upload_id=upload_id,
-            question=req.question,
-            metrics=base_metrics,
-            pages=base_pages,
-            max_tokens=req.max_tokens,
-            overlap_tokens=req.overlap_tokens,
-        )
 
-    # --- compare mode ---
-    compare_id = req.compare_upload_id
+# (metrics, pages, chunks, index) of one upload
+UploadContext = Tuple[Dict[str, Any], List[Dict[str, Any]], List[Chunk], ChunkIndex]
 
-    # compare metrics
+
+def _load_upload(upload_id: str, max_tokens: int, overlap_tokens: int, role: str = "") -> UploadContext:
+    """
+    (metrics, pages, chunks, index) of an upload; role ("compare ") prefixes the 404 messages.
+    """
     try:
-        compare_payload = load_metrics(settings.storage_dir, compare_id)
+        payload = load_metrics(settings.storage_dir, upload_id)
     except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="compare metrics not found (run /metrics first)")
+        raise HTTPException(status_code=404, detail=f"{role}metrics not found (run /metrics first)")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    compare_metrics = compare_payload.get("metrics", {})
-
-    # compare extracted pages
     try:
-        compare_pages = load_extracted_pages(settings.storage_dir, compare_id)
+        pages = load_extracted_pages(settings.storage_dir, upload_id)
     except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="compare extraction not found (run /extract first)")
+        raise HTTPException(status_code=404, detail=f"{role}extraction not found (run /extract first)")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
+    chunks = get_upload_chunks(settings.storage_dir, upload_id, max_tokens, overlap_tokens, pages=pages)
+    index = get_upload_index(settings.storage_dir, upload_id, max_tokens, overlap_tokens, chunks=chunks)
+    return payload.get("metrics", {}), pages, chunks, index
+
+
+def _compare_context(
+    upload_id: str, compare_id: str, max_tokens: int, overlap_tokens: int, base: UploadContext
+) -> Dict[str, Any]:
+    """
+    Everything a compare-mode answer needs that doesn't depend on the question:
+    metrics, variance drivers, deterministic narrative and citations.
+    """
+    base_metrics, base_pages, base_chunks, base_index = base
+    compare_metrics, compare_pages, compare_chunks, compare_index = _load_upload(
+        compare_id, max_tokens, overlap_tokens, role="compare "
+    )
+
     # Compute variance drivers + narrative
     try:
         variance_result = compute_variance_drivers(base_metrics, compare_metrics)
@@ -140,84 +111,147 @@ def ask(upload_id: str, req: AskRequest):
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-
-    # ✅ LLM-powered explanation (numbers-first)
-    try:
-        llm_analysis = explain_variance(
-        variance=variance_result,
-        question=req.question,
-        )
-    except Exception:
-     # Safety fallback — never break the endpoint
-        llm_analysis = None
-
-
-
-
-
     # ✅ Build citations (income-statement specific keywords)
-    # Keep these tight so citations come from the Statements of Operations.
-    driver_keywords = [
-        # income statement line items
-        "other income/(expense), net",
-        "provision for income taxes",
-        "income before provision for income taxes",
-        "income before income taxes",
-        "operating income",
-        "net income",
-        # header anchors to lock chunks onto the right statement
-        "condensed consolidated statements of operations",
-        "statements of operations",
-    ]
-
     citations_base = build_citations_for_keywords(
         upload_id=upload_id,
         pages=base_pages,
-        keywords=driver_keywords,
-        max_tokens=req.max_tokens,
-        overlap_tokens=req.overlap_tokens,
-        top_k=10,
+        keywords=_DRIVER_KEYWORDS,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+        top_k=5,
+        chunks=base_chunks,
+        index=base_index,
+        sections=_CITATION_SECTIONS,
     )
 
     citations_compare = build_citations_for_keywords(
         upload_id=compare_id,
         pages=compare_pages,
-        keywords=driver_keywords,
-        max_tokens=req.max_tokens,
-        overlap_tokens=req.overlap_tokens,
-        top_k=10,
+        keywords=_DRIVER_KEYWORDS,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+        top_k=5,
+        chunks=compare_chunks,
+        index=compare_index,
+        sections=_CITATION_SECTIONS,
     )
 
-    # Filter out cash flow + balance sheet citations
-    citations_base = _filter_income_statement_only(citations_base)
-    citations_compare = _filter_income_statement_only(citations_compare)
-
-    # Keep a cap so the response stays compact
-    citations = citations_base[:5] + citations_compare[:5]
-
-
+    return {
+        "base_metrics": base_metrics,
+        "compare_metrics": compare_metrics,
+        "variance": variance_result,
+        "narrative": narrative,
+        # top_k caps each side so the response stays compact
+        "citations": citations_base + citations_compare,
+    }
 
 
+def _compare_answer(
+    upload_id: str, compare_id: str, question: str, ctx: Dict[str, Any], llm_analysis: Optional[str]
+) -> Dict[str, Any]:
+    citations = ctx["citations"]
     return {
         "upload_id": upload_id,
         "compare_upload_id": compare_id,
-        "question": req.question,
+        "question": question,
 
         # legacy: numbers_first
         "numbers_first": {
-            "base_metrics": base_metrics,
-            "compare_metrics": compare_metrics,
+            "base_metrics": ctx["base_metrics"],
+            "compare_metrics": ctx["compare_metrics"],
         },
 
         # legacy alias
         "evidence": citations,
 
         # new fields
-        "variance": variance_result,
+        "variance": ctx["variance"],
         "citations": citations,
-        "answer": llm_analysis or narrative,
+        "answer": llm_analysis or ctx["narrative"],
 
 
         # ⭐ NEW: LLM analyst narrative
         "llm_analysis": llm_analysis,
     }
+
+
+@router.post("/ask/{upload_id}")
+def ask(upload_id: str, req: AskRequest):
+    base = _load_upload(upload_id, req.max_tokens, req.overlap_tokens)
+    base_metrics, base_pages, base_chunks, base_index = base
+
+    # ✅ single-doc mode (no compare)
+    if not req.compare_upload_id:
+        base_vectors = get_upload_vectors(
+            settings.storage_dir, upload_id, req.max_tokens, req.overlap_tokens, chunks=base_chunks
+        )
+        return answer_numbers_first(
+            upload_id=upload_id,
+            question=req.question,
+            metrics=base_metrics,
+            pages=base_pages,
+            max_tokens=req.max_tokens,
+            overlap_tokens=req.overlap_tokens,
+            chunks=base_chunks,
+            index=base_index,
+            vectors=base_vectors,
+        )
+
+    # --- compare mode ---
+    compare_id = req.compare_upload_id
+    ctx = _compare_context(upload_id, compare_id, req.max_tokens, req.overlap_tokens, base)
+
+    # ✅ LLM-powered explanation (numbers-first)
+    try:
+        llm_analysis = explain_variance(
+        variance=ctx["variance"],
+        question=req.question,
+        )
+    except Exception:
+     # Safety fallback — never break the endpoint
+        llm_analysis = None
+
+    return _compare_answer(upload_id, compare_id, req.question, ctx, llm_analysis)
+
+
+@router.post("/ask/{upload_id}/batch")
+def ask_batch(upload_id: str, req: AskBatchRequest):
+    """
+    Many questions about one filing (or one base/compare pair) in one request.
+    The uploads are loaded, chunked and indexed once; single-doc questions are ranked
+    together, compare-mode LLM calls run concurrently. results[i] is what
+    POST /ask/{upload_id} returns for questions[i].
+    """
+    base = _load_upload(upload_id, req.max_tokens, req.overlap_tokens)
+    base_metrics, base_pages, base_chunks, base_index = base
+
+    if not req.compare_upload_id:
+        base_vectors = get_upload_vectors(
+            settings.storage_dir, upload_id, req.max_tokens, req.overlap_tokens, chunks=base_chunks
+        )
+        results = answer_numbers_first_many(
+            upload_id=upload_id,
+            questions=req.questions,
+            metrics=base_metrics,
+            pages=base_pages,
+            max_tokens=req.max_tokens,
+            overlap_tokens=req.overlap_tokens,
+            chunks=base_chunks,
+            index=base_index,
+            vectors=base_vectors,
+        )
+    else:
+        compare_id = req.compare_upload_id
+        ctx = _compare_context(upload_id, compare_id, req.max_tokens, req.overlap_tokens, base)
+        analyses = explain_variance_many(variance=ctx["variance"], questions=req.questions)
+        results = [
+            _compare_answer(upload_id, compare_id, question, ctx, llm_analysis)
+            for question, llm_analysis in zip(req.questions, analyses)
+        ]
+
+    return {
+        "upload_id": upload_id,
+        "compare_upload_id": req.compare_upload_id,
+        "count": len(results),
+        "results": results,
+    }
@@ -1,29 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
 from app.core.config import settings
-from app.services.chunking import chunk_pages
-from app.services.parsing import load_extracted_pages
+from app.services.chunk_store import MAX_CHUNK_TOKENS, MIN_CHUNK_TOKENS, check_chunking, get_upload_chunks
 
 router = APIRouter(tags=["chunks"])
 
 
 @router.get("/uploads/{upload_id}/chunks")
-def get_chunks(upload_id: str, max_tokens: int = 700, overlap_tokens: int = 120):
+def get_chunks(
+    upload_id: str,
+    max_tokens: int = Query(700, ge=MIN_CHUNK_TOKENS, le=MAX_CHUNK_TOKENS),
+    overlap_tokens: int = Query(120, ge=0),
+):
     try:
-        pages = load_extracted_pages(settings.storage_dir, upload_id)
+        check_chunking(max_tokens, overlap_tokens)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        chunks = get_upload_chunks(settings.storage_dir, upload_id, max_tokens, overlap_tokens)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="upload_id not found")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
-    chunks = chunk_pages(
-        upload_id=upload_id,
-        pages=pages,
-        max_tokens=max_tokens,
-        overlap_tokens=overlap_tokens,
-        meta={"source": "pdf"},
-    )
-
     return {
         "upload_id": upload_id,
         "chunk_count": len(chunks),
@@ -33,7 +33,8 @@ def get_chunks(upload_id: str, max_tokens: int = 700, overlap_tokens: int = 120)
                 "page_start": c.page_start,
                 "page_end": c.page_end,
                 "token_count": c.token_count,
-                "text_preview": c.text[:220],
+                "section": c.meta.get("section"),
+                "text_preview": c.preview(220),
             }
             for c in chunks
         ],
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pathlib import Path
 
 from app.core.config import settings
-from app.services.pdf_parser import extract_text_by_page, PDFParseError
-from app.services.parsing import save_extracted_pages
+from app.services.jobs import JobQueueFullError, get_scheduler
+from app.services.pdf_parser import PDFParseError, PDFParseMemoryError, PDFParseTimeoutError
+from app.services.pipeline import (
+    ExtractionInterruptedError,
+    complete_extraction,
+    run_extraction,
+    run_statements_first,
+)
 
 router = APIRouter(tags=["extract"])
 
@@ -13,23 +19,82 @@ def upload_path(upload_id: str) -> Path:
 
 
 @router.post("/extract/{upload_id}")
-def extract(upload_id: str):
+def extract(
+    upload_id: str,
+    response: Response,
+    background: bool = False,
+    priority: int = 10,
+    statements_first: bool = False,
+):
     pdf_path = upload_path(upload_id)
 
     if not pdf_path.exists():
         raise HTTPException(status_code=404, detail="upload_id not found")
 
+    if background and statements_first:
+        # statements-first exists to answer inline; a background job would silently do a full extraction
+        raise HTTPException(
+            status_code=422,
+            detail="statements_first can't be combined with background (remaining pages are already deferred)",
+        )
+
+    if background:
+        try:
+            job = get_scheduler().submit(
+                "extract",
+                run_extraction,
+                settings.storage_dir,
+                settings.upload_dir,
+                upload_id,
+                settings.extract_backend,
+                priority=priority,
+                upload_id=upload_id,
+            )
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        response.status_code = 202
+        return {**job.to_dict(), "status_url": f"/jobs/{job.job_id}"}
+
+    try:
+        if statements_first:
+            return _extract_statements_first(upload_id, priority)
+        return run_extraction(settings.storage_dir, settings.upload_dir, upload_id, settings.extract_backend)
+    except ExtractionInterruptedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"extraction interrupted after {e.pages_done} pages (retry to resume): {e}",
+        )
+    except PDFParseTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PDFParseMemoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except PDFParseError as e:
+        # the sandboxed worker crashed (e.g. the parser segfaulted on a malformed PDF)
+        raise HTTPException(status_code=422, detail=f"extraction failed: {e}")
+
+
+def _extract_statements_first(upload_id: str, priority: int) -> dict:
+    """
+    Statement pages (and metrics) now; everything else as a lower-priority background job.
+    """
+    result = run_statements_first(settings.storage_dir, settings.upload_dir, upload_id, settings.extract_backend)
+
+    remaining = result["remaining_pages"]
+    if not remaining:
+        return {**result, "remaining_job": None}
+
+    args = (settings.storage_dir, settings.upload_dir, upload_id, remaining, settings.extract_backend)
     try:
-        pages = extract_text_by_page(pdf_path)
-        if not pages:
-            pages = [{"page": 1, "text": ""}]
-    except PDFParseError:
-        pages = [{"page": 1, "text": ""}]
-
-    out_path = save_extracted_pages(settings.storage_dir, upload_id, pages)
-
-    return {
-        "upload_id": upload_id,
-        "num_pages": len(pages),
-        "extracted_saved_as": str(out_path),
-    }
+        job = get_scheduler().submit(
+            "extract_remaining",
+            complete_extraction,
+            *args,
+            priority=priority + 10,
+            upload_id=upload_id,
+        )
+    except JobQueueFullError:
+        # no room to defer: finish inline rather than leave the extraction partial
+        complete_extraction(*args)
+        return {**result, "remaining_job": None}
+
+    return {**result, "remaining_job": {**job.to_dict(), "status_url": f"/jobs/{job.job_id}"}}
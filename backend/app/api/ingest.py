@@ -0,0 +1,72 @@
+from fastapi import APIRouter, File, HTTPException, Query, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.api.upload import store_upload
+from app.core.config import settings
+from app.services.chunk_store import MAX_CHUNK_TOKENS, MIN_CHUNK_TOKENS, check_chunking
+from app.services.jobs import JobQueueFullError, get_scheduler
+from app.services.pdf_parser import PDFParseError, PDFParseMemoryError, PDFParseTimeoutError
+from app.services.metrics_store import load_metrics
+from app.services.pipeline import ExtractionInterruptedError, run_ingest
+
+router = APIRouter(tags=["ingest"])
+
+
+@router.post("/ingest")
+async def ingest(
+    response: Response,
+    file: UploadFile = File(...),
+    max_tokens: int = Query(700, ge=MIN_CHUNK_TOKENS, le=MAX_CHUNK_TOKENS),
+    overlap_tokens: int = Query(120, ge=0),
+    background: bool = False,
+    force: bool = False,
+):
+    """
+    Upload + extract + metrics + chunk indexing in one request.
+    Pages go from the parser straight into metrics and chunking; nothing is re-read from disk.
+    """
+    try:
+        check_chunking(max_tokens, overlap_tokens)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    upload = await store_upload(file)
+    upload_id = upload["upload_id"]
+
+    # Same bytes already ingested -> answer from the stored artifacts.
+    if upload["deduplicated"] and upload["cached"]["metrics"] and not force:
+        payload = load_metrics(settings.storage_dir, upload_id)
+        return {**upload, "ingested": False, "metrics": payload.get("metrics", {})}
+
+    args = (
+        settings.storage_dir,
+        settings.upload_dir,
+        upload_id,
+        settings.extract_backend,
+        max_tokens,
+        overlap_tokens,
+    )
+
+    if background:
+        try:
+            job = get_scheduler().submit("ingest", run_ingest, *args, upload_id=upload_id)
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        response.status_code = 202
+        return {**upload, **job.to_dict(), "status_url": f"/jobs/{job.job_id}"}
+
+    try:
+        result = await run_in_threadpool(run_ingest, *args)
+    except ExtractionInterruptedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"extraction interrupted after {e.pages_done} pages (retry to resume): {e}",
+        )
+    except PDFParseTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PDFParseMemoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except PDFParseError as e:
+        # the sandboxed worker crashed (e.g. the parser segfaulted on a malformed PDF)
+        raise HTTPException(status_code=422, detail=f"extraction failed: {e}")
+    return {**upload, "ingested": True, **result}
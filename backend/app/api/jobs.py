@@ -0,0 +1,13 @@
+from fastapi import APIRouter, HTTPException
+
+from app.services.jobs import get_scheduler
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = get_scheduler().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
@@ -1,34 +1,35 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
 from app.core.config import settings
-from app.services.parsing import load_extracted_pages
-from app.services.metrics import extract_basic_metrics
-from app.services.metrics_store import save_metrics
+from app.services.jobs import JobQueueFullError, get_scheduler
+from app.services.parsing import has_extracted_pages
+from app.services.pipeline import run_metrics
 
 router = APIRouter(tags=["metrics"])
 
 
 @router.post("/metrics/{upload_id}")
-def build_metrics(upload_id: str):
+def build_metrics(upload_id: str, response: Response, background: bool = False, priority: int = 10):
+    if background:
+        if not has_extracted_pages(settings.storage_dir, upload_id):
+            raise HTTPException(status_code=404, detail="upload_id not found")
+        try:
+            job = get_scheduler().submit(
+                "metrics",
+                run_metrics,
+                settings.storage_dir,
+                upload_id,
+                priority=priority,
+                upload_id=upload_id,
+            )
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        response.status_code = 202
+        return {**job.to_dict(), "status_url": f"/jobs/{job.job_id}"}
+
     try:
-        pages = load_extracted_pages(settings.storage_dir, upload_id)
+        return run_metrics(settings.storage_dir, upload_id)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="upload_id not found")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
-
-    extracted = extract_basic_metrics(pages)
-
-    payload = {
-        "upload_id": upload_id,
-        "metrics": extracted["metrics"],
-        "evidence": extracted["evidence"],
-    }
-
-    out_path = save_metrics(settings.storage_dir, upload_id, payload)
-
-    return {
-        "upload_id": upload_id,
-        "saved_as": str(out_path),
-        "metrics": payload["metrics"],
-    }
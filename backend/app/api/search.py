@@ -0,0 +1,51 @@
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.core.config import settings
+from app.services.chunk_store import get_upload_chunks, source_fingerprint
+from app.services.corpus_index import add_upload, corpus_stats, search_corpus
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1),
+    top_k: int = Query(10, ge=1, le=100),
+    upload_id: Optional[List[str]] = Query(None),
+):
+    """
+    Ranked chunks across every indexed upload (or only the given upload_id values).
+    """
+    t0 = time.perf_counter()
+    found = search_corpus(settings.storage_dir, q, top_k=top_k, upload_ids=upload_id)
+    return {
+        "query": q,
+        "uploads_searched": found["uploads"],
+        "chunks_searched": found["chunks"],
+        # re-extracted since they were indexed: POST /search/index/{upload_id} to refresh
+        "stale_uploads": found["stale_uploads"],
+        "took_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "results": found["hits"],
+    }
+
+
+@router.post("/search/index/{upload_id}")
+def index_upload(upload_id: str):
+    """
+    Adds (or refreshes) an upload in the corpus index; /ingest does this automatically.
+    """
+    try:
+        chunks = get_upload_chunks(settings.storage_dir, upload_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="upload_id not found")
+
+    add_upload(settings.storage_dir, upload_id, chunks, source=source_fingerprint(settings.storage_dir, upload_id))
+    return {"upload_id": upload_id, "chunk_count": len(chunks), "corpus": corpus_stats(settings.storage_dir)}
+
+
+@router.get("/search/stats")
+def search_stats():
+    return corpus_stats(settings.storage_dir)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+
+from app.core.config import settings
+from app.services.artifact_cache import get_artifact_cache
+from app.services.extract_worker import get_isolated_extractor
+from app.services.jobs import get_scheduler
+from app.services.tokens import CachedTokenCounter, get_token_counter
+from app.services.uploads import load_upload_stats
+
+router = APIRouter(tags=["stats"])
+
+
+@router.get("/stats/uploads")
+def upload_stats():
+    return load_upload_stats(settings.upload_dir)
+
+
+@router.get("/stats/jobs")
+def job_stats():
+    return get_scheduler().stats()
+
+
+@router.get("/stats/workers")
+def worker_stats():
+    return get_isolated_extractor().stats()
+
+
+@router.get("/stats/cache")
+def cache_stats():
+    return get_artifact_cache().stats()
+
+
+@router.get("/stats/tokens")
+def token_stats():
+    counter = get_token_counter()
+    return counter.stats() if isinstance(counter, CachedTokenCounter) else {"counter": counter.name}
@@ -6,6 +6,14 @@ from pathlib import Path
 from fastapi import APIRouter, File, UploadFile, HTTPException
 
 from app.core.config import settings
+from app.services.artifact_store import get_store
+from app.services.uploads import (
+    UploadTooLargeError,
+    find_existing_upload,
+    record_upload,
+    stream_upload_to_disk,
+    upload_path,
+)
 
 router = APIRouter(tags=["upload"])
 
@@ -16,15 +24,62 @@ def ensure_upload_dir() -> Path:
     return p
 
 
-@router.post("/upload")
-async def upload_report(file: UploadFile = File(...)):
+async def store_upload(file: UploadFile) -> dict:
+    """
+    Streams an uploaded PDF to disk (deduplicated by content hash).
+    Shared by /upload and /ingest.
+    """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=415, detail="Only PDF files are supported")
 
+    upload_dir = ensure_upload_dir()
     upload_id = str(uuid.uuid4())
-    out_path = ensure_upload_dir() / f"{upload_id}.pdf"
+    out_path = upload_path(upload_dir, upload_id)
+
+    try:
+        size, sha256 = await stream_upload_to_disk(
+            file.read,
+            out_path,
+            max_bytes=settings.max_upload_mb * 1024 * 1024,
+        )
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail=f"File exceeds {settings.max_upload_mb} MB limit")
+
+    # Same bytes as an earlier upload -> hand back the existing id so cached
+    # extracted pages / metrics / chunks are reused instead of re-running the pipeline.
+    store = get_store(settings.storage_dir)
+    existing_id = find_existing_upload(store, upload_dir, sha256)
+    deduplicated = existing_id is not None
+    if deduplicated:
+        out_path.unlink(missing_ok=True)
+        upload_id = existing_id
+        out_path = upload_path(upload_dir, upload_id)
+    else:
+        store.register_upload(upload_id, sha256, size)
+
+    record_upload(upload_dir, deduplicated=deduplicated)
+
+    return {
+        "upload_id": upload_id,
+        "saved_as": str(out_path),
+        "size_bytes": size,
+        "sha256": sha256,
+        "deduplicated": deduplicated,
+        "cached": {
+            "extracted": store.has_pages(upload_id),
+            "metrics": store.has_metrics(upload_id),
+        },
+    }
+
+
+@router.post("/upload")
+async def upload_report(file: UploadFile = File(...)):
+    return await store_upload(file)
 
-    data = await file.read()
-    out_path.write_bytes(data)
 
-    return {"upload_id": upload_id, "saved_as": str(out_path)}
+@router.get("/uploads")
+def list_uploads(fiscal_period: str | None = None):
+    """
+    Uploads with stored metrics, optionally filtered by fiscal period end ("YYYY-MM-DD").
+    """
+    return {"uploads": get_store(settings.storage_dir).list_uploads(fiscal_period)}
@@ -0,0 +1,205 @@
+# backend/app/cli.py
+"""
+Offline batch ingestion.
+
+    python main.py ingest storage/inbox/            # every *.pdf in a directory (recursive)
+    python main.py ingest "filings/2025-Q*/*.pdf"   # or globs / explicit files
+
+Writes into the same storage_dir / upload_dir layout as the API. Re-running is safe:
+documents whose bytes were already ingested (same SHA-256, metrics on disk) are skipped,
+and half-finished ones resume from their extraction checkpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.chunk_store import check_chunking
+
+
+def _collect_pdfs(inputs: List[str]) -> List[Path]:
+    found: Dict[str, Path] = {}
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            matches = sorted(p.rglob("*.pdf"))
+        elif p.is_file():
+            matches = [p]
+        else:
+            matches = sorted(Path(m) for m in glob.glob(item, recursive=True))
+        for m in matches:
+            if m.is_file() and m.suffix.lower() == ".pdf":
+                found[str(m.resolve())] = m
+    return list(found.values())
+
+
+def _unique_by_hash(pdfs: List[Path]) -> Tuple[List[Tuple[Path, Tuple[int, str]]], List[Tuple[Path, Path]]]:
+    """
+    ([(pdf, (size, sha256))] with each distinct content once, [(duplicate, first pdf with its bytes)]).
+    Two workers given the same bytes would both miss the hash index and ingest them twice.
+    """
+    from app.services.uploads import hash_file
+
+    unique: List[Tuple[Path, Tuple[int, str]]] = []
+    duplicates: List[Tuple[Path, Path]] = []
+    first: Dict[str, Path] = {}
+    for pdf in pdfs:
+        digest = hash_file(pdf)
+        if digest[1] in first:
+            duplicates.append((pdf, first[digest[1]]))
+        else:
+            first[digest[1]] = pdf
+            unique.append((pdf, digest))
+    return unique, duplicates
+
+
+def ingest_file(
+    path: str,
+    storage_dir: str,
+    upload_dir: str,
+    backend: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    digest: Optional[Tuple[int, str]] = None,
+) -> Dict[str, Any]:
+    """
+    One document: hash -> (skip if already ingested) -> copy into uploads -> run_ingest.
+    Runs in a pool worker, so everything is passed explicitly.
+    digest: (size_bytes, sha256) if the caller already hashed the file.
+    """
+    from app.services.artifact_store import get_store
+    from app.services.pipeline import run_ingest
+    from app.services.uploads import (
+        copy_file_to_uploads,
+        find_existing_upload,
+        hash_file,
+        record_upload,
+    )
+
+    started = time.perf_counter()
+    size, sha256 = digest if digest is not None else hash_file(path)
+
+    store = get_store(storage_dir)
+    upload_id = find_existing_upload(store, upload_dir, sha256)
+    if upload_id and store.has_metrics(upload_id):
+        return {"path": path, "upload_id": upload_id, "status": "skipped", "num_pages": 0, "seconds": 0.0}
+
+    if upload_id is None:
+        upload_id = str(uuid.uuid4())
+        copy_file_to_uploads(path, upload_dir, upload_id)
+        store.register_upload(upload_id, sha256, size)
+        record_upload(upload_dir, deduplicated=False)
+
+    result = run_ingest(storage_dir, upload_dir, upload_id, backend, max_tokens, overlap_tokens)
+    return {
+        "path": path,
+        "upload_id": upload_id,
+        "status": "ingested",
+        "num_pages": result["num_pages"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _init_worker(extract_isolated: bool) -> None:
+    """
+    Pool-worker initializer: parallelism is across documents here, so one extraction
+    process per document is enough. The environment variable is set in the pool worker
+    only, where the extraction sandboxes it spawns pick it up.
+    """
+    os.environ["EXTRACT_WORKERS"] = "1"
+    settings.extract_workers = 1
+    settings.extract_isolated = extract_isolated
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    pdfs = _collect_pdfs(args.inputs)
+    if not pdfs:
+        print("no PDF files matched", file=sys.stderr)
+        return 2
+
+    try:
+        check_chunking(args.max_tokens, args.overlap_tokens)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+
+    settings.extract_isolated = not args.no_isolation
+
+    job_args = (args.storage_dir, args.upload_dir, args.backend, args.max_tokens, args.overlap_tokens)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    print(f"ingesting {len(pdfs)} PDFs with {workers} worker(s) -> {args.storage_dir}")
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    failures = 0
+
+    unique, duplicates = _unique_by_hash(pdfs)
+    for pdf, same_as in duplicates:
+        print(f"  [ skipped] {pdf}: same bytes as {same_as}")
+
+    def report(res: Dict[str, Any]) -> None:
+        results.append(res)
+        print(f"  [{res['status']:>8}] {res['path']} -> {res['upload_id']} ({res['num_pages']} pages, {res['seconds']}s)")
+
+    if workers == 1:
+        for pdf, digest in unique:
+            try:
+                report(ingest_file(str(pdf), *job_args, digest))
+            except Exception as e:
+                failures += 1
+                print(f"  [  failed] {pdf}: {type(e).__name__}: {e}", file=sys.stderr)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(not args.no_isolation,),
+        ) as pool:
+            futures = {pool.submit(ingest_file, str(pdf), *job_args, digest): pdf for pdf, digest in unique}
+            for fut in as_completed(futures):
+                try:
+                    report(fut.result())
+                except Exception as e:
+                    failures += 1
+                    print(f"  [  failed] {futures[fut]}: {type(e).__name__}: {e}", file=sys.stderr)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    ingested = [r for r in results if r["status"] == "ingested"]
+    skipped = len(results) - len(ingested) + len(duplicates)
+    pages = sum(r["num_pages"] for r in ingested)
+
+    print(
+        f"done: {len(ingested)} ingested, {skipped} skipped, {failures} failed in {elapsed:.2f}s | "
+        f"{len(ingested) / elapsed:.2f} docs/sec, {pages / elapsed:.1f} pages/sec"
+    )
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description=settings.app_name)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ing = sub.add_parser("ingest", help="batch-ingest PDFs (upload + extract + metrics + chunks)")
+    ing.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    ing.add_argument("--workers", type=int, default=0, help="parallel documents (0 = one per CPU)")
+    ing.add_argument("--storage-dir", default=settings.storage_dir)
+    ing.add_argument("--upload-dir", default=settings.upload_dir)
+    ing.add_argument("--backend", default=settings.extract_backend, choices=["pypdfium2", "pdfplumber"])
+    ing.add_argument("--max-tokens", type=int, default=700)
+    ing.add_argument("--overlap-tokens", type=int, default=120)
+    ing.add_argument("--no-isolation", action="store_true", help="parse in-process (no sandbox worker)")
+    ing.set_defaults(func=cmd_ingest)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
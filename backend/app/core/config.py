@@ -13,12 +13,43 @@ class Settings(BaseSettings):
     storage_dir: str = "storage"
     upload_dir: str = "storage/uploads"
     extracted_dir: str = "storage/extracted"
-    chunks_dir: str = "storage/chunks"
+    # chunk sets and their vectors (file backend); unset = storage_dir/chunks
+    chunks_dir: str | None = None
+    # artifact backend: "file" (one JSON file per artifact) | "sqlite" (storage_dir/artifacts.db)
+    storage_backend: str = "file"
+    # page-text compression for extracted pages: "none" (mmap-able page blob) | "gzip" | "zstd"
+    storage_compression: str = "none"
+
+    # in-process LRU cache for decoded extracted pages / metrics (0 disables)
+    artifact_cache_mb: int = 256
+
+    # token counting for chunk sizes / prompt budgets: "bpe" (offline BPE estimate) | "whitespace"
+    token_counter: str = "bpe"
+    llm_prompt_max_tokens: int = 6000
+    # concurrent LLM calls per batch request (POST /ask/{upload_id}/batch)
+    llm_max_concurrency: int = 8
 
     # limits/logging
     max_upload_mb: int = 50
     log_level: str = "INFO"
 
+    # extraction (0 workers = one per CPU; backend: "pypdfium2" | "pdfplumber")
+    extract_backend: str = "pypdfium2"
+    extract_workers: int = 0
+    extract_pages_per_task: int = 8
+
+    # sandboxed extraction workers (timeout / RSS cap per document, recycled after N docs)
+    extract_isolated: bool = True
+    extract_isolated_workers: int = 2
+    extract_timeout_s: float = 300.0
+    extract_max_rss_mb: int = 2048
+    extract_worker_max_docs: int = 20
+
+    # background jobs (executor: "thread" | "process")
+    job_workers: int = 2
+    job_executor: str = "thread"
+    job_queue_size: int = 100
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
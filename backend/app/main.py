@@ -10,6 +10,10 @@ from app.api.chunks import router as chunks_router
 from app.api.metrics import router as metrics_router
 from app.api.variance import router as variance_router
 from app.api.ask import router as ask_router
+from app.api.stats import router as stats_router
+from app.api.jobs import router as jobs_router
+from app.api.ingest import router as ingest_router
+from app.api.search import router as search_router
 
 
 def create_app() -> FastAPI:
@@ -41,6 +45,10 @@ def create_app() -> FastAPI:
     app.include_router(metrics_router)
     app.include_router(variance_router)
     app.include_router(ask_router)
+    app.include_router(stats_router)
+    app.include_router(jobs_router)
+    app.include_router(ingest_router)
+    app.include_router(search_router)
 
     @app.get("/")
     def welcome():
@@ -0,0 +1,165 @@
+"""
+In-process LRU cache for decoded artifacts (extracted pages, metrics, chunks).
+
+Entries are validated against a cheap stamp from the storage backend
+(file: mtime + size, SQLite: row version) so writes by another process are
+picked up; saves in this process invalidate directly (write-through).
+Eviction is by estimated memory, not entry count.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+# rough per-object overheads used by _estimate_size (CPython, 64-bit)
+_STR_OVERHEAD = 50
+_CONTAINER_OVERHEAD = 64
+_SLOT_OVERHEAD = 8
+
+
+def _estimate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """
+    Approximate resident size of decoded artifacts (str / numbers / lists / dicts,
+    arrays, dataclasses and __slots__ objects). Objects shared between several entries
+    (e.g. the DocText behind span chunks) are counted once.
+    """
+    if seen is None:
+        seen = set()
+    if isinstance(obj, (int, float, bool)) or obj is None:
+        return 32
+    if id(obj) in seen:
+        return _SLOT_OVERHEAD
+    seen.add(id(obj))
+
+    if isinstance(obj, str):
+        return _STR_OVERHEAD + len(obj)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):  # numpy arrays (chunk vectors)
+        return _CONTAINER_OVERHEAD + nbytes
+    if isinstance(obj, dict):
+        return _CONTAINER_OVERHEAD + sum(
+            _SLOT_OVERHEAD * 2 + _estimate_size(k, seen) + _estimate_size(v, seen) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return _CONTAINER_OVERHEAD + sum(_SLOT_OVERHEAD + _estimate_size(v, seen) for v in obj)
+    if is_dataclass(obj):
+        names = [f.name for f in fields(obj)]
+    else:
+        names = []
+        for cls in type(obj).__mro__:
+            slots = getattr(cls, "__slots__", ())
+            names.extend([slots] if isinstance(slots, str) else slots)
+    return _CONTAINER_OVERHEAD + sum(_SLOT_OVERHEAD + _estimate_size(getattr(obj, n, None), seen) for n in names)
+
+
+class ArtifactCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get_or_load(self, key: Hashable, stamp: Optional[Hashable], load: Callable[[], Any]) -> Any:
+        """
+        Cached value for key if its stamp still matches, otherwise load() and cache.
+        A None stamp (artifact missing / backend can't tell) always goes to load().
+        """
+        if stamp is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                self._stats["misses"] += 1
+
+        value = load()
+        if stamp is not None:
+            self._put(key, stamp, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["entries"] = len(self._entries)
+            out["bytes"] = self._bytes
+        out["max_bytes"] = self.max_bytes
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+    def _put(self, key: Hashable, stamp: Hashable, value: Any) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return  # larger than the whole budget: don't flush everything else for it
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (stamp, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+
+
+_cache: Optional[ArtifactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """
+    Process-wide cache, sized from settings.artifact_cache_mb on first use
+    (0 disables caching: nothing fits, every lookup loads).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from app.core.config import settings
+
+            _cache = ArtifactCache(max_bytes=max(0, settings.artifact_cache_mb) * 1024 * 1024)
+        return _cache
+
+
+def cached_load(
+    kind: str,
+    storage_dir: str,
+    upload_id: str,
+    load: Callable[[], Any],
+    stamp_kind: Optional[str] = None,
+) -> Any:
+    """
+    load() through the cache, keyed by backend + storage_dir + artifact.
+    stamp_kind: artifact whose stamp validates the entry (defaults to kind; derived
+    artifacts such as chunks are validated against the pages they were built from).
+    """
+    from app.core.config import settings
+    from app.services.artifact_store import get_store
+
+    store = get_store(storage_dir)
+    key = (settings.storage_backend, str(storage_dir), kind, upload_id)
+    return get_artifact_cache().get_or_load(key, store.stamp(stamp_kind or kind, upload_id), load)
+
+
+def invalidate_cached(kind: str, storage_dir: str, upload_id: str) -> None:
+    from app.core.config import settings
+
+    get_artifact_cache().invalidate((settings.storage_backend, str(storage_dir), kind, upload_id))
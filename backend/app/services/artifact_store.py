@@ -0,0 +1,582 @@
+"""
+Storage backends for per-upload artifacts (extracted pages, metrics, variance, chunks,
+chunk search indexes and vectors).
+
+  - FileArtifactStore:   one file per artifact under storage_dir (the original layout)
+  - SQLiteArtifactStore: a single WAL-mode database at storage_dir/artifacts.db with
+                         indexes on upload_id, content hash and fiscal period
+
+The module-level helpers in parsing.py / metrics_store.py / variance_store.py /
+chunk_store.py / chunk_index.py keep their signatures and route through
+get_store(storage_dir), which picks the backend from settings.storage_backend
+("file" | "sqlite").
+"""
+from __future__ import annotations
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from app.services.page_store import open_page_blob, write_page_blob
+from app.services.storage_format import decode_json, encode_json, read_artifact, write_artifact, write_bytes_atomic
+
+
+class ArtifactStore(ABC):
+    """
+    Backend interface. Loads raise FileNotFoundError when the artifact doesn't exist.
+    Saves return the path the artifact lives in (file, or the database file).
+    """
+
+    @abstractmethod
+    def save_pages(self, upload_id: str, pages: List[Dict[str, Any]], codec: str = "none") -> Path:
+        ...
+
+    @abstractmethod
+    def load_pages(self, upload_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def has_pages(self, upload_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save_metrics(self, upload_id: str, payload: Dict[str, Any]) -> Path:
+        ...
+
+    @abstractmethod
+    def load_metrics(self, upload_id: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def has_metrics(self, upload_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save_variance(self, base_upload_id: str, compare_upload_id: str, payload: Dict[str, Any]) -> Path:
+        ...
+
+    @abstractmethod
+    def load_variance(self, base_upload_id: str, compare_upload_id: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def save_chunks(self, upload_id: str, key: str, chunks: Any) -> Path:
+        ...
+
+    @abstractmethod
+    def load_chunks(self, upload_id: str, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def save_index(self, upload_id: str, key: str, index: Any) -> Path:
+        ...
+
+    @abstractmethod
+    def load_index(self, upload_id: str, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def save_vectors(self, upload_id: str, key: str, data: bytes) -> Path:
+        ...
+
+    @abstractmethod
+    def load_vectors(self, upload_id: str, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def register_upload(self, upload_id: str, sha256: str, size_bytes: int) -> None:
+        ...
+
+    @abstractmethod
+    def find_upload_by_hash(self, sha256: str) -> Optional[str]:
+        """
+        upload_id most recently registered for these bytes, or None. Callers check
+        that the upload's PDF still exists before reusing it.
+        """
+        ...
+
+    @abstractmethod
+    def list_uploads(self, fiscal_period: Optional[str] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def stamp(self, kind: str, upload_id: str) -> Optional[Hashable]:
+        """
+        Cheap version marker for an artifact ("pages" | "metrics"), changing whenever
+        it is rewritten; None if it doesn't exist. Used to validate cached copies.
+        """
+        ...
+
+
+# ---------------------------------------------------------------------------
+# File backend
+# ---------------------------------------------------------------------------
+
+class FileArtifactStore(ArtifactStore):
+    def __init__(self, storage_dir: str | Path, chunks_dir: str | Path | None = None) -> None:
+        self.root = Path(storage_dir)
+        # chunk sets (and the vectors next to them) can live elsewhere (settings.chunks_dir)
+        self.chunks_root = Path(chunks_dir) if chunks_dir else self.root / "chunks"
+
+    def pages_path(self, upload_id: str) -> Path:
+        return self.root / "extracted" / f"{upload_id}.json"
+
+    def page_blob_path(self, upload_id: str) -> Path:
+        return self.root / "extracted" / f"{upload_id}.pages"
+
+    def _current_pages_path(self, upload_id: str) -> Path:
+        blob = self.page_blob_path(upload_id)
+        return blob if blob.exists() else self.pages_path(upload_id)
+
+    def metrics_path(self, upload_id: str) -> Path:
+        return self.root / "metrics" / f"{upload_id}.json"
+
+    def variance_path(self, base_upload_id: str, compare_upload_id: str) -> Path:
+        return self.root / "variance" / f"{base_upload_id}__vs__{compare_upload_id}.json"
+
+    def chunks_path(self, upload_id: str, key: str) -> Path:
+        return self.chunks_root / upload_id / f"{key}.json"
+
+    def index_path(self, upload_id: str, key: str) -> Path:
+        return self.root / "indexes" / upload_id / f"{key}.json"
+
+    def vectors_path(self, upload_id: str, key: str) -> Path:
+        # next to the chunk set the vectors were computed from
+        return self.chunks_root / upload_id / f"{key}.vectors.npz"
+
+    def _load(self, path: Path, what: str, upload_id: str) -> Any:
+        if not path.exists():
+            raise FileNotFoundError(f"{what} not found for upload_id={upload_id} at {path}")
+        return read_artifact(path)
+
+    def save_pages(self, upload_id: str, pages: List[Dict[str, Any]], codec: str = "none") -> Path:
+        """
+        Uncompressed pages go to the mmap-able page blob; with a compression codec
+        they're stored as a (compressed) JSON artifact instead. The other form is removed.
+        """
+        blob, json_path = self.page_blob_path(upload_id), self.pages_path(upload_id)
+        if codec == "none":
+            out = write_page_blob(blob, pages)
+            json_path.unlink(missing_ok=True)
+        else:
+            out = write_artifact(json_path, [dict(p) for p in pages], codec)
+            blob.unlink(missing_ok=True)
+        return out
+
+    def load_pages(self, upload_id: str) -> List[Dict[str, Any]]:
+        """
+        Page blobs load as lazy MappedPage views; JSON artifacts (compressed or legacy) as dicts.
+        """
+        path = self._current_pages_path(upload_id)
+        if path.suffix == ".pages":
+            try:
+                return open_page_blob(path)
+            except FileNotFoundError:
+                path = self.pages_path(upload_id)  # replaced by a compressed save meanwhile
+        return self._load(path, "Extracted pages", upload_id)
+
+    def has_pages(self, upload_id: str) -> bool:
+        return self.page_blob_path(upload_id).exists() or self.pages_path(upload_id).exists()
+
+    def save_metrics(self, upload_id: str, payload: Dict[str, Any]) -> Path:
+        return write_artifact(self.metrics_path(upload_id), payload)
+
+    def load_metrics(self, upload_id: str) -> Dict[str, Any]:
+        return self._load(self.metrics_path(upload_id), "Metrics", upload_id)
+
+    def has_metrics(self, upload_id: str) -> bool:
+        return self.metrics_path(upload_id).exists()
+
+    def save_variance(self, base_upload_id: str, compare_upload_id: str, payload: Dict[str, Any]) -> Path:
+        return write_artifact(self.variance_path(base_upload_id, compare_upload_id), payload)
+
+    def load_variance(self, base_upload_id: str, compare_upload_id: str) -> Dict[str, Any]:
+        path = self.variance_path(base_upload_id, compare_upload_id)
+        return self._load(path, "Variance", f"{base_upload_id}/{compare_upload_id}")
+
+    def save_chunks(self, upload_id: str, key: str, chunks: Any) -> Path:
+        return write_artifact(self.chunks_path(upload_id, key), chunks)
+
+    def load_chunks(self, upload_id: str, key: str) -> Any:
+        return self._load(self.chunks_path(upload_id, key), "Chunks", upload_id)
+
+    def save_index(self, upload_id: str, key: str, index: Any) -> Path:
+        return write_artifact(self.index_path(upload_id, key), index)
+
+    def load_index(self, upload_id: str, key: str) -> Any:
+        return self._load(self.index_path(upload_id, key), "Index", upload_id)
+
+    def save_vectors(self, upload_id: str, key: str, data: bytes) -> Path:
+        return write_bytes_atomic(self.vectors_path(upload_id, key), data)
+
+    def load_vectors(self, upload_id: str, key: str) -> bytes:
+        path = self.vectors_path(upload_id, key)
+        if not path.exists():
+            raise FileNotFoundError(f"Vectors not found for upload_id={upload_id} at {path}")
+        return path.read_bytes()
+
+    def stamp(self, kind: str, upload_id: str) -> Optional[Hashable]:
+        path = self._current_pages_path(upload_id) if kind == "pages" else self.metrics_path(upload_id)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        # writes go through temp file + rename, so the inode changes too
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def hash_index_path(self, sha256: str) -> Path:
+        return self.root / "by_hash" / f"{sha256}.json"
+
+    def upload_record_path(self, upload_id: str) -> Path:
+        return self.root / "by_upload" / f"{upload_id}.json"
+
+    def register_upload(self, upload_id: str, sha256: str, size_bytes: int) -> None:
+        # sha256 -> latest upload_id (dedup), and upload_id -> its hash (list_uploads)
+        record = json.dumps({"upload_id": upload_id, "sha256": sha256, "size_bytes": size_bytes}).encode("utf-8")
+        write_bytes_atomic(self.upload_record_path(upload_id), record)
+        write_bytes_atomic(self.hash_index_path(sha256), record)
+
+    def _upload_sha256(self, upload_id: str) -> Optional[str]:
+        try:
+            return json.loads(self.upload_record_path(upload_id).read_text(encoding="utf-8")).get("sha256")
+        except (FileNotFoundError, ValueError, AttributeError):
+            return None
+
+    def find_upload_by_hash(self, sha256: str) -> Optional[str]:
+        path = self.hash_index_path(sha256)
+        try:
+            return json.loads(path.read_text(encoding="utf-8")).get("upload_id") or None
+        except (FileNotFoundError, ValueError, AttributeError):
+            return None
+
+    def list_uploads(self, fiscal_period: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Directory scan of stored metrics (the SQLite backend answers this from an index).
+        """
+        out: List[Dict[str, Any]] = []
+        metrics_dir = self.root / "metrics"
+        if not metrics_dir.exists():
+            return out
+        for path in sorted(metrics_dir.glob("*.json")):
+            try:
+                payload = read_artifact(path)
+            except ValueError:
+                continue
+            if not isinstance(payload, dict):
+                continue
+            period = payload.get("fiscal_period")
+            if fiscal_period is not None and period != fiscal_period:
+                continue
+            out.append({"upload_id": path.stem, "fiscal_period": period, "sha256": self._upload_sha256(path.stem)})
+        return out
+
+
+# ---------------------------------------------------------------------------
+# SQLite backend
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id   TEXT PRIMARY KEY,
+    sha256      TEXT NOT NULL,
+    size_bytes  INTEGER NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(sha256);
+
+CREATE TABLE IF NOT EXISTS pages (
+    upload_id  TEXT NOT NULL,
+    page       INTEGER NOT NULL,
+    text       TEXT NOT NULL,
+    extra      TEXT,
+    PRIMARY KEY (upload_id, page)
+);
+CREATE TABLE IF NOT EXISTS page_sets (
+    upload_id   TEXT PRIMARY KEY,
+    num_pages   INTEGER NOT NULL,
+    updated_at  REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    upload_id      TEXT PRIMARY KEY,
+    fiscal_period  TEXT,
+    payload        BLOB NOT NULL,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_fiscal_period ON metrics(fiscal_period);
+
+CREATE TABLE IF NOT EXISTS variance (
+    base_upload_id     TEXT NOT NULL,
+    compare_upload_id  TEXT NOT NULL,
+    payload            BLOB NOT NULL,
+    updated_at         REAL NOT NULL,
+    PRIMARY KEY (base_upload_id, compare_upload_id)
+);
+CREATE INDEX IF NOT EXISTS idx_variance_compare ON variance(compare_upload_id);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    upload_id   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     BLOB NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (upload_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS indexes (
+    upload_id   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     BLOB NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (upload_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS vectors (
+    upload_id   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     BLOB NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (upload_id, key)
+);
+"""
+
+
+class _ConnectionPool:
+    """
+    Small fixed-size pool of SQLite connections shared across threads.
+    """
+
+    def __init__(self, db_path: Path, size: int = 4) -> None:
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(max(1, size)):
+            conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._pool.get()
+        try:
+            with conn:  # commit on success, rollback on error
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class SQLiteArtifactStore(ArtifactStore):
+    def __init__(self, db_path: str | Path, pool_size: int = 4) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = _ConnectionPool(self.db_path, pool_size)
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def save_pages(self, upload_id: str, pages: List[Dict[str, Any]], codec: str = "none") -> Path:
+        rows = []
+        for p in pages:
+            extra = {k: v for k, v in p.items() if k not in ("page", "text")}
+            rows.append((upload_id, int(p["page"]), str(p.get("text") or ""), json.dumps(extra) if extra else None))
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM pages WHERE upload_id = ?", (upload_id,))
+            conn.executemany("INSERT INTO pages (upload_id, page, text, extra) VALUES (?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO page_sets (upload_id, num_pages, updated_at) VALUES (?, ?, ?)",
+                (upload_id, len(rows), time.time()),
+            )
+        return self.db_path
+
+    def load_pages(self, upload_id: str) -> List[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT page, text, extra FROM pages WHERE upload_id = ? ORDER BY page", (upload_id,)
+            ).fetchall()
+        if not rows and not self.has_pages(upload_id):
+            raise FileNotFoundError(f"Extracted pages not found for upload_id={upload_id} in {self.db_path}")
+        pages = []
+        for page, text, extra in rows:
+            item: Dict[str, Any] = {"page": page, "text": text}
+            if extra:
+                item.update(json.loads(extra))
+            pages.append(item)
+        return pages
+
+    def has_pages(self, upload_id: str) -> bool:
+        return self._exists("SELECT 1 FROM page_sets WHERE upload_id = ?", (upload_id,))
+
+    def save_metrics(self, upload_id: str, payload: Dict[str, Any]) -> Path:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO metrics (upload_id, fiscal_period, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (upload_id, payload.get("fiscal_period"), encode_json(payload), time.time()),
+            )
+        return self.db_path
+
+    def load_metrics(self, upload_id: str) -> Dict[str, Any]:
+        return self._load_payload(
+            "SELECT payload FROM metrics WHERE upload_id = ?", (upload_id,), f"Metrics not found for upload_id={upload_id}"
+        )
+
+    def has_metrics(self, upload_id: str) -> bool:
+        return self._exists("SELECT 1 FROM metrics WHERE upload_id = ?", (upload_id,))
+
+    def save_variance(self, base_upload_id: str, compare_upload_id: str, payload: Dict[str, Any]) -> Path:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO variance (base_upload_id, compare_upload_id, payload, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (base_upload_id, compare_upload_id, encode_json(payload), time.time()),
+            )
+        return self.db_path
+
+    def load_variance(self, base_upload_id: str, compare_upload_id: str) -> Dict[str, Any]:
+        return self._load_payload(
+            "SELECT payload FROM variance WHERE base_upload_id = ? AND compare_upload_id = ?",
+            (base_upload_id, compare_upload_id),
+            f"Variance not found for {base_upload_id}/{compare_upload_id}",
+        )
+
+    def save_chunks(self, upload_id: str, key: str, chunks: Any) -> Path:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunks (upload_id, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (upload_id, key, encode_json(chunks), time.time()),
+            )
+        return self.db_path
+
+    def load_chunks(self, upload_id: str, key: str) -> Any:
+        return self._load_payload(
+            "SELECT payload FROM chunks WHERE upload_id = ? AND key = ?",
+            (upload_id, key),
+            f"Chunks not found for upload_id={upload_id}",
+        )
+
+    def save_index(self, upload_id: str, key: str, index: Any) -> Path:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indexes (upload_id, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (upload_id, key, encode_json(index), time.time()),
+            )
+        return self.db_path
+
+    def load_index(self, upload_id: str, key: str) -> Any:
+        return self._load_payload(
+            "SELECT payload FROM indexes WHERE upload_id = ? AND key = ?",
+            (upload_id, key),
+            f"Index not found for upload_id={upload_id}",
+        )
+
+    def save_vectors(self, upload_id: str, key: str, data: bytes) -> Path:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO vectors (upload_id, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (upload_id, key, data, time.time()),
+            )
+        return self.db_path
+
+    def load_vectors(self, upload_id: str, key: str) -> bytes:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM vectors WHERE upload_id = ? AND key = ?", (upload_id, key)
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Vectors not found for upload_id={upload_id} in {self.db_path}")
+        return bytes(row[0])
+
+    def register_upload(self, upload_id: str, sha256: str, size_bytes: int) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO uploads (upload_id, sha256, size_bytes, created_at) VALUES (?, ?, ?, ?)",
+                (upload_id, sha256, size_bytes, time.time()),
+            )
+
+    def find_upload_by_hash(self, sha256: str) -> Optional[str]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT upload_id FROM uploads WHERE sha256 = ? ORDER BY created_at DESC, rowid DESC LIMIT 1", (sha256,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def list_uploads(self, fiscal_period: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = (
+            "SELECT m.upload_id, m.fiscal_period, u.sha256 FROM metrics m "
+            "LEFT JOIN uploads u ON u.upload_id = m.upload_id"
+        )
+        params: Tuple[Any, ...] = ()
+        if fiscal_period is not None:
+            sql += " WHERE m.fiscal_period = ?"
+            params = (fiscal_period,)
+        sql += " ORDER BY m.upload_id"
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{"upload_id": r[0], "fiscal_period": r[1], "sha256": r[2]} for r in rows]
+
+    def stamp(self, kind: str, upload_id: str) -> Optional[Hashable]:
+        table = "page_sets" if kind == "pages" else "metrics"
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT updated_at FROM {table} WHERE upload_id = ?", (upload_id,)).fetchone()
+        return row[0] if row else None
+
+    def _exists(self, sql: str, params: Tuple[Any, ...]) -> bool:
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchone() is not None
+
+    def _load_payload(self, sql: str, params: Tuple[Any, ...], missing: str) -> Any:
+        with self._pool.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{missing} in {self.db_path}")
+        return decode_json(row[0])
+
+
+# ---------------------------------------------------------------------------
+# Backend selection
+# ---------------------------------------------------------------------------
+
+_stores: Dict[Tuple[str, str, Optional[str]], ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def sqlite_path(storage_dir: str | Path) -> Path:
+    return Path(storage_dir) / "artifacts.db"
+
+
+def get_store(storage_dir: str | Path, backend: Optional[str] = None) -> ArtifactStore:
+    """
+    Store for a storage_dir (one instance per backend + directory, so SQLite
+    connection pools are shared by every caller in the process).
+    """
+    from app.core.config import settings
+
+    if backend is None:
+        backend = settings.storage_backend
+    chunks_dir = settings.chunks_dir if backend == "file" else None
+
+    key = (backend, str(Path(storage_dir).resolve()), chunks_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "file":
+                store = FileArtifactStore(storage_dir, chunks_dir)
+            elif backend == "sqlite":
+                store = SQLiteArtifactStore(sqlite_path(storage_dir))
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+            _stores[key] = store
+        return store
@@ -0,0 +1,261 @@
+"""
+Per-upload inverted index over a chunk set, for keyword ranking.
+
+term -> {chunk number: [term positions]}, built once from the chunks (at ingest, or
+on the first query of an older upload) and persisted next to them under the same key.
+Keywords are phrases ("provision for income taxes"): candidate chunks come from
+the postings of the phrase's rarest term, occurrences from consecutive positions.
+Terms are indexed and looked up with plurals folded (matcher.match_terms), so
+"revenue" finds "Total revenues".
+
+Score per chunk = sum over keywords of 10 x BM25(phrase) plus the early-appearance
+bonus of the original linear scan (up to 5 points, fading over the first ~2500
+characters; character offsets are estimated from term positions).
+
+The index also keeps each chunk's statement section (chunk meta "section"), so a
+search can be restricted to some sections: other chunks are skipped before scoring.
+"""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Any, Container, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.artifact_cache import invalidate_cached
+from app.services.artifact_store import get_store
+from app.services.chunk_store import chunks_key, get_upload_chunks, is_persisted, load_derived, source_fingerprint
+from app.services.chunking import Chunk
+from app.services.matcher import match_terms
+from app.services.sections import OTHER
+
+INDEX_VERSION = 3
+
+# BM25 parameters (shared with the corpus index)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_PHRASE_CACHE_SIZE = 1024
+
+
+def bm25_rank(
+    hits_by_phrase: Iterable[Dict[int, Tuple[int, int]]],
+    doc_lens: List[int],
+    chars_per_term: List[float],
+    top_k: int,
+    allowed: Optional[Container[int]] = None,
+) -> List[Tuple[int, float]]:
+    """
+    [(chunk number, score)] of the top_k chunks, best first (ties keep chunk order),
+    from each keyword's {chunk number: (occurrences, first term position)}.
+    allowed: if given, only these chunk numbers are scored (IDF still counts every chunk).
+    """
+    n = len(doc_lens)
+    avgdl = (sum(doc_lens) / n) if n else 0.0
+    scores: Dict[int, float] = {}
+    for hits in hits_by_phrase:
+        if not hits:
+            continue
+        df = len(hits)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for doc, (tf, first) in hits.items():
+            if allowed is not None and doc not in allowed:
+                continue
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[doc] / (avgdl or 1))
+            score = 10 * idf * tf * (BM25_K1 + 1) / (tf + norm)
+            score += max(0, 5 - (first * chars_per_term[doc] / 500))  # small early-appearance bonus
+            scores[doc] = scores.get(doc, 0.0) + score
+
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+    return ranked[:top_k]
+
+
+def term_width(text: str, num_terms: int) -> float:
+    # average characters per term, to turn term positions into approximate character offsets
+    return round(len(text) / num_terms, 2) if num_terms else 0.0
+
+
+class ChunkIndex:
+    """
+    Inverted index of one chunk set; chunk numbers are positions in that list.
+    """
+
+    __slots__ = ("chunk_ids", "doc_lens", "chars_per_term", "sections", "postings", "_phrases", "_allowed")
+
+    def __init__(
+        self,
+        chunk_ids: List[str],
+        doc_lens: List[int],
+        chars_per_term: List[float],
+        postings: Dict[str, Dict[int, List[int]]],
+        sections: Optional[List[str]] = None,
+    ) -> None:
+        self.chunk_ids = chunk_ids
+        self.doc_lens = doc_lens
+        self.chars_per_term = chars_per_term
+        self.sections = sections if sections is not None else [OTHER] * len(chunk_ids)
+        self.postings = postings
+        # phrase -> hits; the index never changes and callers reuse fixed keyword lists
+        self._phrases: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        # section set -> chunk numbers in those sections
+        self._allowed: Dict[frozenset, frozenset] = {}
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def build(cls, chunks: Iterable[Chunk]) -> "ChunkIndex":
+        chunk_ids: List[str] = []
+        doc_lens: List[int] = []
+        text_chars: List[float] = []
+        sections: List[str] = []
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        for doc, c in enumerate(chunks):
+            text = c.text
+            terms = match_terms(text)
+            for pos, term in enumerate(terms):
+                postings.setdefault(term, {}).setdefault(doc, []).append(pos)
+            chunk_ids.append(c.chunk_id)
+            doc_lens.append(len(terms))
+            text_chars.append(term_width(text, len(terms)))
+            sections.append(c.meta.get("section", OTHER))
+        return cls(chunk_ids, doc_lens, text_chars, postings, sections)
+
+    def to_payload(self, source: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "index_version": INDEX_VERSION,
+            "source": source,
+            "chunk_ids": self.chunk_ids,
+            "doc_lens": self.doc_lens,
+            "chars_per_term": self.chars_per_term,
+            "sections": self.sections,
+            "postings": {term: [[doc, pos] for doc, pos in docs.items()] for term, docs in self.postings.items()},
+        }
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any]) -> "ChunkIndex":
+        postings = {term: {doc: pos for doc, pos in docs} for term, docs in data["postings"].items()}
+        return cls(data["chunk_ids"], data["doc_lens"], data["chars_per_term"], postings, data["sections"])
+
+    def phrase_hits(self, phrase: str) -> Dict[int, Tuple[int, int]]:
+        """
+        {chunk number: (occurrences, first term position)} of a phrase (memoized).
+        """
+        hits = self._phrases.get(phrase)
+        if hits is None:
+            if len(self._phrases) >= _PHRASE_CACHE_SIZE:
+                self._phrases.clear()
+            hits = self._phrases[phrase] = self._match(phrase)
+        return hits
+
+    def _match(self, phrase: str) -> Dict[int, Tuple[int, int]]:
+        terms = match_terms(phrase)
+        lists = [self.postings.get(t) for t in terms]
+        if not terms or any(p is None for p in lists):
+            return {}
+        if len(terms) == 1:
+            return {doc: (len(pos), pos[0]) for doc, pos in lists[0].items()}
+
+        rarest = min(range(len(terms)), key=lambda i: len(lists[i]))
+        hits: Dict[int, Tuple[int, int]] = {}
+        for doc, anchor in lists[rarest].items():
+            others = []
+            for i, docs in enumerate(lists):
+                if i == rarest:
+                    continue
+                pos = docs.get(doc)
+                if pos is None:
+                    break
+                others.append((i - rarest, set(pos)))
+            else:
+                starts = [p - rarest for p in anchor if all(p + off in s for off, s in others)]
+                if starts:
+                    # count non-overlapping occurrences, like str.count in count_phrases
+                    count, end = 0, -1
+                    for start in starts:
+                        if start > end:
+                            count, end = count + 1, start + len(terms) - 1
+                    hits[doc] = (count, starts[0])
+        return hits
+
+    def in_sections(self, sections: Sequence[str]) -> frozenset:
+        """
+        Chunk numbers of the chunks in any of these sections (memoized).
+        """
+        key = frozenset(sections)
+        docs = self._allowed.get(key)
+        if docs is None:
+            docs = self._allowed[key] = frozenset(i for i, s in enumerate(self.sections) if s in key)
+        return docs
+
+    def search(
+        self, keywords: List[str], top_k: int = 3, sections: Optional[Sequence[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        [(chunk number, score)] of the top_k chunks matching any keyword, best first
+        (ties keep chunk order). Empty when nothing matches.
+        sections: only rank chunks in these sections (see app.services.sections).
+        """
+        allowed = None if sections is None else self.in_sections(sections)
+        return bm25_rank(
+            [self.phrase_hits(kw) for kw in keywords], self.doc_lens, self.chars_per_term, top_k, allowed
+        )
+
+
+def save_index(
+    storage_dir: str | Path,
+    upload_id: str,
+    index: ChunkIndex,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Path:
+    """
+    Persists the index of the upload's chunk set for these chunking parameters
+    (save the pages first: the index records their stamp, like the chunks do).
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+    out_path = get_store(storage_dir).save_index(
+        upload_id, key, index.to_payload(source_fingerprint(storage_dir, upload_id))
+    )
+    invalidate_cached(f"index:{key}", storage_dir, upload_id)
+    return out_path
+
+
+def get_upload_index(
+    storage_dir: str | Path,
+    upload_id: str,
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    chunks: Optional[List[Chunk]] = None,
+    pages: Optional[List[Dict[str, Any]]] = None,
+) -> ChunkIndex:
+    """
+    Index of get_upload_chunks(...) for the same parameters: from the in-process cache,
+    else the persisted index if built from the current pages, else built now and persisted.
+    chunks / pages: already-loaded chunk set / stored pages, used when a build is needed.
+
+    Raises FileNotFoundError when the upload has no extracted pages.
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+    store = get_store(storage_dir)
+
+    def decode(stored: Dict[str, Any], source: Optional[str]) -> Optional[ChunkIndex]:
+        if stored.get("source") == source and stored.get("index_version") == INDEX_VERSION:
+            return ChunkIndex.from_payload(stored)
+        return None
+
+    def build() -> ChunkIndex:
+        chunk_set = chunks
+        if chunk_set is None:
+            chunk_set = get_upload_chunks(storage_dir, upload_id, max_tokens, overlap_tokens, pages=pages)
+        return ChunkIndex.build(chunk_set)
+
+    return load_derived(
+        f"index:{key}",
+        storage_dir,
+        upload_id,
+        load=lambda: store.load_index(upload_id, key),
+        decode=decode,
+        build=build,
+        save=lambda index, source: store.save_index(upload_id, key, index.to_payload(source)),
+        persist=is_persisted(max_tokens, overlap_tokens),
+    )
@@ -0,0 +1,205 @@
+"""
+Persisted chunks, keyed by (upload_id, max_tokens, overlap_tokens, chunker version,
+token counter).
+
+Each stored set records the stamp of the extracted pages it was built from;
+get_upload_chunks rebuilds (and re-persists) automatically when the pages change.
+
+Chunks are stored as spans: the page texts once ("parts") plus one
+[chunk_id, page_start, page_end, token_count, a, b, end] row per chunk and each
+chunk's statement section ("sections"), and load back as span chunks over a single
+shared DocText. Sets written before spans (a "chunks" list of dicts with text) still load.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.services.artifact_cache import cached_load, invalidate_cached
+from app.services.artifact_store import FileArtifactStore, get_store
+from app.services.chunking import CHUNKER_VERSION, Chunk, DocText, chunk_pages
+from app.services.parsing import load_extracted_pages
+from app.services.tokens import get_token_counter
+
+CHUNK_META = {"source": "pdf"}
+
+# only the default chunking parameters are persisted (chunks, index, vectors); other
+# sets are built in memory on request, so client-chosen parameters can't fill the disk
+PERSISTED_CHUNKING = (700, 120)
+MIN_CHUNK_TOKENS = 64
+MAX_CHUNK_TOKENS = 4000
+
+T = TypeVar("T")
+
+
+def chunks_key(max_tokens: int, overlap_tokens: int) -> str:
+    # sizes are in the configured counter's tokens, so its name is part of the key
+    return f"{max_tokens}_{overlap_tokens}_v{CHUNKER_VERSION}_{get_token_counter().name}"
+
+
+def source_fingerprint(storage_dir: str | Path, upload_id: str) -> Optional[str]:
+    stamp = get_store(storage_dir).stamp("pages", upload_id)
+    return None if stamp is None else repr(stamp)
+
+
+def is_persisted(max_tokens: int, overlap_tokens: int) -> bool:
+    return (max_tokens, overlap_tokens) == PERSISTED_CHUNKING
+
+
+def check_chunking(max_tokens: int, overlap_tokens: int) -> None:
+    """
+    Raises ValueError for chunking parameters outside the accepted bounds.
+    """
+    if not MIN_CHUNK_TOKENS <= max_tokens <= MAX_CHUNK_TOKENS:
+        raise ValueError(f"max_tokens must be between {MIN_CHUNK_TOKENS} and {MAX_CHUNK_TOKENS}")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be at least 0 and less than max_tokens")
+
+
+def load_derived(
+    kind: str,
+    storage_dir: str | Path,
+    upload_id: str,
+    *,
+    load: Callable[[], Any],
+    decode: Callable[[Any, Optional[str]], Optional[T]],
+    build: Callable[[], T],
+    save: Callable[[T, str], Any],
+    persist: bool = True,
+) -> T:
+    """
+    An artifact derived from the upload's stored pages (chunks, their index, their
+    vectors): from the in-process cache, else the persisted copy if it was built
+    from the current pages, else built now and persisted.
+
+    load():                  the persisted payload (raises when missing or unreadable)
+    decode(payload, source): the artifact, or None if the payload is stale
+                             (other source pages or format version)
+    save(artifact, source):  persists a fresh build (skipped when the pages are gone)
+    persist:                 False: never touch the persisted copy (in-memory cache only)
+    """
+
+    def build_or_load() -> T:
+        if not persist:
+            return build()
+        source = source_fingerprint(storage_dir, upload_id)
+        try:
+            value = decode(load(), source)
+            if value is not None:
+                return value
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            pass  # missing, stale-format or unreadable: rebuild
+
+        value = build()
+        if source is not None:
+            save(value, source)
+        return value
+
+    return cached_load(kind, storage_dir, upload_id, build_or_load, stamp_kind="pages")
+
+
+def chunks_path(storage_dir: str | Path, upload_id: str, max_tokens: int, overlap_tokens: int) -> Path:
+    store = FileArtifactStore(storage_dir, settings.chunks_dir)
+    return store.chunks_path(upload_id, chunks_key(max_tokens, overlap_tokens))
+
+
+def _encode(chunks: List[Chunk], source: Optional[str]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"chunker_version": CHUNKER_VERSION, "source": source}
+    docs = {id(c._doc) for c in chunks}
+    if not chunks or len(docs) != 1 or chunks[0]._doc is None:
+        payload["chunks"] = [c.to_dict() for c in chunks]  # no single shared text: store plain chunks
+        return payload
+
+    first = chunks[0]
+    payload["upload_id"] = first.upload_id
+    payload["meta"] = {k: v for k, v in first.meta.items() if k != "section"}
+    payload["parts"] = first._doc.stripped_parts()
+    payload["spans"] = [[c.chunk_id, c.page_start, c.page_end, c.token_count, *c.span] for c in chunks]
+    payload["sections"] = [c.meta.get("section") for c in chunks]
+    return payload
+
+
+def _decode(data: Dict[str, Any]) -> List[Chunk]:
+    if "spans" not in data:
+        return [Chunk(**item) for item in data["chunks"]]
+
+    doc = DocText(data["parts"])
+    upload_id, meta = data["upload_id"], data["meta"]
+    sections = data.get("sections") or [None] * len(data["spans"])
+    metas = {s: meta if s is None else {**meta, "section": s} for s in set(sections)}  # shared per section
+    return [
+        Chunk(chunk_id, upload_id, page_start, page_end, token_count, meta=metas[section], doc=doc, span=(a, b, end))
+        for (chunk_id, page_start, page_end, token_count, a, b, end), section in zip(data["spans"], sections)
+    ]
+
+
+def save_chunks(
+    storage_dir: str | Path,
+    upload_id: str,
+    chunks: List[Chunk],
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Path:
+    """
+    Persists chunks built from the upload's currently stored pages (save those first).
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+    payload = _encode(chunks, source_fingerprint(storage_dir, upload_id))
+    out_path = get_store(storage_dir).save_chunks(upload_id, key, payload)
+    invalidate_cached(f"chunks:{key}", storage_dir, upload_id)
+    return out_path
+
+
+def _load_payload(storage_dir: str | Path, upload_id: str, max_tokens: int, overlap_tokens: int) -> Dict[str, Any]:
+    data = get_store(storage_dir).load_chunks(upload_id, chunks_key(max_tokens, overlap_tokens))
+    if not isinstance(data, dict) or not isinstance(data.get("spans", data.get("chunks")), list):
+        raise ValueError("Invalid chunks format: expected a dict with a 'spans' or 'chunks' list")
+    return data
+
+
+def load_chunks(storage_dir: str | Path, upload_id: str, max_tokens: int, overlap_tokens: int) -> List[Chunk]:
+    return _decode(_load_payload(storage_dir, upload_id, max_tokens, overlap_tokens))
+
+
+def get_upload_chunks(
+    storage_dir: str | Path,
+    upload_id: str,
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    pages: Optional[List[Dict[str, Any]]] = None,
+) -> List[Chunk]:
+    """
+    Chunks for an upload's stored pages: from the in-process cache, else from the
+    persisted set if it was built from the current pages, else chunked now and persisted.
+    pages: the already-loaded stored pages (saves a reload when chunking is needed).
+
+    Raises FileNotFoundError when the upload has no extracted pages.
+    The returned list is shared (cached), so don't mutate it.
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+
+    def decode(stored: Dict[str, Any], source: Optional[str]) -> Optional[List[Chunk]]:
+        if stored.get("source") == source and stored.get("chunker_version") == CHUNKER_VERSION:
+            return _decode(stored)
+        return None
+
+    def build() -> List[Chunk]:
+        return chunk_pages(
+            upload_id=upload_id,
+            pages=pages if pages is not None else load_extracted_pages(storage_dir, upload_id),
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            meta=CHUNK_META,
+        )
+
+    return load_derived(
+        f"chunks:{key}",
+        storage_dir,
+        upload_id,
+        load=lambda: _load_payload(storage_dir, upload_id, max_tokens, overlap_tokens),
+        decode=decode,
+        build=build,
+        save=lambda chunks, source: get_store(storage_dir).save_chunks(upload_id, key, _encode(chunks, source)),
+        persist=is_persisted(max_tokens, overlap_tokens),
+    )
@@ -1,82 +1,388 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List
+import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.sections import SECTIONS, pick_section, section_scores
+from app.services.tokens import TokenCounter, WhitespaceTokenCounter, get_token_counter
+
+# bump whenever chunk boundaries/text/meta change, so persisted chunk sets are rebuilt
+CHUNKER_VERSION = 3
+
+
+class DocText:
+    """
+    An upload's page texts, addressed as one virtual string
+    "\n".join(page.strip() for page in pages) without ever building it (or the
+    stripped copies: each part is the original page string plus its stripped bounds).
+    Grows as pages are appended, so chunks can be yielded before the last page is read.
+    """
+
+    __slots__ = ("parts", "bounds", "starts", "end")
+
+    def __init__(self, parts: Iterable[str] = ()) -> None:
+        self.parts: List[str] = []
+        self.bounds: List[Tuple[int, int]] = []
+        self.starts: List[int] = []
+        self.end = 0
+        for p in parts:
+            self.append(p)
+
+    def append(self, text: str) -> int:
+        lo = len(text) - len(text.lstrip())
+        hi = len(text.rstrip()) if lo < len(text) else lo
+        start = self.end + 1 if self.parts else 0
+        self.parts.append(text)
+        self.bounds.append((lo, hi))
+        self.starts.append(start)
+        self.end = start + hi - lo
+        return start
+
+    def stripped_parts(self) -> List[str]:
+        return [p[lo:hi] for p, (lo, hi) in zip(self.parts, self.bounds)]
+
+    def _piece(self, k: int, a: int, b: int) -> str:
+        lo = self.bounds[k][0] - self.starts[k]
+        return self.parts[k][a + lo:b + lo]
+
+    def slice(self, a: int, b: int) -> str:
+        if a >= b:
+            return ""
+        k = max(0, bisect_right(self.starts, a) - 1)
+        part_end = self.starts[k] + self.bounds[k][1] - self.bounds[k][0]
+        if b <= part_end:
+            return self._piece(k, a, b)  # common case: inside one page
+
+        out: List[str] = []
+        pos = a
+        while pos < b:
+            part_end = self.starts[k] + self.bounds[k][1] - self.bounds[k][0]
+            if pos < part_end:
+                out.append(self._piece(k, pos, min(b, part_end)))
+                pos = min(b, part_end)
+            if pos < b:
+                out.append("\n")  # separator between part k and k + 1
+                pos = part_end + 1
+                k += 1
+        return "".join(out)
 
 
-@dataclass
 class Chunk:
-    chunk_id: str
-    upload_id: str
-    page_start: int
-    page_end: int
-    token_count: int
-    text: str
-    meta: Dict[str, Any]
+    """
+    A chunk of an upload's text.
 
+    Chunks built by the chunker don't own their text: they hold a span
+    [a, end) of the shared DocText, where [a, b) is the overlap carried over from
+    the previous chunk (whitespace-normalized) and [b, end) the new text.
+    `text` / `preview()` materialize strings on demand; nothing is cached per chunk.
+    Chunks loaded from legacy storage carry a plain text string instead.
+    """
 
-def _approx_token_count(text: str) -> int:
-    # simple, deterministic approximation (good enough for now)
-    return max(1, len(text.split()))
+    __slots__ = (
+        "chunk_id",
+        "upload_id",
+        "page_start",
+        "page_end",
+        "token_count",
+        "meta",
+        "_text",
+        "_doc",
+        "_a",
+        "_b",
+        "_end",
+    )
 
+    def __init__(
+        self,
+        chunk_id: str,
+        upload_id: str,
+        page_start: int,
+        page_end: int,
+        token_count: int,
+        text: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        *,
+        doc: Optional[DocText] = None,
+        span: Tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        self.chunk_id = chunk_id
+        self.upload_id = upload_id
+        self.page_start = page_start
+        self.page_end = page_end
+        self.token_count = token_count
+        self.meta = meta if meta is not None else {}
+        self._text = text
+        self._doc = doc
+        self._a, self._b, self._end = span
 
-def chunk_pages(
+    @property
+    def span(self) -> Tuple[int, int, int]:
+        return self._a, self._b, self._end
+
+    @property
+    def text(self) -> str:
+        if self._doc is None:
+            return self._text or ""
+        doc = self._doc
+        overlap = " ".join(doc.slice(self._a, self._b).split())
+        return (overlap + doc.slice(self._b, self._end)).strip()
+
+    def preview(self, n: int) -> str:
+        """
+        text[:n], materializing only about n characters of the span.
+        """
+        if self._doc is None:
+            return (self._text or "")[:n]
+        doc = self._doc
+        overlap = " ".join(doc.slice(self._a, self._b).split())
+        head = (overlap + doc.slice(self._b, min(self._end, self._b + 2 * n))).lstrip()
+        if head[n:].strip():
+            return head[:n]  # non-space text follows, so the final strip() can't reach the first n chars
+        return self.text[:n]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "chunk_id": self.chunk_id,
+            "upload_id": self.upload_id,
+            "page_start": self.page_start,
+            "page_end": self.page_end,
+            "token_count": self.token_count,
+            "text": self.text,
+            "meta": self.meta,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # mutable, like the dataclass it replaces
+
+    def __repr__(self) -> str:
+        return (
+            f"Chunk(chunk_id={self.chunk_id!r}, page_start={self.page_start}, "
+            f"page_end={self.page_end}, token_count={self.token_count})"
+        )
+
+
+_WORD = re.compile(r"\S+")
+_SENTENCE_END = (".", "!", "?", ";", ":")
+
+
+def _counts(text: str, counter: TokenCounter) -> Tuple[int, int]:
+    # (words, tokens); one split when the counter counts words anyway
+    words = len(text.split())
+    return words, words if isinstance(counter, WhitespaceTokenCounter) else counter.count(text)
+
+
+def _line_segments(
+    line: str, offset: int, budget: int, counter: TokenCounter
+) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    A line longer than the budget, as sentence segments; sentences still longer
+    than the budget are cut into word windows of at most `budget` tokens.
+    """
+    words = [(m.start() + offset, m.end() + offset, m.group()) for m in _WORD.finditer(line)]
+    i = 0
+    while i < len(words):
+        j = i
+        while j < len(words) - 1 and not words[j][2].endswith(_SENTENCE_END):
+            j += 1
+        n = j - i + 1
+        tokens = counter.count(line[words[i][0] - offset:words[j][1] - offset])
+        # window size in words from the sentence's tokens-per-word, shrunk while a window is over budget
+        size = max(1, budget * n // max(1, tokens))
+        w = i
+        while w <= j:
+            last = min(j, w + size - 1)
+            t = counter.count(line[words[w][0] - offset:words[last][1] - offset])
+            if t > budget and last > w:
+                size = max(1, min(last - w, size * budget // t))
+                continue
+            yield words[w][0], words[last][1], last - w + 1, t
+            w = last + 1
+        i = j + 1
+
+
+def _split_oversized(text: str, budget: int, counter: TokenCounter) -> List[Tuple[int, int, int, int]]:
+    """
+    Splits a (stripped) page into contiguous pieces of at most `budget` tokens:
+    [(start, end, words, tokens)] covering the whole text, each piece after the first
+    starting at the whitespace that separates it from the previous one.
+    Whole lines are packed greedily; only lines longer than the budget are broken,
+    at sentence ends, else into word windows.
+    """
+    pieces: List[Tuple[int, int, int, int]] = []
+    region_start = 0
+    cut = 0
+    words = tokens = 0
+    pos = 0
+    for line in text.split("\n"):
+        n, t = _counts(line, counter)
+        segments = [(pos, pos + len(line), n, t)] if t <= budget else _line_segments(line, pos, budget, counter)
+        for _, seg_end, seg_words, seg_tokens in segments:
+            if tokens and tokens + seg_tokens > budget:
+                pieces.append((region_start, cut, words, tokens))
+                region_start, words, tokens = cut, 0, 0
+            words += seg_words
+            tokens += seg_tokens
+            cut = seg_end
+        pos += len(line) + 1
+    pieces.append((region_start, len(text), words, tokens))
+    return pieces
+
+
+def iter_chunks(
     upload_id: str,
-    pages: List[Dict[str, Any]],
+    pages: Iterable[Dict[str, Any]],
     max_tokens: int = 700,
     overlap_tokens: int = 120,
     meta: Dict[str, Any] | None = None,
-) -> List[Chunk]:
+    counter: Optional[TokenCounter] = None,
+) -> Iterator[Chunk]:
+    """
+    Yields chunks lazily, in order, as spans of a shared DocText.
+
+    - sizes are in tokens of `counter` (default: the configured counter, see app.services.tokens)
+    - pages are packed whole while they fit; a page with more tokens than a chunk
+      has room for new text (max_tokens - overlap_tokens) is split on line, then
+      sentence, then word boundaries, so chunks stay within max_tokens
+    - page_start / page_end are the pages of the chunk's first word (including the
+      overlap carried over from the previous chunk) and of its last piece
+    - each page is counted once; the buffer keeps every piece's word and token counts,
+      so token counts and the overlap start come from those instead of re-counting chunk text
+    - the overlap is the last words worth about overlap_tokens tokens (exactly
+      overlap_tokens words with the whitespace counter)
+    - meta["section"] is the chunk's statement section (see app.services.sections):
+      each page is scored once, and a chunk sums its new pieces' shares of their
+      pages' scores (the carried-over overlap doesn't count)
+    """
     meta = meta or {}
+    section_meta: Dict[str, Dict[str, Any]] = {}  # one meta dict per section, shared by its chunks
+    counter = counter or get_token_counter()
+    doc = DocText()
+    part_pages: List[int] = []
+    budget = max(1, max_tokens - max(0, overlap_tokens))
 
-    chunks: List[Chunk] = []
-    buf_parts: List[str] = []
+    # buffer: (region start, region end, words, tokens, page) per piece; the first entry
+    # may be the overlap region carried over from the previous chunk (has_body False)
+    buf: List[Tuple[int, int, int, int, int]] = []
     buf_tokens = 0
-    start_page = None
+    body_scores = [0.0] * len(SECTIONS)
+    has_body = False
+    overlap_start = body_start = 0  # span [a, b)
     chunk_idx = 0
 
-    def flush(end_page: int):
-        nonlocal chunk_idx, buf_parts, buf_tokens, start_page
-        if not buf_parts or start_page is None:
-            return
-        text = "\n".join(buf_parts).strip()
-        chunks.append(
-            Chunk(
-                chunk_id=f"{upload_id}::chunk::{chunk_idx}",
-                upload_id=upload_id,
-                page_start=start_page,
-                page_end=end_page,
-                token_count=_approx_token_count(text),
-                text=text,
-                meta=meta,
-            )
+    def words_start(entries: List[Tuple[int, int, int, int, int]], keep: int) -> int:
+        # where the last `keep` words of the buffered regions start
+        start_at = entries[-1][1]
+        need = keep
+        for start, end, n, _, _ in reversed(entries):
+            if need <= 0:
+                break
+            if need >= n:
+                start_at = start
+                need -= n
+                continue
+            prefix = doc.slice(start, end).rsplit(None, need)[0]
+            start_at = start + len(prefix)
+            need = 0
+        return start_at
+
+    def flush() -> Chunk:
+        nonlocal chunk_idx, buf, buf_tokens, body_scores, has_body, overlap_start, body_start
+        words_total = sum(e[2] for e in buf)
+        tokens_total = sum(e[3] for e in buf)
+        region_end = buf[-1][1]
+        section = pick_section(body_scores)
+        if section not in section_meta:
+            section_meta[section] = {**meta, "section": section}
+        chunk = Chunk(
+            chunk_id=f"{upload_id}::chunk::{chunk_idx}",
+            upload_id=upload_id,
+            page_start=buf[0][4],
+            page_end=buf[-1][4],
+            token_count=max(1, tokens_total),
+            meta=section_meta[section],
+            doc=doc,
+            span=(overlap_start, body_start, region_end),
         )
         chunk_idx += 1
 
-        # overlap: keep last overlap_tokens words
-        words = text.split()
-        keep = words[-overlap_tokens:] if overlap_tokens > 0 else []
-        buf_parts = [" ".join(keep)] if keep else []
-        buf_tokens = _approx_token_count(buf_parts[0]) if buf_parts else 0
-        start_page = end_page  # overlap starts at end_page (good enough)
+        # overlap: keep the last ~overlap_tokens tokens' worth of words -> find where they start
+        keep = keep_tokens = 0
+        new_start = region_end
+        if overlap_tokens > 0 and words_total:
+            keep = min(words_total, -(-overlap_tokens * words_total // max(1, tokens_total)))
+        while keep:
+            new_start = words_start(buf, keep)
+            keep_tokens = counter.count(doc.slice(new_start, region_end))
+            if keep_tokens <= overlap_tokens:
+                break
+            # denser than the chunk average (e.g. a numeric tail): carry fewer words
+            keep = min(keep - 1, keep * overlap_tokens // keep_tokens)
+
+        if keep:
+            carried = doc.slice(new_start, region_end)
+            first_word = new_start + len(carried) - len(carried.lstrip())
+            page = part_pages[bisect_right(doc.starts, first_word) - 1]
+            buf = [(new_start, region_end, keep, keep_tokens, page)]
+        else:
+            new_start, keep_tokens = region_end, 0
+            buf = []
+        buf_tokens = keep_tokens
+        body_scores = [0.0] * len(SECTIONS)
+        has_body = False
+        overlap_start = new_start if keep else region_end
+        body_start = region_end
+        return chunk
 
     for p in pages:
         page_num = int(p["page"])
-        page_text = (p.get("text") or "").strip()
-        if start_page is None:
-            start_page = page_num
+        page_text = p.get("text") or ""
+
+        sep_start = doc.end
+        page_start = doc.append(page_text)
+        part_pages.append(page_num)
+        words, tokens = _counts(page_text, counter)
+        page_scores = section_scores(page_text)
 
-        page_tokens = _approx_token_count(page_text)
+        if tokens > budget:
+            pieces = [
+                (page_start + a, page_start + b, n, t)
+                for a, b, n, t in _split_oversized(doc.slice(page_start, doc.end), budget, counter)
+            ]
+        else:
+            pieces = [(page_start, doc.end, words, tokens)]
 
-        # if adding would exceed, flush first
-        if buf_tokens + page_tokens > max_tokens and buf_parts:
-            flush(page_num)
+        for i, (start, end, n, t) in enumerate(pieces):
+            cost = max(1, t)
+            # if adding would exceed, flush first
+            if buf_tokens + cost > max_tokens and has_body:
+                yield flush()
 
-        buf_parts.append(page_text)
-        buf_tokens += page_tokens
+            if not buf:
+                # the chunk's text starts here (a leading page separator is stripped)
+                overlap_start = body_start = sep_start if i == 0 else start
+            buf.append((start, end, n, t, page_num))
+            buf_tokens += cost
+            share = t / tokens if tokens else 1.0
+            for k, score in enumerate(page_scores):
+                body_scores[k] += score * share
+            has_body = True
 
     # final flush
-    if start_page is not None:
-        flush(int(pages[-1]["page"]))
+    if has_body:
+        yield flush()
+
 
-    return chunks
+def chunk_pages(
+    upload_id: str,
+    pages: List[Dict[str, Any]],
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    meta: Dict[str, Any] | None = None,
+    counter: Optional[TokenCounter] = None,
+) -> List[Chunk]:
+    return list(iter_chunks(upload_id, pages, max_tokens, overlap_tokens, meta, counter))
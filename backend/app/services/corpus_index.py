@@ -0,0 +1,331 @@
+"""
+Corpus-wide search index over every indexed upload's chunks.
+
+Layout (storage_dir/corpus/, shared by both artifact backends):
+
+  manifest.json          {"shards": [{"id", "sealed", "generation", "uploads"}],
+                          "uploads": {upload_id: {"shard", "source", "docs"}}}
+  shard-00000/seg-<upload_id>.json   one segment per upload (open shard)
+  shard-00000/merged.json            all live segments (sealed shard)
+
+Indexing an upload appends one segment to the open shard (nothing else is
+rewritten); after SHARD_MAX_UPLOADS uploads the shard is sealed and its segments
+are compacted into one file. Re-indexing an upload writes a new segment and
+points the manifest at it; older copies in other shards are skipped at query
+time and dropped when their shard is compacted.
+
+A segment is {"upload_id", "docs": [[chunk_id, page_start, page_end, length, preview]],
+"postings": {term: [doc, tf, doc, tf, ...]}} over word terms, normalized like
+/ask's keyword terms (match_terms), so "settlements" finds "settlement". Hits carry the
+preview stored with the chunk, so a query never reloads (or rebuilds) chunk sets.
+Queries score BM25 with corpus-wide statistics, vectorized per shard (numpy);
+loaded shards are kept in memory until their generation changes.
+
+The manifest records the stamp of the pages each upload was indexed from
+("source"). Uploads whose pages changed since (re-extracted, deleted) are left
+out of results until they're indexed again, and reported as stale.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.chunk_index import BM25_B, BM25_K1
+from app.services.chunk_store import source_fingerprint
+from app.services.chunking import Chunk
+from app.services.matcher import match_terms
+from app.services.storage_format import read_artifact, write_artifact
+
+try:  # cross-process lock for the manifest (batch ingest runs in a process pool)
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+CORPUS_VERSION = 2
+SHARD_MAX_UPLOADS = 64
+PREVIEW_CHARS = 220
+
+_lock = threading.Lock()
+
+
+def corpus_dir(storage_dir: str | Path) -> Path:
+    return Path(storage_dir) / "corpus"
+
+
+def _manifest_path(storage_dir: str | Path) -> Path:
+    return corpus_dir(storage_dir) / "manifest.json"
+
+
+def _shard_dir(storage_dir: str | Path, shard_id: int) -> Path:
+    return corpus_dir(storage_dir) / f"shard-{shard_id:05d}"
+
+
+def _segment_path(storage_dir: str | Path, shard_id: int, upload_id: str) -> Path:
+    return _shard_dir(storage_dir, shard_id) / f"seg-{upload_id}.json"
+
+
+def _merged_path(storage_dir: str | Path, shard_id: int) -> Path:
+    return _shard_dir(storage_dir, shard_id) / "merged.json"
+
+
+def _empty_manifest() -> Dict[str, Any]:
+    return {"corpus_version": CORPUS_VERSION, "shards": [], "uploads": {}}
+
+
+def load_manifest(storage_dir: str | Path) -> Dict[str, Any]:
+    path = _manifest_path(storage_dir)
+    if not path.exists():
+        return _empty_manifest()
+    return read_artifact(path)
+
+
+@contextmanager
+def _locked(storage_dir: str | Path) -> Iterator[None]:
+    root = corpus_dir(storage_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(root / ".lock", "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _words(text: str) -> List[str]:
+    return [t for t in match_terms(text) if t[0].isalnum()]
+
+
+def build_segment(upload_id: str, chunks: List[Chunk]) -> Dict[str, Any]:
+    docs: List[List[Any]] = []
+    postings: Dict[str, List[int]] = {}
+    for doc, c in enumerate(chunks):
+        terms = _words(c.text)
+        counts: Dict[str, int] = {}
+        for t in terms:
+            counts[t] = counts.get(t, 0) + 1
+        for t, tf in counts.items():
+            postings.setdefault(t, []).extend((doc, tf))
+        docs.append([c.chunk_id, c.page_start, c.page_end, len(terms), c.preview(PREVIEW_CHARS)])
+    return {"upload_id": upload_id, "docs": docs, "postings": postings}
+
+
+def add_upload(storage_dir: str | Path, upload_id: str, chunks: List[Chunk], source: Optional[str] = None) -> Path:
+    """
+    Appends (or replaces) an upload's chunks in the corpus index; returns the shard directory.
+    source: stamp of the pages the chunks were built from (see chunk_store.source_fingerprint).
+    """
+    segment = build_segment(upload_id, chunks)
+    with _locked(storage_dir):
+        manifest = load_manifest(storage_dir)
+        manifest["corpus_version"] = CORPUS_VERSION
+        shards = manifest["shards"]
+        if not shards or shards[-1]["sealed"]:
+            shards.append({"id": len(shards), "sealed": False, "generation": 0, "uploads": []})
+        shard = shards[-1]
+
+        write_artifact(_segment_path(storage_dir, shard["id"], upload_id), segment)
+        if upload_id not in shard["uploads"]:
+            shard["uploads"].append(upload_id)
+        shard["generation"] += 1
+        manifest["uploads"][upload_id] = {"shard": shard["id"], "source": source, "docs": len(segment["docs"])}
+
+        if len(shard["uploads"]) >= SHARD_MAX_UPLOADS:
+            _seal(storage_dir, manifest, shard)
+        write_artifact(_manifest_path(storage_dir), manifest)
+        return _shard_dir(storage_dir, shard["id"])
+
+
+def _seal(storage_dir: str | Path, manifest: Dict[str, Any], shard: Dict[str, Any]) -> None:
+    """
+    Compacts a full shard's live segments into one file and removes the segment files.
+    """
+    live = [u for u in shard["uploads"] if manifest["uploads"].get(u, {}).get("shard") == shard["id"]]
+    segments = [read_artifact(_segment_path(storage_dir, shard["id"], u)) for u in live]
+    write_artifact(_merged_path(storage_dir, shard["id"]), segments)
+    for u in shard["uploads"]:
+        _segment_path(storage_dir, shard["id"], u).unlink(missing_ok=True)
+    shard["uploads"] = live
+    shard["sealed"] = True
+    shard["generation"] += 1
+
+
+class _Shard:
+    """
+    A shard in memory: per term, an (n, 2) array of (doc number, term frequency);
+    doc numbers index the shard-wide docs list, ranges[upload_id] is the upload's slice of it.
+    """
+
+    __slots__ = ("docs", "doc_lens", "ranges", "postings")
+
+    def __init__(self, segments: List[Dict[str, Any]]) -> None:
+        self.docs: List[Tuple[str, str, int, int, str]] = []
+        self.ranges: Dict[str, Tuple[int, int]] = {}
+        lens: List[int] = []
+        parts: Dict[str, List[np.ndarray]] = {}
+        for seg in segments:
+            base = len(self.docs)
+            for chunk_id, page_start, page_end, length, preview in seg["docs"]:
+                self.docs.append((seg["upload_id"], chunk_id, page_start, page_end, preview))
+                lens.append(length)
+            self.ranges[seg["upload_id"]] = (base, len(self.docs))
+            for term, flat in seg["postings"].items():
+                pairs = np.asarray(flat, dtype=np.int64).reshape(-1, 2)
+                pairs[:, 0] += base
+                parts.setdefault(term, []).append(pairs)
+        self.doc_lens = np.asarray(lens, dtype=np.float64)
+        self.postings = {t: p[0] if len(p) == 1 else np.concatenate(p) for t, p in parts.items()}
+
+
+_shards: Dict[Tuple[str, int], Tuple[int, _Shard]] = {}
+_shards_lock = threading.Lock()
+
+
+def _load_shard(storage_dir: str | Path, shard: Dict[str, Any]) -> _Shard:
+    key = (str(Path(storage_dir).resolve()), shard["id"])
+    with _shards_lock:
+        cached = _shards.get(key)
+    if cached is not None and cached[0] == shard["generation"]:
+        return cached[1]
+
+    if shard["sealed"]:
+        segments = read_artifact(_merged_path(storage_dir, shard["id"]))
+    else:
+        segments = []
+        for u in shard["uploads"]:
+            path = _segment_path(storage_dir, shard["id"], u)
+            if path.exists():
+                segments.append(read_artifact(path))
+    loaded = _Shard(segments)
+    with _shards_lock:
+        _shards[key] = (shard["generation"], loaded)
+    return loaded
+
+
+def search_corpus(
+    storage_dir: str | Path,
+    query: str,
+    top_k: int = 10,
+    upload_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    BM25 over every indexed upload's chunks (or only upload_ids).
+    Returns {"hits": [{"upload_id", "chunk_id", "page_start", "page_end", "score", "text_preview"}],
+    "uploads": number of uploads searched, "chunks": number of chunks searched,
+    "stale_uploads": uploads left out because their pages changed since they were indexed}.
+
+    Only uploads that make it into the hits are checked against their pages; a stale
+    one is excluded and the search re-run (stale entries are rare).
+    """
+    manifest = load_manifest(storage_dir)
+    current = {u: info["shard"] for u, info in manifest["uploads"].items()}
+    if upload_ids is not None:
+        wanted = set(upload_ids)
+        current = {u: s for u, s in current.items() if u in wanted}
+    terms = list(dict.fromkeys(_words(query)))
+
+    checked: Set[str] = set()
+    stale: List[str] = []
+    while True:
+        hits, n_docs = _search(storage_dir, manifest, current, terms, top_k)
+        newly = []
+        for h in hits:
+            u = h["upload_id"]
+            if u in checked:
+                continue
+            checked.add(u)
+            if manifest["uploads"][u].get("source") != source_fingerprint(storage_dir, u):
+                newly.append(u)
+        if not newly:
+            break
+        stale.extend(newly)
+        for u in newly:
+            del current[u]
+
+    return {"hits": hits, "uploads": len(current), "chunks": n_docs, "stale_uploads": sorted(stale)}
+
+
+def _search(
+    storage_dir: str | Path,
+    manifest: Dict[str, Any],
+    current: Dict[str, int],
+    terms: List[str],
+    top_k: int,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    (top_k hits, number of chunks searched) over the uploads in current ({upload_id: shard}).
+    """
+    if not terms or not current:
+        return [], 0
+
+    wanted_shards = set(current.values())
+    shards = [(s, _load_shard(storage_dir, s)) for s in manifest["shards"] if s["id"] in wanted_shards]
+    # docs of uploads re-indexed into a later shard (or filtered out) don't count
+    live = []
+    for s, shard in shards:
+        mask = np.zeros(len(shard.docs), dtype=bool)
+        for u, (start, end) in shard.ranges.items():
+            if current.get(u) == s["id"]:
+                mask[start:end] = True
+        live.append(mask)
+
+    # corpus-wide statistics over live docs
+    n_docs = sum(int(m.sum()) for m in live)
+    if not n_docs:
+        return [], 0
+    avgdl = sum(float(shard.doc_lens[m].sum()) for (_, shard), m in zip(shards, live)) / n_docs
+    df = {t: 0 for t in terms}
+    for (_, shard), m in zip(shards, live):
+        for t in terms:
+            p = shard.postings.get(t)
+            if p is not None:
+                df[t] += int(m[p[:, 0]].sum())
+
+    candidates: List[Tuple[float, Tuple[str, str, int, int, str]]] = []
+    for (_, shard), m in zip(shards, live):
+        scores = np.zeros(len(shard.docs))
+        for t in terms:
+            p = shard.postings.get(t)
+            if p is None or not df[t]:
+                continue
+            idf = np.log(1 + (n_docs - df[t] + 0.5) / (df[t] + 0.5))
+            docs, tf = p[:, 0], p[:, 1].astype(np.float64)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * shard.doc_lens[docs] / (avgdl or 1))
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        scores[~m] = 0
+        k = min(top_k, len(scores))
+        if not k:
+            continue
+        top = np.argpartition(-scores, k - 1)[:k]
+        candidates.extend((float(scores[i]), shard.docs[i]) for i in top if scores[i] > 0)
+
+    candidates.sort(key=lambda x: -x[0])
+    hits = [
+        {
+            "upload_id": u,
+            "chunk_id": cid,
+            "page_start": ps,
+            "page_end": pe,
+            "score": round(score, 4),
+            "text_preview": preview,
+        }
+        for score, (u, cid, ps, pe, preview) in candidates[:top_k]
+    ]
+    return hits, n_docs
+
+
+def corpus_stats(storage_dir: str | Path) -> Dict[str, Any]:
+    manifest = load_manifest(storage_dir)
+    return {
+        "uploads": len(manifest["uploads"]),
+        "chunks": sum(int(u.get("docs", 0)) for u in manifest["uploads"].values()),
+        "shards": len(manifest["shards"]),
+        "sealed_shards": sum(1 for s in manifest["shards"] if s["sealed"]),
+    }
@@ -0,0 +1,241 @@
+"""
+Offline dense retrieval over a chunk set (no model, no network).
+
+Each chunk becomes a hashed TF-IDF vector: word unigrams and bigrams (lightly
+normalized: lowercase, plural "s" dropped), hashed into DIM buckets with a sign
+bit, log-scaled term frequency x bucket IDF, L2-normalized. The vectors of an
+upload's chunks form one float32 matrix; a query is one matrix-vector product
+(many queries: one matrix-matrix product).
+
+Hashing alone can't bridge paraphrases ("bottom line" vs "net income"), so queries
+are expanded with a small table of financial-reporting synonyms first.
+
+Vectors are persisted next to the chunk set they were computed from (float16 on
+disk, float32 in memory) and rebuilt when the stored pages change.
+"""
+from __future__ import annotations
+
+import io
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.artifact_cache import invalidate_cached
+from app.services.artifact_store import get_store
+from app.services.chunk_store import chunks_key, get_upload_chunks, is_persisted, load_derived, source_fingerprint
+from app.services.chunking import Chunk
+from app.services.matcher import match_terms
+
+VECTOR_VERSION = 1
+DIM = 1024
+
+RRF_K = 60  # reciprocal rank fusion constant (the usual default)
+
+# query-side expansions: analyst phrasing -> the line items filings use
+_SYNONYMS: Dict[str, str] = {
+    "bottom line": "net income",
+    "earnings": "net income",
+    "profit": "net income",
+    "profitability": "net income operating income margin",
+    "top line": "revenue net sales",
+    "sales": "revenue net sales",
+    "turnover": "revenue net sales",
+    "tax bill": "provision for income taxes",
+    "taxes": "provision for income taxes",
+    "tax rate": "effective tax rate provision for income taxes",
+    "pretax": "income before provision for income taxes",
+    "pre-tax": "income before provision for income taxes",
+    "opex": "operating expenses",
+    "r&d": "research and development",
+    "sg&a": "selling general and administrative",
+    "capex": "payments for acquisition of property plant and equipment",
+    "buybacks": "repurchases of common stock",
+    "buyback": "repurchases of common stock",
+    "cash burn": "net cash used in operating activities",
+    "free cash flow": "cash generated by operating activities payments for acquisition of property plant and equipment",
+    "debt": "term debt commercial paper",
+    "margins": "gross margin percentage",
+    "cogs": "cost of sales",
+}
+_SYNONYM_PATTERN = re.compile(
+    r"(?<![\w&-])(" + "|".join(re.escape(k) for k in sorted(_SYNONYMS, key=len, reverse=True)) + r")(?![\w&-])"
+)
+
+
+def expand_query(text: str) -> str:
+    """
+    text plus the filing vocabulary of any synonym table phrases it contains.
+    """
+    extra = [_SYNONYMS[m.group(1)] for m in _SYNONYM_PATTERN.finditer(text.lower())]
+    return " ".join([text, *extra]) if extra else text
+
+
+def _words(text: str) -> List[str]:
+    # numbers and punctuation carry no topic
+    return [t for t in match_terms(text) if t[0].isalpha()]
+
+
+def _features(text: str) -> Dict[int, float]:
+    """
+    Signed hashed counts of the text's unigrams and bigrams: {bucket: count}.
+    crc32 rather than hash(), which is salted per process (vectors are persisted).
+    """
+    words = _words(text)
+    feats: Dict[int, float] = {}
+    grams: List[str] = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for g in grams:
+        h = zlib.crc32(g.encode("utf-8"))
+        bucket = h % DIM
+        feats[bucket] = feats.get(bucket, 0.0) + (1.0 if (h >> 31) & 1 else -1.0)
+    return feats
+
+
+def _tf_matrix(texts: Sequence[str]) -> np.ndarray:
+    m = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        feats = _features(text)
+        if feats:
+            m[row, list(feats)] = list(feats.values())
+    return np.sign(m) * np.log1p(np.abs(m))
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class VectorIndex:
+    """
+    Row i = unit TF-IDF vector of chunk i; idf is per hash bucket, from this chunk set.
+    """
+
+    __slots__ = ("matrix", "idf")
+
+    def __init__(self, matrix: np.ndarray, idf: np.ndarray) -> None:
+        self.matrix = matrix
+        self.idf = idf
+
+    def __len__(self) -> int:
+        return int(self.matrix.shape[0])
+
+    @classmethod
+    def build(cls, chunks: Iterable[Chunk]) -> "VectorIndex":
+        tf = _tf_matrix([c.text for c in chunks])
+        n = tf.shape[0]
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        return cls(_normalize_rows(tf * idf).astype(np.float32), idf)
+
+    def embed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        return _normalize_rows(_tf_matrix([expand_query(q) for q in queries]) * self.idf).astype(np.float32)
+
+    def search_many(self, queries: Sequence[str], top_k: int = 10) -> List[List[Tuple[int, float]]]:
+        """
+        Per query: [(chunk number, cosine similarity)] of the top_k chunks with a
+        positive score, best first. All queries are scored in one matrix product.
+        """
+        if not len(self) or not queries:
+            return [[] for _ in queries]
+        scores = self.embed_queries(queries) @ self.matrix.T  # (queries, chunks)
+        k = min(top_k, scores.shape[1])
+        out: List[List[Tuple[int, float]]] = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.lexsort((top, -row[top]))]  # score desc, then chunk order
+            out.append([(int(i), float(row[i])) for i in top if row[i] > 0])
+        return out
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        return self.search_many([query], top_k)[0]
+
+    def to_bytes(self, source: Optional[str] = None) -> bytes:
+        buf = io.BytesIO()
+        meta = json.dumps({"vector_version": VECTOR_VERSION, "dim": DIM, "source": source})
+        np.savez(buf, matrix=self.matrix.astype(np.float16), idf=self.idf, meta=np.array(meta))
+        return buf.getvalue()
+
+    @staticmethod
+    def read_meta(data: bytes) -> Dict[str, Any]:
+        with np.load(io.BytesIO(data), allow_pickle=False) as z:
+            return json.loads(str(z["meta"]))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "VectorIndex":
+        with np.load(io.BytesIO(data), allow_pickle=False) as z:
+            return cls(z["matrix"].astype(np.float32), z["idf"].astype(np.float32))
+
+
+def fuse_rankings(rankings: Sequence[Sequence[Tuple[int, float]]], top_k: int, k: int = RRF_K) -> List[int]:
+    """
+    Reciprocal rank fusion: chunk numbers ordered by sum(1 / (k + rank)) over the
+    rankings they appear in (ties keep chunk order). Score scales don't need to match.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank + 1)
+    return [doc for doc, _ in sorted(fused.items(), key=lambda x: (-x[1], x[0]))[:top_k]]
+
+
+def save_vectors(
+    storage_dir: str | Path,
+    upload_id: str,
+    vectors: VectorIndex,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Path:
+    """
+    Persists the vectors of the upload's chunk set (save the pages first, like the chunks).
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+    out_path = get_store(storage_dir).save_vectors(
+        upload_id, key, vectors.to_bytes(source_fingerprint(storage_dir, upload_id))
+    )
+    invalidate_cached(f"vectors:{key}", storage_dir, upload_id)
+    return out_path
+
+
+def get_upload_vectors(
+    storage_dir: str | Path,
+    upload_id: str,
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    chunks: Optional[List[Chunk]] = None,
+    pages: Optional[List[Dict[str, Any]]] = None,
+) -> VectorIndex:
+    """
+    Vectors of get_upload_chunks(...) for the same parameters: cached, else persisted
+    (if computed from the current pages), else computed now and persisted.
+
+    Raises FileNotFoundError when the upload has no extracted pages.
+    """
+    key = chunks_key(max_tokens, overlap_tokens)
+    store = get_store(storage_dir)
+
+    def decode(data: bytes, source: Optional[str]) -> Optional[VectorIndex]:
+        meta = VectorIndex.read_meta(data)
+        if meta.get("source") == source and meta.get("vector_version") == VECTOR_VERSION and meta.get("dim") == DIM:
+            return VectorIndex.from_bytes(data)
+        return None
+
+    def build() -> VectorIndex:
+        chunk_set = chunks
+        if chunk_set is None:
+            chunk_set = get_upload_chunks(storage_dir, upload_id, max_tokens, overlap_tokens, pages=pages)
+        return VectorIndex.build(chunk_set)
+
+    return load_derived(
+        f"vectors:{key}",
+        storage_dir,
+        upload_id,
+        load=lambda: store.load_vectors(upload_id, key),
+        decode=decode,
+        build=build,
+        save=lambda vectors, source: store.save_vectors(upload_id, key, vectors.to_bytes(source)),
+        persist=is_persisted(max_tokens, overlap_tokens),
+    )
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.services.pdf_parser import PDFParseError, PDFParseMemoryError, PDFParseTimeoutError
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_POLL_INTERVAL_S = 0.25
+
+
+def _group_rss_bytes(pgid: int) -> Optional[int]:
+    """
+    Largest RSS of any single process in a process group (the worker, or one process
+    of the extraction pool it started). Per process rather than summed: the page pool
+    runs one process per CPU, so idle pool processes alone would add up to the cap on
+    large hosts. Returns None where /proc isn't available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    largest = 0
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as f:
+                stat = f.read().decode("ascii", "replace")
+            fields = stat[stat.rindex(")") + 2:].split()
+            # after "(comm)": state ppid pgrp ... rss is the 22nd field
+            if int(fields[2]) == pgid:
+                largest = max(largest, int(fields[21]) * _PAGE_SIZE)
+        except (OSError, ValueError, IndexError):
+            continue
+    return largest
+
+
+def _worker_main(conn) -> None:
+    """
+    Child process loop: runs one task at a time until told to stop.
+    The worker leads its own process group so a kill also takes down any pool it spawned.
+    """
+    if hasattr(os, "setsid"):
+        os.setsid()
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        fn, args = task
+        try:
+            reply = ("ok", fn(*args))
+        except MemoryError:
+            reply = ("oom", "worker ran out of memory")
+        except Exception as e:
+            reply = ("error", e)
+
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        try:
+            conn.send((*reply, peak_kb * 1024))
+        except Exception as e:
+            # unpicklable result/exception: report it as a plain parse error
+            conn.send(("error", PDFParseError(f"{type(e).__name__}: {e}"), peak_kb * 1024))
+
+
+class _Worker:
+    def __init__(self, ctx) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.docs_handled = 0
+
+    def kill(self) -> None:
+        pid = self.process.pid
+        if pid and hasattr(os, "killpg"):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass  # group not created yet (worker still starting)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class IsolatedExtractor:
+    """
+    Runs extraction tasks in sandboxed child processes:
+      - per-task wall-clock timeout (worker killed -> PDFParseTimeoutError)
+      - RSS cap per process in the worker's process group (worker killed -> PDFParseMemoryError)
+      - a worker that dies on its own (e.g. a parser segfault) -> plain PDFParseError
+      - workers recycled after max_docs tasks so leaked parser memory is returned to the OS
+    A killed worker takes nothing else down; the next task gets a fresh one.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        timeout_s: float = 300.0,
+        max_rss_mb: int = 2048,
+        max_docs: int = 20,
+    ) -> None:
+        self.timeout_s = timeout_s
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb > 0 else 0
+        self.max_docs = max(1, max_docs)
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(max(1, workers)):
+            self._slots.put(None)  # workers start lazily
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "workers": max(1, workers),
+            "documents": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "memory_kills": 0,
+            "crashes": 0,
+            "recycled": 0,
+            "started": 0,
+            "peak_rss_bytes": 0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        out["kills"] = out["timeouts"] + out["memory_kills"]
+        out["peak_rss_mb"] = round(out["peak_rss_bytes"] / (1024 * 1024), 1)
+        return out
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _note_rss(self, rss: Optional[int]) -> None:
+        if rss:
+            with self._lock:
+                self._stats["peak_rss_bytes"] = max(self._stats["peak_rss_bytes"], rss)
+
+    def run(self, fn: Callable[..., Any], *args: Any, timeout_s: Optional[float] = None) -> Any:
+        """
+        Runs fn(*args) in a worker and returns its result (fn and args must be picklable).
+        Exceptions raised by fn are re-raised here.
+        """
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        worker = self._slots.get()
+        try:
+            if worker is None or not worker.process.is_alive():
+                worker = _Worker(self._ctx)
+                self._bump("started")
+            worker, status, payload = self._run_on(worker, fn, args, timeout_s)
+        except BaseException:
+            if worker is not None and worker.process.is_alive():
+                worker.kill()
+            worker = None
+            raise
+        finally:
+            self._slots.put(worker)
+
+        if status == "error":
+            raise payload
+        return payload
+
+    def _run_on(self, worker: _Worker, fn: Callable[..., Any], args: tuple, timeout_s: float):
+        """
+        Runs one task on a worker, enforcing the timeout and RSS cap.
+        Returns (worker to keep or None, status, payload); kills raise.
+        """
+        worker.conn.send((fn, args))
+        deadline = time.monotonic() + timeout_s
+
+        while True:
+            if worker.conn.poll(_POLL_INTERVAL_S):
+                try:
+                    status, payload, peak_rss = worker.conn.recv()
+                except EOFError:
+                    self._crashed(worker)
+                break
+
+            if not worker.process.is_alive():
+                self._crashed(worker)
+
+            rss = _group_rss_bytes(worker.process.pid)
+            self._note_rss(rss)
+            if self.max_rss_bytes and rss and rss > self.max_rss_bytes:
+                worker.kill()
+                self._bump("memory_kills")
+                self._bump("failures")
+                raise PDFParseMemoryError(
+                    f"extraction exceeded memory limit ({self.max_rss_bytes // (1024 * 1024)} MB)"
+                )
+
+            if time.monotonic() > deadline:
+                worker.kill()
+                self._bump("timeouts")
+                self._bump("failures")
+                raise PDFParseTimeoutError(f"extraction timed out after {timeout_s:g}s")
+
+        self._note_rss(peak_rss)
+        self._bump("documents")
+        worker.docs_handled += 1
+
+        if status == "oom":
+            worker.kill()
+            self._bump("memory_kills")
+            self._bump("failures")
+            raise PDFParseMemoryError(payload)
+
+        if status == "error":
+            self._bump("failures")
+
+        if worker.docs_handled >= self.max_docs:
+            worker.stop()
+            self._bump("recycled")
+            return None, status, payload
+
+        return worker, status, payload
+
+    def _crashed(self, worker: _Worker) -> None:
+        """
+        The worker died without replying: classify and raise.
+        """
+        exitcode = worker.process.exitcode
+        worker.kill()
+        self._bump("failures")
+        # SIGKILL: the kernel OOM killer; SIGSEGV / SIGABRT from a malformed PDF are crashes
+        if exitcode == -signal.SIGKILL:
+            self._bump("memory_kills")
+            raise PDFParseMemoryError(f"extraction worker died (exit code {exitcode})")
+        self._bump("crashes")
+        raise PDFParseError(f"extraction worker crashed (exit code {exitcode})")
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                worker = self._slots.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+
+
+_extractor: Optional[IsolatedExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_isolated_extractor() -> IsolatedExtractor:
+    """
+    Process-wide sandbox pool, created lazily from settings on first use.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            from app.core.config import settings
+
+            _extractor = IsolatedExtractor(
+                workers=settings.extract_isolated_workers,
+                timeout_s=settings.extract_timeout_s,
+                max_rss_mb=settings.extract_max_rss_mb,
+                max_docs=settings.extract_worker_max_docs,
+            )
+        return _extractor
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    priority: int
+    meta: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            **self.meta,
+        }
+
+
+def _make_executor(kind: str, workers: int) -> Executor:
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+    if kind == "process":
+        # fn/args must be picklable (module-level functions, plain arguments)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    raise ValueError(f"Unknown job executor: {kind}")
+
+
+class JobScheduler:
+    """
+    In-process job scheduler:
+      - bounded priority queue (lower number = runs first, FIFO within a priority)
+      - a fixed number of dispatcher threads, each running one job at a time
+      - jobs execute on a pluggable executor ("thread" or "process")
+      - finished jobs are kept for status polling, oldest evicted past max_history
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        executor: str = "thread",
+        max_queue: int = 100,
+        max_history: int = 1000,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.executor_kind = executor
+        self.max_history = max_history
+
+        self._executor = _make_executor(executor, self.workers)
+        self._queue: "queue.PriorityQueue[Tuple[int, int, str, Callable[..., Any], tuple]]" = queue.PriorityQueue(
+            maxsize=max_queue
+        )
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, name=f"job-dispatch-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args: Any, priority: int = 10, **meta: Any) -> Job:
+        job = Job(job_id=str(uuid.uuid4()), kind=kind, priority=priority, meta=meta)
+        with self._lock:
+            try:
+                self._queue.put_nowait((priority, next(self._seq), job.job_id, fn, args))
+            except queue.Full:
+                raise JobQueueFullError(f"Job queue is full ({self._queue.maxsize} pending)")
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "executor": self.executor_kind,
+            "queued": self._queue.qsize(),
+            "jobs_by_status": counts,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        for _ in self._threads:
+            # sentinel sorts after everything real; wakes each dispatcher once
+            self._queue.put((float("inf"), next(self._seq), "", None, ()))
+        if wait:
+            for t in self._threads:
+                t.join()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _evict_finished(self) -> None:
+        if len(self._jobs) <= self.max_history:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_history:
+                break
+            if self._jobs[job_id].status in (SUCCEEDED, FAILED):
+                del self._jobs[job_id]
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.is_set():
+            _, _, job_id, fn, args = self._queue.get()
+            if fn is None:
+                break
+            job = self.get(job_id)
+            if job is None:
+                continue
+
+            job.status = RUNNING
+            job.started_at = time.time()
+            try:
+                job.result = self._executor.submit(fn, *args).result()
+                job.status = SUCCEEDED
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+
+
+_scheduler: Optional[JobScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """
+    Process-wide scheduler, created lazily from settings on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from app.core.config import settings
+
+            _scheduler = JobScheduler(
+                workers=settings.job_workers,
+                executor=settings.job_executor,
+                max_queue=settings.job_queue_size,
+            )
+        return _scheduler
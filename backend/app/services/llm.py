@@ -1,7 +1,9 @@
 # bakcend/app/service/llm.py
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 from openai import OpenAI
 from app.core.config import settings
+from app.services.tokens import get_token_counter, truncate_to_tokens
 
 
 def _get_client() -> OpenAI:
@@ -16,20 +18,7 @@ def _get_client() -> OpenAI:
     return OpenAI(api_key=settings.openai_api_key)
 
 
-def explain_variance(
-    *,
-    variance: Dict[str, Any],
-    question: str,
-) -> str:
-    """
-    Turn structured variance data into a concise analyst-style narrative.
-    """
-
-    print("🔥🔥 OPENAI LLM CALLED 🔥🔥")
-
-    client = _get_client()
-
-    prompt = f"""
+_VARIANCE_PROMPT = """
 You are a senior financial analyst.
 
 Given the variance drivers below, write a concise,
@@ -48,6 +37,45 @@ Guidelines:
 - 4–6 sentences max
 """
 
+
+def build_variance_prompt(
+    *,
+    variance: Dict[str, Any],
+    question: str,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    The explain_variance prompt, kept within max_tokens (default: settings.llm_prompt_max_tokens).
+    When it doesn't fit, the variance data is cut first; the question keeps at least
+    a quarter of the room.
+    """
+    counter = get_token_counter()
+    max_tokens = settings.llm_prompt_max_tokens if max_tokens is None else max_tokens
+    room = max(0, max_tokens - counter.count(_VARIANCE_PROMPT.format(question="", variance="")))
+
+    variance_text = str(variance)
+    question = truncate_to_tokens(question, max(room - counter.count(variance_text), room // 4), counter)
+    variance_text = truncate_to_tokens(variance_text, room - counter.count(question), counter)
+    return _VARIANCE_PROMPT.format(question=question, variance=variance_text)
+
+
+def explain_variance(
+    *,
+    variance: Dict[str, Any],
+    question: str,
+    client: Optional[OpenAI] = None,
+) -> str:
+    """
+    Turn structured variance data into a concise analyst-style narrative.
+    client: a shared OpenAI client (one is created per call if omitted).
+    """
+
+    print("🔥🔥 OPENAI LLM CALLED 🔥🔥")
+
+    client = client or _get_client()
+
+    prompt = build_variance_prompt(variance=variance, question=question)
+
     response = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
@@ -58,3 +86,33 @@ Guidelines:
     )
 
     return response.choices[0].message.content.strip()
+
+
+def explain_variance_many(
+    *,
+    variance: Dict[str, Any],
+    questions: List[str],
+    max_workers: Optional[int] = None,
+) -> List[Optional[str]]:
+    """
+    explain_variance for each question, with the calls in flight concurrently
+    (up to max_workers, default settings.llm_max_concurrency) on one shared client.
+    Results are in question order; None where a call failed (or no API key is set),
+    so one bad call never sinks the batch.
+    """
+    if not questions:
+        return []
+    try:
+        client = _get_client()
+    except Exception:
+        return [None] * len(questions)
+
+    def one(question: str) -> Optional[str]:
+        try:
+            return explain_variance(variance=variance, question=question, client=client)
+        except Exception:
+            return None
+
+    workers = max(1, min(len(questions), max_workers or settings.llm_max_concurrency))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+        return list(pool.map(one, questions))
@@ -0,0 +1,159 @@
+"""
+Multi-phrase matching in one pass (Aho-Corasick over terms).
+
+Phrases and text are split into terms (words, and every other symbol on its own:
+the same terms the chunk index uses), and an Aho-Corasick automaton over those
+terms finds every phrase in a single left-to-right pass, however many phrases
+there are. Matching is on whole terms, with a trailing plural "s" dropped on both
+sides (match_terms): "revenue" matches "Total revenues", "net" doesn't match "network".
+
+get_matcher(phrases) compiles a phrase set once and caches it, so fixed keyword /
+marker lists cost one dict lookup per term of text. For a handful of phrases one
+str.count per phrase is cheaper still (count_phrases, same result).
+"""
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# words, and every other symbol on its own, so "other income/(expense), net" is a phrase too
+_TERM = re.compile(r"\w+|[^\w\s]")
+# the same terms for (lowercased) ASCII text, without Unicode class lookups
+_TERM_ASCII = re.compile(r"[a-z0-9_]+|[^a-z0-9_\s]")
+
+# phrase sets at least this large are scanned with the automaton; smaller ones
+# with count_phrases (one str.count per phrase), which is faster below ~16-24 phrases
+AUTOMATON_MIN_PHRASES = 16
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower()
+    return (_TERM_ASCII if text.isascii() else _TERM).findall(text)
+
+
+def match_terms(text: str) -> List[str]:
+    """
+    tokenize(text) with plurals folded onto the singular ("revenues" -> "revenue"):
+    a trailing "s" is dropped from words longer than 4 characters, except after "s"
+    ("business"). Keywords and the text they're matched against both go through this.
+    """
+    return [t[:-1] if len(t) > 4 and t[-1] == "s" and t[-2] != "s" else t for t in tokenize(text)]
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of phrases.
+    States are trie nodes: goto[state] maps a term to the next state, fail[state]
+    is the longest proper suffix that is also a trie path, out[state] the phrases
+    (by number) ending there, including those inherited through fail links.
+    """
+
+    __slots__ = ("phrases", "_lengths", "_goto", "_fail", "_out")
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self.phrases: List[str] = list(dict.fromkeys(phrases))
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+
+        for pid, phrase in enumerate(self.phrases):
+            terms = match_terms(phrase)
+            self._lengths.append(len(terms))
+            if not terms:
+                continue
+            state = 0
+            for term in terms:
+                nxt = self._goto[state].get(term)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._out.append([])
+                    self._goto[state][term] = nxt
+                state = nxt
+            self._out[state].append(pid)
+
+        # fail links, breadth-first (depth-1 states fail to the root)
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for term, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    f = self._fail[state]
+                    while f and term not in self._goto[f]:
+                        f = self._fail[f]
+                    self._fail[nxt] = self._goto[f].get(term, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan_terms(self, terms: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        {phrase: (occurrences, first term position)} for the phrases found in terms
+        (as produced by match_terms).
+        Occurrences of one phrase don't overlap (like str.count).
+        """
+        counts: Dict[int, int] = {}
+        first: Dict[int, int] = {}
+        last_end: Dict[int, int] = {}
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        state = 0
+        for i, term in enumerate(terms):
+            while state and term not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(term, 0)
+            for pid in out[state]:
+                start = i - lengths[pid] + 1
+                if start <= last_end.get(pid, -1):
+                    continue
+                last_end[pid] = i
+                if pid not in counts:
+                    counts[pid] = 0
+                    first[pid] = start
+                counts[pid] += 1
+        return {self.phrases[pid]: (n, first[pid]) for pid, n in counts.items()}
+
+    def scan(self, text: str) -> Dict[str, Tuple[int, int]]:
+        return self.scan_terms(match_terms(text))
+
+
+def _joined(terms: Sequence[str]) -> str:
+    return "\n" + "\n\n".join(terms) + "\n"
+
+
+@lru_cache(maxsize=1024)
+def _needle(phrase: str) -> Optional[str]:
+    terms = match_terms(phrase)
+    return _joined(terms) if terms else None
+
+
+def count_phrases(terms: Sequence[str], phrases: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Same result as get_matcher(phrases).scan_terms(terms), with one str.count per
+    phrase over the terms joined into a string (each term between newlines, which
+    no term contains). Faster than the automaton for a handful of phrases; the
+    automaton wins as the phrase count grows (AUTOMATON_MIN_PHRASES).
+    """
+    text = _joined(terms)
+    out: Dict[str, Tuple[int, int]] = {}
+    for phrase in phrases:
+        needle = _needle(phrase)
+        if needle is None or phrase in out:
+            continue
+        n = text.count(needle)
+        if n:
+            out[phrase] = (n, text.count("\n", 0, text.find(needle)) // 2)
+    return out
+
+
+@lru_cache(maxsize=128)
+def _compiled(phrases: Tuple[str, ...]) -> PhraseMatcher:
+    return PhraseMatcher(phrases)
+
+
+def get_matcher(phrases: Iterable[str]) -> PhraseMatcher:
+    """
+    Compiled matcher for a phrase set, cached per (ordered) set.
+    """
+    return _compiled(tuple(phrases))
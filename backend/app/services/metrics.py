@@ -63,6 +63,37 @@ def _find_first(pattern: re.Pattern[str], pages: List[Dict[str, Any]]) -> Option
     return None
 
 
+_MONTHS = {
+    m: i
+    for i, m in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"],
+        start=1,
+    )
+}
+
+_PERIOD_ENDED = re.compile(
+    r"(?i)\b(?:quarterly period|fiscal year|fiscal quarter|period|quarter|year|"
+    r"(?:three|six|nine|twelve)\s+months)\s+ended\s+"
+    r"(?P<month>january|february|march|april|may|june|july|august|september|october|november|december)"
+    r"\s+(?P<day>\d{1,2}),\s*(?P<year>\d{4})"
+)
+
+
+def detect_fiscal_period(pages: List[Dict[str, Any]], max_pages: int = 5) -> Optional[str]:
+    """
+    Period end date of the filing as ISO "YYYY-MM-DD", from the cover page /
+    statement headers ("For the quarterly period ended June 28, 2025").
+    Returns None when no period phrase is found.
+    """
+    for p in pages[:max_pages]:
+        m = _PERIOD_ENDED.search(str(p.get("text", "")))
+        if m:
+            month = _MONTHS[m.group("month").lower()]
+            return f"{int(m.group('year')):04d}-{month:02d}-{int(m.group('day')):02d}"
+    return None
+
+
 def extract_basic_metrics(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Deterministic, best-effort metric extraction.
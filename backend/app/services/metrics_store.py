@@ -1,26 +1,35 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import Any, Dict
 
+from app.services.artifact_cache import cached_load, invalidate_cached
+from app.services.artifact_store import FileArtifactStore, get_store
+
 
 def metrics_path(storage_dir: str, upload_id: str) -> Path:
-    return Path(storage_dir) / "metrics" / f"{upload_id}.json"
+    return FileArtifactStore(storage_dir).metrics_path(upload_id)
 
 
 def save_metrics(storage_dir: str, upload_id: str, payload: Dict[str, Any]) -> Path:
-    path = metrics_path(storage_dir, upload_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return path
+    out_path = get_store(storage_dir).save_metrics(upload_id, payload)
+    invalidate_cached("metrics", storage_dir, upload_id)
+    return out_path
 
 
 def load_metrics(storage_dir: str, upload_id: str) -> Dict[str, Any]:
-    path = metrics_path(storage_dir, upload_id)
-    if not path.exists():
-        raise FileNotFoundError(f"Metrics not found for upload_id={upload_id} at {path}")
-    data = json.loads(path.read_text(encoding="utf-8"))
+    """
+    Cached while the stored copy is unchanged; the returned dict is shared, so don't mutate it.
+    """
+    return cached_load("metrics", storage_dir, upload_id, lambda: _load_and_validate(storage_dir, upload_id))
+
+
+def _load_and_validate(storage_dir: str, upload_id: str) -> Dict[str, Any]:
+    data = get_store(storage_dir).load_metrics(upload_id)
     if not isinstance(data, dict):
         raise ValueError("Invalid metrics format: expected a dict")
     return data
+
+
+def has_metrics(storage_dir: str, upload_id: str) -> bool:
+    return get_store(storage_dir).has_metrics(upload_id)
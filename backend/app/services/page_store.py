@@ -0,0 +1,109 @@
+"""
+Memory-mapped page text store.
+
+One file per upload (extracted/<id>.pages):
+
+  b"FRPB" | version (u8) | index length (u32 LE) | index JSON | text blob
+
+The index is a JSON list of [page, offset, length, extra-or-null] entries, with
+offsets into the text blob (every page's UTF-8 text, concatenated). Readers mmap
+the file and hand out MappedPage views that slice + decode a page's text only
+when it is accessed, so untouched pages never become Python strings and the
+bytes are shared between worker processes through the OS page cache.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services.storage_format import write_bytes_atomic
+
+PAGE_BLOB_MAGIC = b"FRPB"
+PAGE_BLOB_VERSION = 1
+_HEADER = struct.Struct("<4sBI")
+
+
+class MappedPage(Mapping):
+    """
+    Read-only page dict ({"page", "text", ...extra}) backed by the mmap.
+    The text is decoded on every access and not kept, to keep resident memory low;
+    callers that use it repeatedly should hold on to the string.
+    """
+
+    __slots__ = ("_mm", "_page", "_start", "_end", "_extra")
+
+    def __init__(self, mm: mmap.mmap, page: int, start: int, end: int, extra: Optional[Dict[str, Any]]) -> None:
+        self._mm = mm
+        self._page = page
+        self._start = start
+        self._end = end
+        self._extra = extra or {}
+
+    @property
+    def text_bytes(self) -> int:
+        return self._end - self._start
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "page":
+            return self._page
+        if key == "text":
+            return self._mm[self._start:self._end].decode("utf-8")
+        return self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield "page"
+        yield "text"
+        yield from self._extra
+
+    def __len__(self) -> int:
+        return 2 + len(self._extra)
+
+    def __repr__(self) -> str:
+        return f"MappedPage(page={self._page}, text_bytes={self.text_bytes})"
+
+
+def dumps_page_blob(pages: List[Mapping]) -> bytes:
+    index = []
+    texts: List[bytes] = []
+    offset = 0
+    for p in pages:
+        data = str(p.get("text") or "").encode("utf-8")
+        extra = {k: v for k, v in p.items() if k not in ("page", "text")}
+        index.append([int(p["page"]), offset, len(data), extra or None])
+        texts.append(data)
+        offset += len(data)
+
+    index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(PAGE_BLOB_MAGIC, PAGE_BLOB_VERSION, len(index_bytes))
+    return b"".join([header, index_bytes, *texts])
+
+
+def write_page_blob(path: Path, pages: List[Mapping]) -> Path:
+    return write_bytes_atomic(path, dumps_page_blob(pages))
+
+
+def open_page_blob(path: Path) -> List[MappedPage]:
+    """
+    Maps a page blob and returns lazy page views in stored order.
+    The mapping stays open for as long as any view is referenced (a file replaced
+    by a later save keeps serving its old contents to existing views).
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < _HEADER.size:
+        raise ValueError(f"Truncated page blob: {path}")
+    magic, version, index_len = _HEADER.unpack_from(mm, 0)
+    if magic != PAGE_BLOB_MAGIC:
+        raise ValueError(f"Not a page blob: {path}")
+    if version > PAGE_BLOB_VERSION:
+        raise ValueError(f"Unsupported page blob version {version}")
+
+    index_start = _HEADER.size
+    base = index_start + index_len
+    index = json.loads(mm[index_start:base])
+    return [MappedPage(mm, page, base + offset, base + offset + length, extra) for page, offset, length, extra in index]
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import json
+from collections.abc import Mapping
 from pathlib import Path
 from typing import Any, Dict, List
 
+from app.services.artifact_cache import cached_load, invalidate_cached
+from app.services.artifact_store import FileArtifactStore, get_store
+
 
 def extracted_pages_path(storage_dir: str | Path, upload_id: str) -> Path:
-    storage_dir = Path(storage_dir)
-    return storage_dir / "extracted" / f"{upload_id}.json"
+    return FileArtifactStore(storage_dir).pages_path(upload_id)
 
 
 def load_extracted_pages(storage_dir: str | Path, upload_id: str) -> List[Dict[str, Any]]:
     """
-    Loads page-level extracted text for an upload_id.
+    Loads page-level extracted text for an upload_id from the configured storage backend.
+    With the file backend, uncompressed pages come back as lazy mmap-backed views
+    (page_store.MappedPage); compressed v1 artifacts and legacy JSON as plain dicts.
+    Served from the in-process artifact cache while the stored copy is unchanged;
+    the returned list is shared, so don't mutate it.
 
     Expected JSON format:
     [
@@ -20,26 +27,81 @@ def load_extracted_pages(storage_dir: str | Path, upload_id: str) -> List[Dict[s
       {"page": 2, "text": "..."}
     ]
     """
-    path = extracted_pages_path(storage_dir, upload_id)
-    if not path.exists():
-        raise FileNotFoundError(f"Extracted pages not found for upload_id={upload_id} at {path}")
+    return cached_load("pages", storage_dir, upload_id, lambda: _load_and_validate(storage_dir, upload_id))
+
 
-    data = json.loads(path.read_text(encoding="utf-8"))
+def _load_and_validate(storage_dir: str | Path, upload_id: str) -> List[Dict[str, Any]]:
+    data = get_store(storage_dir).load_pages(upload_id)
     if not isinstance(data, list):
         raise ValueError("Invalid extracted pages format: expected a list")
 
     for i, item in enumerate(data):
-        if not isinstance(item, dict) or "page" not in item or "text" not in item:
+        if not isinstance(item, Mapping) or "page" not in item or "text" not in item:
             raise ValueError(f"Invalid page object at index {i}: expected keys 'page' and 'text'")
 
     return data
 
 
-def save_extracted_pages(storage_dir: str | Path, upload_id: str, pages: List[Dict[str, Any]]) -> Path:
+def has_extracted_pages(storage_dir: str | Path, upload_id: str) -> bool:
+    return get_store(storage_dir).has_pages(upload_id)
+
+
+def save_extracted_pages(
+    storage_dir: str | Path,
+    upload_id: str,
+    pages: List[Dict[str, Any]],
+    codec: str | None = None,
+) -> Path:
     """
-    Saves extracted pages to disk with stable formatting.
+    Saves extracted pages (file backend: compact encoding, page text compressed per
+    settings.storage_compression unless a codec is given).
     """
-    path = extracted_pages_path(storage_dir, upload_id)
+    if codec is None:
+        from app.core.config import settings
+
+        codec = settings.storage_compression
+    out_path = get_store(storage_dir).save_pages(upload_id, pages, codec)
+    invalidate_cached("pages", storage_dir, upload_id)
+    return out_path
+
+
+# ---------------------------------------------------------------------------
+# Extraction checkpoints: one JSON line per finished page, so a retried
+# extraction resumes instead of starting over.
+# ---------------------------------------------------------------------------
+
+def partial_pages_path(storage_dir: str | Path, upload_id: str) -> Path:
+    return Path(storage_dir) / "extracted" / f"{upload_id}.partial.jsonl"
+
+
+def load_partial_pages(storage_dir: str | Path, upload_id: str) -> List[Dict[str, Any]]:
+    """
+    Pages checkpointed by an earlier (interrupted) extraction.
+    A torn last line from a crash mid-write is ignored.
+    """
+    path = partial_pages_path(storage_dir, upload_id)
+    if not path.exists():
+        return []
+
+    pages: List[Dict[str, Any]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(item, dict) and "page" in item and "text" in item:
+            pages.append(item)
+    return pages
+
+
+def append_partial_pages(storage_dir: str | Path, upload_id: str, pages: List[Dict[str, Any]]) -> None:
+    path = partial_pages_path(storage_dir, upload_id)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(pages, ensure_ascii=False, indent=2), encoding="utf-8")
-    return path
+    with path.open("a", encoding="utf-8") as f:
+        for p in pages:
+            f.write(json.dumps(p, ensure_ascii=False) + "\n")
+        f.flush()
+
+
+def clear_partial_pages(storage_dir: str | Path, upload_id: str) -> None:
+    partial_pages_path(storage_dir, upload_id).unlink(missing_ok=True)
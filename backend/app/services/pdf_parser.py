@@ -1,24 +1,387 @@
+from __future__ import annotations
+
+import math
+import multiprocessing
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
 
 class PDFParseError(Exception):
     pass
 
 
-def extract_text_by_page(pdf_path: Path) -> List[Dict]:
+class PDFParseTimeoutError(PDFParseError):
+    pass
+
+
+class PDFParseMemoryError(PDFParseError):
+    pass
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _resolve_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = settings.extract_workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool shared across requests (re-created only if the size changes).
+    "spawn" keeps workers safe to start from a threaded server process.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def _page_ranges(num_pages: int, workers: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """
+    Splits 1..num_pages into contiguous inclusive (start, end) ranges.
+    Ranges are capped at pages_per_task, but never smaller than needed to keep
+    every worker busy, so small docs don't pay per-task PDF open overhead.
+    """
+    return _group_ranges(list(range(1, num_pages + 1)), workers, pages_per_task)
+
+
+def _group_ranges(page_numbers: List[int], workers: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """
+    Same as _page_ranges for an arbitrary sorted page subset: runs of consecutive
+    pages are kept together and split at the task size.
+    """
+    if not page_numbers:
+        return []
+    size = max(1, min(pages_per_task, math.ceil(len(page_numbers) / workers)))
+
+    ranges: List[Tuple[int, int]] = []
+    start = prev = page_numbers[0]
+    for n in page_numbers[1:]:
+        if n != prev + 1 or n - start >= size:
+            ranges.append((start, prev))
+            start = n
+        prev = n
+    ranges.append((start, prev))
+    return ranges
+
+
+_STATEMENT_HEADER = re.compile(
+    r"statements?\s+of\s+(?:consolidated\s+)?(?:operations|income|comprehensive\s+income|cash\s+flows"
+    r"|financial\s+position|shareholders|stockholders)|balance\s+sheets?",
+    re.IGNORECASE,
+)
+_NUMERIC_TOKEN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+# Statements that metrics.py reads from (operations / income, balance sheet).
+_METRIC_STATEMENT_HEADER = re.compile(
+    r"statements?\s+of\s+(?:consolidated\s+)?(?:operations|income)|balance\s+sheets?|statements?\s+of\s+financial\s+position",
+    re.IGNORECASE,
+)
+
+# Statement titles sit at the top of the page; probing only this much text keeps the pre-pass cheap.
+_PROBE_CHARS = 600
+
+
+class _PdfiumReader:
+    """
+    Fast path: pdfium's native text layer (no layout analysis).
+    """
+
+    def __init__(self, pdf_path: str) -> None:
+        import pypdfium2 as pdfium
+
+        self._pdf = pdfium.PdfDocument(pdf_path)
+
+    def page_text(self, n: int) -> str:
+        page = self._pdf[n - 1]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+        return text.replace("\r\n", "\n").replace("\r", "\n").replace("\x02", "")
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+class _PdfplumberReader:
+    """
+    Slow path: pdfplumber's layout-based extract_text.
+    """
+
+    def __init__(self, pdf_path: str) -> None:
+        import pdfplumber
+
+        self._pdf = pdfplumber.open(pdf_path)
+
+    def page_text(self, n: int) -> str:
+        page = self._pdf.pages[n - 1]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()  # drop cached layout objects; long filings otherwise grow without bound
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+_BACKENDS: Dict[str, Callable[[str], Any]] = {
+    "pypdfium2": _PdfiumReader,
+    "pdfplumber": _PdfplumberReader,
+}
+
+# pdfplumber is the reference engine: anything the fast path can't read goes here.
+FALLBACK_BACKEND = "pdfplumber"
+
+
+def resolve_backend(name: str) -> str:
+    """
+    Validates a backend name; degrades to pdfplumber if pypdfium2 isn't installed.
+    """
+    if name not in _BACKENDS:
+        raise PDFParseError(f"Unknown extraction backend: {name}")
+    if name == "pypdfium2":
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return FALLBACK_BACKEND
+    return name
+
+
+def _looks_garbled(text: str) -> bool:
+    """
+    True when a large share of visible characters are replacement/control/private-use glyphs
+    (typical of fonts without a usable ToUnicode map).
+    """
+    visible = [ch for ch in text if not ch.isspace()]
+    if not visible:
+        return False
+    bad = sum(1 for ch in visible if ch == "\ufffd" or unicodedata.category(ch) in ("Cc", "Co", "Cn"))
+    return bad / len(visible) > 0.1
+
+
+def _needs_fallback(text: str) -> bool:
+    """
+    Decides whether a fast-path page should be re-extracted with pdfplumber:
+      - empty text
+      - garbled text
+      - a statement header with no numeric tokens (table body was lost)
+    """
+    t = text.strip()
+    if not t:
+        return True
+    if _looks_garbled(t):
+        return True
+    if _STATEMENT_HEADER.search(t) and not _NUMERIC_TOKEN.search(t):
+        return True
+    return False
+
+
+def count_pages(pdf_path: Path) -> int:
     try:
+        import pypdfium2 as pdfium
+    except ImportError:
         import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def locate_statement_pages(pdf_path: Path) -> List[int]:
+    """
+    Cheap pre-pass: reads only the top of each page's native text layer and returns the
+    page numbers that carry a Statement of Operations / Balance Sheet header.
+
+    Returns [] when pypdfium2 isn't available or nothing matched (callers then extract everything).
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return []
+
+    found: List[int] = []
+    try:
+        pdf = pdfium.PdfDocument(str(pdf_path))
+    except Exception as e:
+        raise PDFParseError(str(e))
+    try:
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                head = textpage.get_text_range(0, _PROBE_CHARS)
+            finally:
+                textpage.close()
+                page.close()
+            if _METRIC_STATEMENT_HEADER.search(head):
+                found.append(i + 1)
+    finally:
+        pdf.close()
+    return found
+
+
+def _iter_page_range(pdf_path: str, page_numbers: List[int], backend: str) -> Iterator[Dict]:
+    """
+    Extracts the given pages one at a time with the given backend, re-extracting unreadable
+    pages with the fallback backend. A page that fails in every backend is yielded with
+    empty text and an "error" message instead of failing the whole range.
+    """
+    primary = _BACKENDS[backend](pdf_path)
+    fallback = None
+    try:
+        for n in page_numbers:
+            text, used, error = "", backend, None
+            try:
+                text = primary.page_text(n)
+            except Exception as e:
+                error = f"{backend}: {e}"
+
+            if backend != FALLBACK_BACKEND and (error or _needs_fallback(text)):
+                try:
+                    if fallback is None:
+                        fallback = _BACKENDS[FALLBACK_BACKEND](pdf_path)
+                    alt = fallback.page_text(n)
+                    if alt.strip() or error:
+                        text, used, error = alt, FALLBACK_BACKEND, None
+                except Exception as e:
+                    error = f"{error}; {FALLBACK_BACKEND}: {e}" if error else None
+
+            page = {"page": n, "text": text.strip(), "backend": used}
+            if error:
+                page["error"] = error
+            yield page
+    finally:
+        primary.close()
+        if fallback is not None:
+            fallback.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int, backend: str = FALLBACK_BACKEND) -> List[Dict]:
+    """
+    Worker entry point: opens the PDF independently and extracts pages start..end (1-based, inclusive).
+    """
+    return list(_iter_page_range(pdf_path, list(range(start, end + 1)), backend))
+
+
+def summarize_extraction(pages: List[Dict], backend: str) -> Dict:
+    """
+    Backend choice + per-page fallback counts (and failed pages) for an extraction result.
+    """
+    by_backend: Dict[str, int] = {}
+    for p in pages:
+        name = p.get("backend", backend)
+        by_backend[name] = by_backend.get(name, 0) + 1
+    fallback = 0 if backend == FALLBACK_BACKEND else by_backend.get(FALLBACK_BACKEND, 0)
+    failed = [p["page"] for p in pages if p.get("error")]
+    return {
+        "backend": backend,
+        "fallback_pages": fallback,
+        "pages_by_backend": by_backend,
+        "failed_pages": failed,
+    }
+
+
+def iter_extracted_pages(
+    pdf_path: Path,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    backend: Optional[str] = None,
+    page_numbers: Optional[List[int]] = None,
+) -> Iterator[Dict]:
+    """
+    Yields {"page", "text", "backend"[, "error"]} dicts as soon as they are extracted
+    (completion order, not page order), so callers can checkpoint progress.
+
+    Page ranges are fanned out across a process pool (settings.extract_workers,
+    0 = one per CPU); each worker opens the PDF on its own. Small documents and
+    workers=1 run inline, one page at a time.
+
+    The primary backend (settings.extract_backend, default "pypdfium2") handles every
+    page; pages it returns empty or garbled are re-extracted with pdfplumber.
+
+    page_numbers restricts extraction to a subset of (1-based) pages.
+    """
+    try:
+        import pdfplumber  # noqa: F401
     except ImportError:
         raise PDFParseError("pdfplumber not installed")
 
-    pages = []
+    if pages_per_task is None:
+        pages_per_task = settings.extract_pages_per_task
+
+    workers = _resolve_workers(workers)
+    backend = resolve_backend(backend or settings.extract_backend)
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-                pages.append({"page": i, "text": text.strip()})
+        num_pages = count_pages(pdf_path)
+        if page_numbers is None:
+            wanted = list(range(1, num_pages + 1))
+        else:
+            wanted = sorted({n for n in page_numbers if 1 <= n <= num_pages})
+        ranges = _group_ranges(wanted, workers, pages_per_task)
     except Exception as e:
         raise PDFParseError(str(e))
 
+    if workers == 1 or len(ranges) <= 1:
+        try:
+            yield from _iter_page_range(str(pdf_path), wanted, backend)
+        except Exception as e:
+            raise PDFParseError(str(e))
+        return
+
+    pool = _get_pool(workers)
+    futures = [pool.submit(_extract_page_range, str(pdf_path), s, e, backend) for s, e in ranges]
+    try:
+        for fut in as_completed(futures):
+            try:
+                pages = fut.result()
+            except Exception as e:
+                raise PDFParseError(str(e))
+            yield from pages
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def extract_text_by_page(
+    pdf_path: Path,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    backend: Optional[str] = None,
+    page_numbers: Optional[List[int]] = None,
+) -> List[Dict]:
+    """
+    Extracts text per page, returning [{"page": n, "text": "...", "backend": "..."}] in page order.
+    See iter_extracted_pages for the execution model.
+    """
+    pages = list(iter_extracted_pages(pdf_path, workers, pages_per_task, backend, page_numbers))
+    pages.sort(key=lambda p: p["page"])
     return pages
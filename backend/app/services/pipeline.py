@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.chunk_index import ChunkIndex, save_index
+from app.services.chunk_store import is_persisted, save_chunks, source_fingerprint
+from app.services.embeddings import VectorIndex, save_vectors
+from app.services.extract_worker import get_isolated_extractor
+from app.services.chunking import chunk_pages
+from app.services.corpus_index import add_upload as add_to_corpus
+from app.services.metrics import detect_fiscal_period, extract_basic_metrics
+from app.services.metrics_store import save_metrics
+from app.services.parsing import (
+    append_partial_pages,
+    clear_partial_pages,
+    load_extracted_pages,
+    load_partial_pages,
+    save_extracted_pages,
+)
+from app.services.pdf_parser import (
+    PDFParseError,
+    PDFParseMemoryError,
+    PDFParseTimeoutError,
+    count_pages,
+    iter_extracted_pages,
+    locate_statement_pages,
+    resolve_backend,
+    summarize_extraction,
+)
+from app.services.uploads import upload_path
+
+
+class ExtractionInterruptedError(PDFParseError):
+    """
+    Extraction stopped partway (worker crash, restart...). Finished pages are
+    checkpointed; re-running the extraction resumes from them.
+    """
+
+    def __init__(self, message: str, pages_done: int) -> None:
+        super().__init__(message)
+        self.pages_done = pages_done
+
+    def __reduce__(self):
+        # keep pages_done when sent back from a worker process
+        return (type(self), (str(self), self.pages_done))
+
+
+def extract_pages(
+    storage_dir: str,
+    upload_id: str,
+    pdf_path: Path,
+    backend: str = "pypdfium2",
+    page_numbers: Optional[List[int]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    PDF -> pages in memory (+ backend summary).
+
+    With settings.extract_isolated the work runs in a sandboxed worker process
+    (timeout / RSS cap); PDFParseTimeoutError and PDFParseMemoryError surface here.
+    Pages finished before a kill stay checkpointed, so a retry resumes.
+    """
+    if settings.extract_isolated:
+        return get_isolated_extractor().run(
+            _extract_pages_local, storage_dir, upload_id, str(pdf_path), backend, page_numbers
+        )
+    return _extract_pages_local(storage_dir, upload_id, pdf_path, backend, page_numbers)
+
+
+def _sandboxed(fn, *args):
+    """
+    fn(*args) in a sandboxed worker under settings.extract_isolated (anything that
+    opens the PDF with a C parser), else in this process.
+    """
+    if settings.extract_isolated:
+        return get_isolated_extractor().run(fn, *args)
+    return fn(*args)
+
+
+def _extract_pages_local(
+    storage_dir: str,
+    upload_id: str,
+    pdf_path: Path,
+    backend: str = "pypdfium2",
+    page_numbers: Optional[List[int]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    PDF -> pages in memory (+ backend summary), checkpointing every finished page.
+
+    - pages already in the checkpoint file (from an interrupted run) are not re-extracted;
+      failed pages are retried
+    - pages that fail in every backend are kept with an "error" field
+    - an unreadable document yields one empty page (legacy behaviour)
+    - a failure after some pages were checkpointed raises ExtractionInterruptedError
+    """
+    backend = resolve_backend(backend)
+
+    done = {int(p["page"]): p for p in load_partial_pages(storage_dir, upload_id) if not p.get("error")}
+    if page_numbers is not None:
+        wanted = set(page_numbers)
+        done = {n: p for n, p in done.items() if n in wanted}
+        todo: Optional[List[int]] = [n for n in page_numbers if n not in done]
+    elif done:
+        try:
+            todo = [n for n in range(1, count_pages(pdf_path) + 1) if n not in done]
+        except Exception:
+            todo = None
+    else:
+        todo = None
+    resumed = len(done)
+
+    pages = dict(done)
+    try:
+        if todo is None or todo:
+            for page in iter_extracted_pages(pdf_path, backend=backend, page_numbers=todo):
+                append_partial_pages(storage_dir, upload_id, [page])
+                pages[int(page["page"])] = page
+    except PDFParseError as e:
+        if pages:
+            raise ExtractionInterruptedError(str(e), pages_done=len(pages))
+        pages = {}
+
+    ordered = [pages[n] for n in sorted(pages)] or [{"page": 1, "text": ""}]
+    clear_partial_pages(storage_dir, upload_id)
+
+    summary = summarize_extraction(ordered, backend)
+    summary["resumed_pages"] = resumed
+    return ordered, summary
+
+
+def build_metrics_payload(upload_id: str, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    extracted = extract_basic_metrics(pages)
+    return {
+        "upload_id": upload_id,
+        "fiscal_period": detect_fiscal_period(pages),
+        "metrics": extracted["metrics"],
+        "evidence": extracted["evidence"],
+    }
+
+
+def run_extraction(
+    storage_dir: str,
+    upload_dir: str,
+    upload_id: str,
+    backend: str = "pypdfium2",
+) -> Dict[str, Any]:
+    """
+    PDF -> extracted pages on disk.
+
+    Directories are passed explicitly (not read from settings) so this can run
+    in a background worker process.
+    """
+    pdf_path = upload_path(upload_dir, upload_id)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"Upload not found for upload_id={upload_id} at {pdf_path}")
+
+    pages, summary = extract_pages(storage_dir, upload_id, pdf_path, backend)
+    out_path = save_extracted_pages(storage_dir, upload_id, pages)
+
+    return {
+        "upload_id": upload_id,
+        "num_pages": len(pages),
+        "extracted_saved_as": str(out_path),
+        "extraction": summary,
+    }
+
+
+def run_metrics(storage_dir: str, upload_id: str, pages: Optional[list] = None) -> Dict[str, Any]:
+    """
+    Extracted pages -> metrics on disk.
+    Raises FileNotFoundError / ValueError from load_extracted_pages when pages aren't given.
+    """
+    if pages is None:
+        pages = load_extracted_pages(storage_dir, upload_id)
+
+    payload = build_metrics_payload(upload_id, pages)
+    out_path = save_metrics(storage_dir, upload_id, payload)
+
+    return {
+        "upload_id": upload_id,
+        "saved_as": str(out_path),
+        "metrics": payload["metrics"],
+    }
+
+
+def run_ingest(
+    storage_dir: str,
+    upload_dir: str,
+    upload_id: str,
+    backend: str = "pypdfium2",
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+) -> Dict[str, Any]:
+    """
+    One pass: parse -> metrics -> chunks (+ their search index and vectors), all in memory;
+    each artifact is written once at the end, then the chunks are added to the corpus index.
+    Chunks, index and vectors are only persisted for the default chunking parameters
+    (chunk_store.PERSISTED_CHUNKING); other sets are rebuilt in memory when asked for.
+    """
+    pdf_path = upload_path(upload_dir, upload_id)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"Upload not found for upload_id={upload_id} at {pdf_path}")
+
+    t0 = time.perf_counter()
+    pages, summary = extract_pages(storage_dir, upload_id, pdf_path, backend)
+    t1 = time.perf_counter()
+    payload = build_metrics_payload(upload_id, pages)
+    t2 = time.perf_counter()
+    chunks = chunk_pages(
+        upload_id=upload_id,
+        pages=pages,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens,
+        meta={"source": "pdf"},
+    )
+    t3 = time.perf_counter()
+    index = ChunkIndex.build(chunks)
+    vectors = VectorIndex.build(chunks)
+    t4 = time.perf_counter()
+
+    extracted_path = save_extracted_pages(storage_dir, upload_id, pages)
+    metrics_saved = save_metrics(storage_dir, upload_id, payload)
+    chunks_saved = index_saved = vectors_saved = None
+    if is_persisted(max_tokens, overlap_tokens):
+        chunks_saved = save_chunks(storage_dir, upload_id, chunks, max_tokens, overlap_tokens)
+        index_saved = save_index(storage_dir, upload_id, index, max_tokens, overlap_tokens)
+        vectors_saved = save_vectors(storage_dir, upload_id, vectors, max_tokens, overlap_tokens)
+    t5 = time.perf_counter()
+    corpus_saved = add_to_corpus(storage_dir, upload_id, chunks, source=source_fingerprint(storage_dir, upload_id))
+    t6 = time.perf_counter()
+
+    timings = {
+        "extract": round((t1 - t0) * 1000, 1),
+        "metrics": round((t2 - t1) * 1000, 1),
+        "chunks": round((t3 - t2) * 1000, 1),
+        "index": round((t4 - t3) * 1000, 1),
+        "persist": round((t5 - t4) * 1000, 1),
+        "corpus": round((t6 - t5) * 1000, 1),
+    }
+
+    return {
+        "upload_id": upload_id,
+        "num_pages": len(pages),
+        "extraction": summary,
+        "metrics": payload["metrics"],
+        "chunk_count": len(chunks),
+        "saved": {
+            "extracted": str(extracted_path),
+            "metrics": str(metrics_saved),
+            "chunks": str(chunks_saved) if chunks_saved else None,
+            "index": str(index_saved) if index_saved else None,
+            "vectors": str(vectors_saved) if vectors_saved else None,
+            "corpus": str(corpus_saved),
+        },
+        "timings_ms": timings,
+    }
+
+
+def run_statements_first(
+    storage_dir: str,
+    upload_dir: str,
+    upload_id: str,
+    backend: str = "pypdfium2",
+) -> Dict[str, Any]:
+    """
+    Fast first pass for metrics:
+      1) probe page headers to find the Statements of Operations / Balance Sheet pages
+      2) fully extract only those pages, compute + save metrics, save them as the extracted pages
+
+    Returns the metrics plus the page numbers still to extract ("remaining_pages"),
+    which callers hand to complete_extraction (usually as a background job).
+    If no statement page is found, the whole document is extracted here.
+    """
+    pdf_path = upload_path(upload_dir, upload_id)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"Upload not found for upload_id={upload_id} at {pdf_path}")
+
+    try:
+        statement_pages = _sandboxed(locate_statement_pages, pdf_path)
+    except (PDFParseTimeoutError, PDFParseMemoryError):
+        raise
+    except PDFParseError:
+        statement_pages = []
+
+    if not statement_pages:
+        extraction = run_extraction(storage_dir, upload_dir, upload_id, backend)
+        metrics = run_metrics(storage_dir, upload_id)
+        return {
+            **extraction,
+            "statement_pages": [],
+            "remaining_pages": [],
+            "metrics": metrics["metrics"],
+        }
+
+    pages, summary = extract_pages(storage_dir, upload_id, pdf_path, backend, page_numbers=statement_pages)
+    payload = build_metrics_payload(upload_id, pages)
+    save_metrics(storage_dir, upload_id, payload)
+    out_path = save_extracted_pages(storage_dir, upload_id, pages)
+
+    num_pages = _sandboxed(count_pages, pdf_path)
+    # only pages that really came out (not the empty placeholder of a failed run, not error pages)
+    done = {int(p["page"]) for p in pages if p.get("text") and not p.get("error")}
+
+    return {
+        "upload_id": upload_id,
+        "num_pages": num_pages,
+        "extracted_saved_as": str(out_path),
+        "extraction": summary,
+        "statement_pages": statement_pages,
+        "remaining_pages": [n for n in range(1, num_pages + 1) if n not in done],
+        "metrics": payload["metrics"],
+    }
+
+
+def complete_extraction(
+    storage_dir: str,
+    upload_dir: str,
+    upload_id: str,
+    remaining_pages: List[int],
+    backend: str = "pypdfium2",
+) -> Dict[str, Any]:
+    """
+    Second pass after run_statements_first: extracts the remaining pages (MD&A, notes,
+    exhibits...) and merges them with the statement pages already on disk, in page order.
+    """
+    pdf_path = upload_path(upload_dir, upload_id)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"Upload not found for upload_id={upload_id} at {pdf_path}")
+
+    rest, summary = extract_pages(storage_dir, upload_id, pdf_path, backend, page_numbers=remaining_pages)
+    by_page = {int(p["page"]): p for p in load_extracted_pages(storage_dir, upload_id)}
+    for p in rest:
+        if p.get("text") or int(p["page"]) not in by_page:
+            by_page[int(p["page"])] = p
+
+    pages = [by_page[n] for n in sorted(by_page)]
+    out_path = save_extracted_pages(storage_dir, upload_id, pages)
+
+    return {
+        "upload_id": upload_id,
+        "num_pages": len(pages),
+        "extracted_saved_as": str(out_path),
+        "extraction": summary,
+    }
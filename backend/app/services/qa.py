@@ -3,9 +3,14 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-
-from app.services.chunking import chunk_pages
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.chunk_index import ChunkIndex, bm25_rank, term_width
+from app.services.chunking import Chunk, chunk_pages
+from app.services.embeddings import VectorIndex, fuse_rankings
+from app.services.matcher import AUTOMATON_MIN_PHRASES, count_phrases, get_matcher, match_terms
+from app.services.sections import OTHER
 from app.services.single_doc_narrative import build_single_doc_narrative
 
 
@@ -57,69 +62,111 @@ def _pick_metric(
     return None, None, []
 
 
-def _rank_chunks_by_keywords(chunks, keywords: List[str], top_k: int = 3):
+def _keyword_scores(
+    chunks,
+    keywords: List[str],
+    top_k: int,
+    index: Optional[ChunkIndex] = None,
+    sections: Optional[Sequence[str]] = None,
+) -> List[Tuple[int, float]]:
+    """
+    [(chunk number, score)] best first:
+      score = BM25 over keyword phrases + small bonus if keyword appears early
+    index: the chunks' ChunkIndex (e.g. from chunk_index.get_upload_index); without one,
+    every chunk is scanned for the keywords (per keyword for a few, else with the
+    phrase matcher in one pass for all of them).
+    sections: only rank chunks whose meta "section" is one of these.
     """
-    Simple lexical ranking:
-      score = sum(keyword occurrences) + small bonus if keyword appears early
+    if index is not None and len(index) == len(chunks):
+        return index.search(keywords, top_k=top_k, sections=sections)
+
+    phrases = list(dict.fromkeys(keywords))
+    if len(phrases) >= AUTOMATON_MIN_PHRASES:
+        scan = get_matcher(phrases).scan_terms
+    else:
+        scan = partial(count_phrases, phrases=phrases)
+
+    hits: Dict[str, Dict[int, Tuple[int, int]]] = {kw: {} for kw in phrases}
+    doc_lens: List[int] = []
+    widths: List[float] = []
+    for doc, c in enumerate(chunks):
+        text = c.text
+        terms = match_terms(text)
+        for kw, found in scan(terms).items():
+            hits[kw][doc] = found
+        doc_lens.append(len(terms))
+        widths.append(term_width(text, len(terms)))
+    allowed = None if sections is None else _in_sections(chunks, sections)
+    return bm25_rank([hits[kw] for kw in keywords], doc_lens, widths, top_k, allowed)
+
+
+def _in_sections(chunks, sections: Sequence[str]) -> set:
+    return {i for i, c in enumerate(chunks) if c.meta.get("section", OTHER) in sections}
+
+
+def _rank_chunks_by_keywords(
+    chunks,
+    keywords: List[str],
+    top_k: int = 3,
+    index: Optional[ChunkIndex] = None,
+    sections: Optional[Sequence[str]] = None,
+):
     """
-    if not keywords:
-        return chunks[:top_k]
-
-    kws = [_normalize(k) for k in keywords]
-
-    scored = []
-    for c in chunks:
-        text = _normalize(c.text)
-        score = 0.0
-        for kw in kws:
-            count = text.count(kw)
-            if count:
-                score += count * 10
-                first = text.find(kw)
-                if first >= 0:
-                    score += max(0, 5 - (first / 500))  # small early-appearance bonus
-        if score > 0:
-            scored.append((score, c))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    if scored:
-        return [c for _, c in scored[:top_k]]
+    Lexical ranking (see _keyword_scores); the first chunks (of those sections) when nothing matches.
+    """
+    ranked = _keyword_scores(chunks, keywords, top_k, index, sections) if keywords else []
+    if ranked:
+        return [chunks[i] for i, _ in ranked]
+    if sections is not None:
+        return [chunks[i] for i in sorted(_in_sections(chunks, sections))[:top_k]]
     return chunks[:top_k]
 
 
-def answer_numbers_first(
-    *,
-    upload_id: str,
+# candidates taken from each ranking before fusion
+_HYBRID_CANDIDATES = 20
+
+
+def _rank_chunks_hybrid(
+    chunks,
     question: str,
-    metrics: Dict[str, Any],
-    pages: List[Dict[str, Any]],
-    max_tokens: int = 700,
-    overlap_tokens: int = 120,
-) -> Dict[str, Any]:
+    keywords: List[str],
+    top_k: int = 3,
+    index: Optional[ChunkIndex] = None,
+    vectors: Optional[VectorIndex] = None,
+):
     """
-    Returns an answer payload with:
-      - computed values (numbers-first)
-      - citations from best-matching chunks
-      - narrative answer (Step 12B)
+    Keyword ranking fused (reciprocal rank fusion) with dense retrieval on the question,
+    so paraphrased questions ("bottom line", "earnings") still find the right chunks.
+    vectors: the chunks' VectorIndex (embeddings.get_upload_vectors); built here if omitted.
     """
-    metric_key, metric_value, keywords = _pick_metric(question, metrics)
+    lexical = _keyword_scores(chunks, keywords, _HYBRID_CANDIDATES, index) if keywords else []
+    if vectors is None or len(vectors) != len(chunks):
+        vectors = VectorIndex.build(chunks)
+    dense = vectors.search(question, top_k=_HYBRID_CANDIDATES)
+    return _fused_chunks(chunks, lexical, dense, top_k)
 
-    chunks = chunk_pages(
-        upload_id=upload_id,
-        pages=pages,
-        max_tokens=max_tokens,
-        overlap_tokens=overlap_tokens,
-        meta={"source": "10q_pdf"},
-    )
 
-    best = _rank_chunks_by_keywords(chunks, keywords, top_k=3)
+def _fused_chunks(chunks, lexical, dense, top_k: int):
+    fused = fuse_rankings([lexical, dense], top_k)
+    if fused:
+        return [chunks[i] for i in fused]
+    return chunks[:top_k]
+
 
+def _numbers_first_payload(
+    upload_id: str,
+    question: str,
+    metrics: Dict[str, Any],
+    metric_key: Optional[str],
+    metric_value: Optional[float],
+    best: List[Chunk],
+) -> Dict[str, Any]:
     citations: List[Dict[str, Any]] = [
         {
             "chunk_id": c.chunk_id,
             "page_start": c.page_start,
             "page_end": c.page_end,
-            "text_preview": c.text[:300],
+            "text_preview": c.preview(300),
         }
         for c in best
     ]
@@ -154,6 +201,95 @@ def answer_numbers_first(
     }
 
 
+def answer_numbers_first(
+    *,
+    upload_id: str,
+    question: str,
+    metrics: Dict[str, Any],
+    pages: List[Dict[str, Any]],
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    chunks: Optional[List[Chunk]] = None,
+    index: Optional[ChunkIndex] = None,
+    vectors: Optional[VectorIndex] = None,
+) -> Dict[str, Any]:
+    """
+    Returns an answer payload with:
+      - computed values (numbers-first)
+      - citations from best-matching chunks
+      - narrative answer (Step 12B)
+
+    chunks: precomputed chunks of pages (e.g. from chunk_store.get_upload_chunks); chunked here if omitted.
+    index: the chunks' ChunkIndex (chunk_index.get_upload_index); built here if omitted.
+    vectors: the chunks' VectorIndex (embeddings.get_upload_vectors); built here if omitted.
+    """
+    metric_key, metric_value, keywords = _pick_metric(question, metrics)
+
+    if chunks is None:
+        chunks = chunk_pages(
+            upload_id=upload_id,
+            pages=pages,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            meta={"source": "10q_pdf"},
+        )
+
+    best = _rank_chunks_hybrid(chunks, question, keywords, top_k=3, index=index, vectors=vectors)
+    return _numbers_first_payload(upload_id, question, metrics, metric_key, metric_value, best)
+
+
+def answer_numbers_first_many(
+    *,
+    upload_id: str,
+    questions: List[str],
+    metrics: Dict[str, Any],
+    pages: List[Dict[str, Any]],
+    max_tokens: int = 700,
+    overlap_tokens: int = 120,
+    chunks: Optional[List[Chunk]] = None,
+    index: Optional[ChunkIndex] = None,
+    vectors: Optional[VectorIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    answer_numbers_first for many questions about one upload, in one pass:
+    chunks, index and vectors are built (if omitted) once, every question is embedded
+    and scored in one matrix product, and questions that map to the same keywords
+    share one lexical ranking. Results are in question order.
+    """
+    if chunks is None:
+        chunks = chunk_pages(
+            upload_id=upload_id,
+            pages=pages,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            meta={"source": "10q_pdf"},
+        )
+    if index is None or len(index) != len(chunks):
+        index = ChunkIndex.build(chunks)
+    if vectors is None or len(vectors) != len(chunks):
+        vectors = VectorIndex.build(chunks)
+
+    picked = [_pick_metric(q, metrics) for q in questions]
+    dense = vectors.search_many(questions, top_k=_HYBRID_CANDIDATES)
+    lexical: Dict[Tuple[str, ...], List[Tuple[int, float]]] = {}
+    for _, _, keywords in picked:
+        key = tuple(keywords)
+        if key and key not in lexical:
+            lexical[key] = _keyword_scores(chunks, keywords, _HYBRID_CANDIDATES, index)
+
+    return [
+        _numbers_first_payload(
+            upload_id,
+            question,
+            metrics,
+            metric_key,
+            metric_value,
+            _fused_chunks(chunks, lexical.get(tuple(keywords), []), ranked, 3),
+        )
+        for question, (metric_key, metric_value, keywords), ranked in zip(questions, picked, dense)
+    ]
+
+
 def build_citations_for_keywords(
     *,
     upload_id: str,
@@ -162,19 +298,26 @@ def build_citations_for_keywords(
     max_tokens: int = 700,
     overlap_tokens: int = 120,
     top_k: int = 3,
+    chunks: Optional[List[Chunk]] = None,
+    index: Optional[ChunkIndex] = None,
+    sections: Optional[Sequence[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Utility helper for other services/endpoints to fetch top citations
     given a set of keywords (lexical ranking over chunks).
+    chunks: precomputed chunks of pages; chunked here if omitted.
+    index: the chunks' ChunkIndex; built here if omitted.
+    sections: only cite chunks classified into these sections (app.services.sections).
     """
-    chunks = chunk_pages(
-        upload_id=upload_id,
-        pages=pages,
-        max_tokens=max_tokens,
-        overlap_tokens=overlap_tokens,
-        meta={"source": "10q_pdf"},
-    )
-    best = _rank_chunks_by_keywords(chunks, keywords, top_k=top_k)
+    if chunks is None:
+        chunks = chunk_pages(
+            upload_id=upload_id,
+            pages=pages,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            meta={"source": "10q_pdf"},
+        )
+    best = _rank_chunks_by_keywords(chunks, keywords, top_k=top_k, index=index, sections=sections)
 
     return [
         {
@@ -182,7 +325,7 @@ def build_citations_for_keywords(
             "chunk_id": c.chunk_id,
             "page_start": c.page_start,
             "page_end": c.page_end,
-            "text_preview": c.text[:300],
+            "text_preview": c.preview(300),
         }
         for c in best
     ]
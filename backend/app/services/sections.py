@@ -0,0 +1,162 @@
+"""
+Which part of a filing a piece of text belongs to: the statement of operations,
+balance sheet, cash flow statement, statement of shareholders' equity, the notes,
+or other (MD&A, risk factors, cover pages...).
+
+Text is scored against every section's phrases on whole terms (match_terms, as
+keywords are matched in qa), so "current liabilities" doesn't count inside
+"noncurrent liabilities": statement headers count HEADER_WEIGHT per occurrence,
+line items 1. Only phrases whose longest word occurs in the lowercased text are
+matched, and text without any such phrase isn't split into terms. The chunker
+scores each page once, and stores the best section of a chunk's summed scores
+(at least MIN_SCORE, else "other") in the chunk's meta as "section".
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+from app.services.matcher import AUTOMATON_MIN_PHRASES, count_phrases, get_matcher, match_terms
+
+OPERATIONS = "operations"
+BALANCE_SHEET = "balance_sheet"
+CASH_FLOW = "cash_flow"
+EQUITY = "equity"
+NOTES = "notes"
+OTHER = "other"
+
+SECTIONS = (OPERATIONS, BALANCE_SHEET, CASH_FLOW, EQUITY, NOTES, OTHER)
+
+HEADER_WEIGHT = 10
+MIN_SCORE = 2
+
+# (headers, line items) per section; ties go to the earlier section
+_MARKERS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    OPERATIONS: (
+        (
+            "statements of operations",
+            "statements of income",
+            "income statements",
+            "statements of comprehensive income",
+        ),
+        (
+            "total net sales",
+            "cost of sales",
+            "gross margin",
+            "operating income",
+            "total operating expenses",
+            "other income/(expense), net",
+            "provision for income taxes",
+            "income before provision for income taxes",
+            "income before income taxes",
+            "earnings per share",
+        ),
+    ),
+    BALANCE_SHEET: (
+        (
+            "balance sheet",  # also matches "balance sheets"
+            "statements of financial position",
+        ),
+        (
+            "liabilities and shareholders",
+            "total assets",
+            "total liabilities",
+            "total current assets",
+            "current liabilities",
+            "accounts payable",
+            "deferred revenue",
+            "commercial paper",
+            "accounts receivable, net",
+            "inventories",
+        ),
+    ),
+    CASH_FLOW: (
+        (
+            "statements of cash flows",
+            "cash flow statements",
+        ),
+        (
+            "cash generated",
+            "cash used",
+            "operating activities",
+            "investing activities",
+            "financing activities",
+            "payments for",
+            "net cash",
+            "cash, cash equivalents, and restricted cash",
+        ),
+    ),
+    EQUITY: (
+        (
+            "statements of shareholders’ equity",
+            "statements of shareholders' equity",
+            "statements of stockholders’ equity",
+            "statements of stockholders' equity",
+            "statements of changes in equity",
+        ),
+        (
+            "beginning balances",
+            "ending balances",
+            "dividends and dividend equivalents declared",
+            "common stock repurchased",
+            "total shareholders’ equity",
+            "total shareholders' equity",
+        ),
+    ),
+    NOTES: (
+        (
+            "notes to condensed consolidated financial statements",
+            "notes to consolidated financial statements",
+            "summary of significant accounting policies",
+        ),
+        (
+            "the following table shows",
+            "the following table summarizes",
+            "fair value",
+            "accounting standards",
+        ),
+    ),
+}
+
+# (phrase, section number, weight)
+_PHRASES: List[Tuple[str, int, int]] = [
+    (phrase, i, weight)
+    for i, section in enumerate(SECTIONS[:-1])
+    for group, weight in zip(_MARKERS[section], (HEADER_WEIGHT, 1))
+    for phrase in group
+]
+_PHRASE_TEXTS = tuple(phrase for phrase, _, _ in _PHRASES)
+# (phrase, a word every occurrence of the phrase contains)
+_KEYS: List[Tuple[str, str]] = [
+    (phrase, max((t for t in match_terms(phrase) if t[0].isalnum()), key=len)) for phrase in _PHRASE_TEXTS
+]
+
+
+def section_scores(text: str) -> List[float]:
+    """
+    Score per section (in SECTIONS order, "other" always 0) for one piece of text.
+    """
+    scores = [0.0] * len(SECTIONS)
+    low = text.lower()
+    candidates = [phrase for phrase, key in _KEYS if key in low]
+    if not candidates:
+        return scores
+    terms = match_terms(text)
+    if len(candidates) >= AUTOMATON_MIN_PHRASES:
+        found = get_matcher(_PHRASE_TEXTS).scan_terms(terms)
+    else:
+        found = count_phrases(terms, candidates)
+    for phrase, i, weight in _PHRASES:
+        hit = found.get(phrase)
+        if hit:
+            scores[i] += weight * hit[0]
+    return scores
+
+
+def pick_section(scores: Iterable[float]) -> str:
+    scores = list(scores)
+    best = max(range(len(scores)), key=lambda i: (scores[i], -i))
+    return SECTIONS[best] if scores[best] >= MIN_SCORE else OTHER
+
+
+def classify_text(text: str) -> str:
+    return pick_section(section_scores(text))
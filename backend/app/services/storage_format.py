@@ -0,0 +1,118 @@
+"""
+On-disk encoding for stored artifacts (extracted pages, metrics, variance, chunks).
+
+Format v1:
+  - uncompressed: compact JSON (no indentation) -- still plain JSON, so any JSON reader works
+  - compressed:   b"FRAS" | version (1 byte) | codec (1 byte) | compressed compact JSON
+
+Readers also accept the legacy pretty-printed JSON files written before v1.
+
+orjson is used for encoding/decoding when installed; zstandard enables the "zstd" codec
+(falls back to gzip when it isn't installed).
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+try:  # optional fast JSON
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+try:  # optional zstd codec
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+
+FORMAT_MAGIC = b"FRAS"
+FORMAT_VERSION = 1
+
+_CODEC_IDS = {"none": 0, "gzip": 1, "zstd": 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+
+
+def encode_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def resolve_codec(codec: str) -> str:
+    if codec not in _CODEC_IDS:
+        raise ValueError(f"Unknown storage codec: {codec}")
+    if codec == "zstd" and zstandard is None:
+        return "gzip"
+    return codec
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Artifact is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def dumps_artifact(obj: Any, codec: str = "none") -> bytes:
+    codec = resolve_codec(codec)
+    payload = encode_json(obj)
+    if codec == "none":
+        return payload
+    header = FORMAT_MAGIC + bytes([FORMAT_VERSION, _CODEC_IDS[codec]])
+    return header + _compress(codec, payload)
+
+
+def loads_artifact(data: bytes) -> Any:
+    if not data.startswith(FORMAT_MAGIC):
+        return decode_json(data)  # v1 uncompressed or legacy pretty JSON
+
+    if len(data) < len(FORMAT_MAGIC) + 2:
+        raise ValueError("Truncated artifact header")
+    version = data[len(FORMAT_MAGIC)]
+    codec_id = data[len(FORMAT_MAGIC) + 1]
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {version}")
+    if codec_id not in _CODEC_NAMES:
+        raise ValueError(f"Unknown artifact codec id {codec_id}")
+    return decode_json(_decompress(_CODEC_NAMES[codec_id], data[len(FORMAT_MAGIC) + 2:]))
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> Path:
+    """
+    Writes atomically (temp file + rename) so readers never see a half-written artifact.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return path
+
+
+def write_artifact(path: Path, obj: Any, codec: str = "none") -> Path:
+    return write_bytes_atomic(path, dumps_artifact(obj, codec))
+
+
+def read_artifact(path: Path) -> Any:
+    return loads_artifact(path.read_bytes())
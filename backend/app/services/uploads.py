@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+try:  # cross-process lock for stats.json (batch ingest runs in a process pool)
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+if TYPE_CHECKING:
+    from app.services.artifact_store import ArtifactStore
+
+# 1 MiB blocks keep peak memory per upload flat regardless of file size.
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+def upload_path(upload_dir: str | Path, upload_id: str) -> Path:
+    return Path(upload_dir) / f"{upload_id}.pdf"
+
+
+async def stream_upload_to_disk(
+    read: Callable[[int], Awaitable[bytes]],
+    out_path: Path,
+    *,
+    max_bytes: int,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Tuple[int, str]:
+    """
+    Streams an upload to disk in fixed-size blocks.
+
+    - the size limit is enforced as bytes arrive (nothing past max_bytes is written)
+    - a running SHA-256 is computed over the same blocks
+    - data lands in a ".part" file that is renamed only on success,
+      and removed on any failure (limit hit, client abort, disk error)
+
+    Returns: (size_bytes, sha256_hex)
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = out_path.with_name(out_path.name + ".part")
+
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with part_path.open("wb") as f:
+            while True:
+                block = await read(block_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds limit of {max_bytes} bytes")
+                digest.update(block)
+                f.write(block)
+        part_path.replace(out_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+
+    return size, digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed dedup: sha256 -> upload_id, kept by the artifact store
+# ---------------------------------------------------------------------------
+
+_stats_lock = threading.Lock()
+
+
+def upload_stats_path(upload_dir: str | Path) -> Path:
+    return Path(upload_dir) / "stats.json"
+
+
+def find_existing_upload(store: "ArtifactStore", upload_dir: str | Path, sha256: str) -> Optional[str]:
+    """
+    Returns the upload_id previously stored for these bytes, if its PDF still exists.
+    """
+    upload_id = store.find_upload_by_hash(sha256)
+    if not upload_id or not upload_path(upload_dir, upload_id).exists():
+        return None
+    return upload_id
+
+
+def load_upload_stats(upload_dir: str | Path) -> Dict[str, Any]:
+    path = upload_stats_path(upload_dir)
+    stats = {"uploads": 0, "dedup_hits": 0}
+    if path.exists():
+        try:
+            stats.update(json.loads(path.read_text(encoding="utf-8")))
+        except ValueError:
+            pass
+    uploads = stats["uploads"]
+    stats["unique_uploads"] = uploads - stats["dedup_hits"]
+    stats["dedup_hit_rate"] = round(stats["dedup_hits"] / uploads, 4) if uploads else 0.0
+    return stats
+
+
+@contextmanager
+def _stats_locked(upload_dir: str | Path) -> Iterator[None]:
+    root = Path(upload_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    with _stats_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(root / ".stats.lock", "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def record_upload(upload_dir: str | Path, *, deduplicated: bool) -> None:
+    with _stats_locked(upload_dir):
+        stats = load_upload_stats(upload_dir)
+        stats["uploads"] += 1
+        if deduplicated:
+            stats["dedup_hits"] += 1
+        path = upload_stats_path(upload_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps({"uploads": stats["uploads"], "dedup_hits": stats["dedup_hits"]}),
+            encoding="utf-8",
+        )
+
+
+def hash_file(path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE) -> Tuple[int, str]:
+    """
+    (size_bytes, sha256_hex) of a local file, read in fixed-size blocks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with Path(path).open("rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            size += len(block)
+            digest.update(block)
+    return size, digest.hexdigest()
+
+
+def copy_file_to_uploads(src: str | Path, upload_dir: str | Path, upload_id: str) -> Path:
+    """
+    Copies a local PDF into the upload dir (same .part-then-rename discipline as HTTP uploads).
+    """
+    out_path = upload_path(upload_dir, upload_id)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = out_path.with_name(out_path.name + ".part")
+    try:
+        with Path(src).open("rb") as fin, part_path.open("wb") as fout:
+            while True:
+                block = fin.read(DEFAULT_BLOCK_SIZE)
+                if not block:
+                    break
+                fout.write(block)
+        part_path.replace(out_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    return out_path
@@ -10,3 +10,55 @@ def client():
     Pytest will auto-discover this fixture.
     """
     return TestClient(app)
+
+
+def build_pdf(pages):
+    """
+    Builds a minimal text PDF (one Helvetica text block per page).
+    Lines within a page are separated by "\\n".
+    """
+    objs = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objs.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objs.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for i, text in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "72 740 Td"]
+        for line in text.split("\n"):
+            esc = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({esc}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objs.append(
+            (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+            ).encode()
+        )
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture()
+def make_pdf(tmp_path):
+    """
+    Writes a text PDF built from a list of page strings and returns its path.
+    """
+    def _make(pages, name="report.pdf"):
+        path = tmp_path / name
+        path.write_bytes(build_pdf(pages))
+        return path
+
+    return _make
@@ -0,0 +1,63 @@
+import json
+import os
+
+from app.core.config import settings
+from app.services.artifact_cache import ArtifactCache, get_artifact_cache
+from app.services.metrics_store import load_metrics, metrics_path, save_metrics
+from app.services.parsing import load_extracted_pages, save_extracted_pages
+
+
+def test_repeated_loads_hit_the_cache(tmp_path):
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Net income 5"}])
+    before = get_artifact_cache().stats()
+
+    first = load_extracted_pages(tmp_path, "u1")
+    second = load_extracted_pages(tmp_path, "u1")
+
+    after = get_artifact_cache().stats()
+    assert second is first
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+def test_save_invalidates_cached_copy(tmp_path):
+    save_metrics(str(tmp_path), "u1", {"metrics": {"net_income": 1.0}})
+    assert load_metrics(str(tmp_path), "u1")["metrics"]["net_income"] == 1.0
+
+    save_metrics(str(tmp_path), "u1", {"metrics": {"net_income": 2.0}})
+    assert load_metrics(str(tmp_path), "u1")["metrics"]["net_income"] == 2.0
+
+
+def test_out_of_process_rewrite_is_detected_by_stamp(tmp_path):
+    save_metrics(str(tmp_path), "u1", {"metrics": {"net_income": 1.0}})
+    load_metrics(str(tmp_path), "u1")
+
+    # another worker rewrites the file without going through this process's save_metrics
+    path = metrics_path(str(tmp_path), "u1")
+    path.write_text(json.dumps({"metrics": {"net_income": 3.0}}), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert load_metrics(str(tmp_path), "u1")["metrics"]["net_income"] == 3.0
+
+
+def test_eviction_is_by_memory_budget():
+    cache = ArtifactCache(max_bytes=10_000)
+    for i in range(5):
+        cache.get_or_load(("k", i), 1, lambda: "x" * 3_000)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 10_000
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 2
+    # least recently used went first
+    loads = []
+    cache.get_or_load(("k", 0), 1, lambda: loads.append(0) or "x")
+    assert loads == [0]
+
+
+def test_cache_stats_endpoint(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    r = client.get("/stats/cache")
+    assert r.status_code == 200
+    assert {"hits", "misses", "evictions", "bytes", "max_bytes", "hit_rate"} <= set(r.json())
@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+
+from app.core.config import settings
+from app.services.artifact_store import FileArtifactStore, SQLiteArtifactStore, get_store, sqlite_path
+from app.services.metrics import detect_fiscal_period
+
+PAGES = [{"page": 1, "text": "Net sales 1,234"}, {"page": 2, "text": "", "backend": "pdfplumber", "error": "bad"}]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        yield FileArtifactStore(tmp_path)
+        return
+    s = SQLiteArtifactStore(tmp_path / "artifacts.db")
+    yield s
+    s.close()
+
+
+def test_artifacts_roundtrip_in_every_backend(store):
+    store.save_pages("u1", PAGES)
+    store.save_metrics("u1", {"upload_id": "u1", "fiscal_period": "2025-06-28", "metrics": {"revenue": 1.0}})
+    store.save_variance("u1", "u2", {"drivers": []})
+    store.save_chunks("u1", "700_120", [{"chunk_id": "u1::chunk::0", "text": "x"}])
+    store.save_index("u1", "700_120", {"postings": {"x": [[0, [0]]]}})
+    store.save_vectors("u1", "700_120", b"\x00vectors")
+
+    assert store.load_pages("u1") == PAGES
+    assert store.load_metrics("u1")["metrics"] == {"revenue": 1.0}
+    assert store.load_variance("u1", "u2") == {"drivers": []}
+    assert store.load_chunks("u1", "700_120")[0]["chunk_id"] == "u1::chunk::0"
+    assert store.load_index("u1", "700_120") == {"postings": {"x": [[0, [0]]]}}
+    assert store.load_vectors("u1", "700_120") == b"\x00vectors"
+    assert store.has_pages("u1") and store.has_metrics("u1")
+    assert not store.has_pages("missing") and not store.has_metrics("missing")
+
+    with pytest.raises(FileNotFoundError):
+        store.load_metrics("missing")
+    with pytest.raises(FileNotFoundError):
+        store.load_pages("missing")
+    with pytest.raises(FileNotFoundError):
+        store.load_vectors("missing", "700_120")
+
+
+def test_list_uploads_filters_by_fiscal_period(store):
+    store.register_upload("a", "hash-a", 10)
+    store.save_metrics("a", {"fiscal_period": "2025-06-28", "metrics": {}})
+    store.save_metrics("b", {"fiscal_period": "2024-06-29", "metrics": {}})
+
+    assert store.list_uploads() == [
+        {"upload_id": "a", "fiscal_period": "2025-06-28", "sha256": "hash-a"},
+        {"upload_id": "b", "fiscal_period": "2024-06-29", "sha256": None},
+    ]
+
+    assert [u["upload_id"] for u in store.list_uploads()] == ["a", "b"]
+    assert [u["upload_id"] for u in store.list_uploads("2024-06-29")] == ["b"]
+
+
+def test_find_upload_by_hash_returns_latest_registration(store):
+    assert store.find_upload_by_hash("abc") is None
+    store.register_upload("u1", "abc", 10)
+    assert store.find_upload_by_hash("abc") == "u1"
+    store.register_upload("u2", "abc", 10)  # u1's PDF was gone, so the bytes were stored again
+    assert store.find_upload_by_hash("abc") == "u2"
+    assert store.find_upload_by_hash("def") is None
+
+
+def test_sqlite_store_uses_wal_and_indexes(tmp_path):
+    store = SQLiteArtifactStore(tmp_path / "artifacts.db")
+    store.register_upload("u1", "abc", 10)
+    assert store.find_upload_by_hash("abc") == "u1"
+    store.close()
+
+    conn = sqlite3.connect(tmp_path / "artifacts.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_uploads_sha256", "idx_metrics_fiscal_period"} <= indexes
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT upload_id FROM metrics WHERE fiscal_period = ?", ("x",)).fetchall()
+    assert "idx_metrics_fiscal_period" in str(plan)
+
+
+def test_detect_fiscal_period():
+    pages = [{"page": 1, "text": "FORM 10-Q\nFor the quarterly period ended June 28, 2025\nOR"}]
+    assert detect_fiscal_period(pages) == "2025-06-28"
+    assert detect_fiscal_period([{"page": 1, "text": "no dates here"}]) is None
+
+
+def test_pipeline_runs_on_sqlite_backend(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "storage_backend", "sqlite")
+
+    pdf = make_pdf(["For the quarterly period ended March 29, 2025\nNet sales 123,456\nNet income 7,890"])
+    r = client.post("/ingest", files={"file": ("a.pdf", pdf.read_bytes(), "application/pdf")})
+    assert r.status_code == 200
+    upload_id = r.json()["upload_id"]
+
+    assert not (tmp_path / "metrics").exists()
+    assert get_store(tmp_path).load_metrics(upload_id)["fiscal_period"] == "2025-03-29"
+    assert sqlite_path(tmp_path).exists()
+
+    listed = client.get("/uploads", params={"fiscal_period": "2025-03-29"}).json()["uploads"]
+    assert [u["upload_id"] for u in listed] == [upload_id]
+
+    ask = client.post(f"/ask/{upload_id}", json={"question": "What is net income?"})
+    assert ask.json()["computed"]["net_income"] == 7890.0
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from app.api import ask as ask_api
+from app.core.config import settings
+from app.services import llm
+from app.services.metrics_store import save_metrics
+from app.services.parsing import save_extracted_pages
+
+QUESTIONS = ["What is net income?", "What was revenue?", "What was the bottom line?", "Tell me about taxes"]
+
+
+def _setup(tmp_path, upload_id, net_income=200):
+    save_extracted_pages(tmp_path, upload_id, [
+        {"page": 1, "text": "Total net sales 1,000\nNet income was 200 for the period."},
+        {"page": 2, "text": "Provision for income taxes 40"},
+    ])
+    metrics = {"revenue": 1000, "gross_profit": 600, "operating_income": 300, "net_income": net_income}
+    save_metrics(tmp_path, upload_id, {"upload_id": upload_id, "metrics": metrics})
+
+
+def test_batch_matches_single_asks_and_loads_once(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    _setup(tmp_path, "u1")
+
+    loads = []
+    real = ask_api.load_extracted_pages
+    monkeypatch.setattr(ask_api, "load_extracted_pages", lambda *a: loads.append(a) or real(*a))
+
+    r = client.post("/ask/u1/batch", json={"questions": QUESTIONS})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == len(QUESTIONS)
+    assert len(loads) == 1
+
+    for question, result in zip(QUESTIONS, data["results"]):
+        single = client.post("/ask/u1", json={"question": question}).json()
+        assert result == single
+    assert data["results"][0]["computed"] == {"net_income": 200.0}
+
+
+def test_batch_compare_fans_out_llm_calls(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    _setup(tmp_path, "b", net_income=200)
+    _setup(tmp_path, "c", net_income=120)
+
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def fake_explain(*, variance, question, client=None):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        if question == "boom":
+            raise RuntimeError("LLM down")
+        return f"analysis: {question}"
+
+    monkeypatch.setattr(llm, "_get_client", lambda: object())
+    monkeypatch.setattr(llm, "explain_variance", fake_explain)
+
+    questions = ["Why did net income change?", "boom", "What drove margins?"]
+    r = client.post("/ask/b/batch", json={"questions": questions, "compare_upload_id": "c"})
+    assert r.status_code == 200
+    results = r.json()["results"]
+
+    assert [x["question"] for x in results] == questions
+    assert results[0]["answer"] == "analysis: Why did net income change?"
+    assert results[1]["llm_analysis"] is None and results[1]["answer"]  # falls back to the narrative
+    assert results[0]["variance"] == results[2]["variance"]
+    assert peak[0] > 1
+
+
+def test_batch_validates_questions(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    assert client.post("/ask/u1/batch", json={"questions": []}).status_code == 422
+    assert client.post("/ask/missing/batch", json={"questions": ["x"]}).status_code == 404
@@ -0,0 +1,91 @@
+from app.services import chunk_index
+from app.services.artifact_cache import get_artifact_cache
+from app.services.chunk_index import ChunkIndex, get_upload_index
+from app.services.matcher import count_phrases, get_matcher, match_terms, tokenize
+from app.services.chunking import Chunk
+from app.services.parsing import save_extracted_pages
+from app.services.qa import build_citations_for_keywords
+
+
+def _chunks(*texts):
+    return [Chunk(f"u::chunk::{i}", "u", i + 1, i + 1, len(t.split()), t) for i, t in enumerate(texts)]
+
+
+def test_phrase_hits_need_consecutive_terms():
+    index = ChunkIndex.build(_chunks(
+        "Other income/(expense), net was 10. Other income/(expense), net",
+        "other income and expense, net",
+        "net income",
+    ))
+
+    assert tokenize("Income/(Expense), net") == ["income", "/", "(", "expense", ")", ",", "net"]
+    assert index.phrase_hits("other income/(expense), net") == {0: (2, 0)}
+    assert set(index.phrase_hits("net")) == {0, 1, 2}
+    assert index.phrase_hits("net sales") == {}
+
+
+
+def test_phrase_hits_count_like_the_matchers_on_repeated_terms():
+    texts = ["net net net", "net net net net and net net", "net"]
+    index = ChunkIndex.build(_chunks(*texts))
+    phrases = ["net net", "net net net"]
+
+    for i, text in enumerate(texts):
+        terms = match_terms(text)
+        expected = count_phrases(terms, phrases)
+        assert get_matcher(phrases).scan_terms(terms) == expected
+        for phrase in phrases:
+            assert index.phrase_hits(phrase).get(i) == expected.get(phrase), (text, phrase)
+    assert index.phrase_hits("net net") == {0: (1, 0), 1: (3, 0)}
+
+def test_search_ranks_by_bm25_and_early_bonus():
+    filler = "lorem ipsum " * 200
+    chunks = _chunks(
+        filler + "provision for income taxes",                  # late, once
+        "provision for income taxes " + filler,                 # early, once
+        "provision for income taxes " * 3 + filler,             # early, three times
+        filler,
+    )
+    ranked = ChunkIndex.build(chunks).search(["provision for income taxes"], top_k=3)
+
+    assert [doc for doc, _ in ranked] == [2, 1, 0]
+    assert ChunkIndex.build(chunks).search(["deferred revenue"]) == []
+
+
+def test_payload_round_trip():
+    index = ChunkIndex.build(_chunks("net income was 5", "net sales"))
+    loaded = ChunkIndex.from_payload(index.to_payload("stamp"))
+    assert loaded.postings == index.postings
+    assert loaded.search(["net income"]) == index.search(["net income"])
+
+
+def test_citations_use_index_and_fall_back_to_first_chunks():
+    chunks = _chunks("intro text", "Net income was 200", "net income again, net income")
+    index = ChunkIndex.build(chunks)
+
+    cites = build_citations_for_keywords(upload_id="u", pages=[], keywords=["net income"], chunks=chunks, index=index)
+    assert [c["chunk_id"] for c in cites] == ["u::chunk::2", "u::chunk::1"]
+
+    cites = build_citations_for_keywords(upload_id="u", pages=[], keywords=["nothing"], chunks=chunks, top_k=2)
+    assert [c["chunk_id"] for c in cites] == ["u::chunk::0", "u::chunk::1"]
+
+
+def test_upload_index_is_persisted_and_rebuilt_on_page_change(tmp_path, monkeypatch):
+    builds = []
+    real = ChunkIndex.build
+
+    def counting(chunks):
+        builds.append(1)
+        return real(chunks)
+
+    monkeypatch.setattr(chunk_index.ChunkIndex, "build", staticmethod(counting))
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Net income was 5"}])
+
+    assert get_upload_index(tmp_path, "u1").phrase_hits("net income") == {0: (1, 0)}
+    get_artifact_cache().clear()  # fresh process: loads the persisted index
+    get_upload_index(tmp_path, "u1")
+    assert len(builds) == 1
+
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Revenue was 7"}])
+    assert get_upload_index(tmp_path, "u1").phrase_hits("net income") == {}
+    assert len(builds) == 2
@@ -0,0 +1,85 @@
+import pytest
+
+from app.services import chunk_store
+from app.services.artifact_cache import get_artifact_cache
+from app.services.chunk_index import get_upload_index
+from app.services.chunk_store import chunks_path, get_upload_chunks, load_chunks
+from app.services.chunking import CHUNKER_VERSION
+from app.services.parsing import save_extracted_pages
+from app.services.tokens import get_token_counter
+
+
+def _count_chunking(monkeypatch):
+    calls = []
+    real = chunk_store.chunk_pages
+
+    def counting(**kwargs):
+        calls.append(kwargs["upload_id"])
+        return real(**kwargs)
+
+    monkeypatch.setattr(chunk_store, "chunk_pages", counting)
+    return calls
+
+
+def test_chunks_are_built_once_and_persisted(tmp_path, monkeypatch):
+    calls = _count_chunking(monkeypatch)
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Net income 5 " * 50}])
+
+    first = get_upload_chunks(tmp_path, "u1")
+    get_artifact_cache().clear()  # fresh process: must come from disk, not re-chunking
+    second = get_upload_chunks(tmp_path, "u1")
+
+    assert calls == ["u1"]
+    assert [c.text for c in second] == [c.text for c in first]
+    path = chunks_path(tmp_path, "u1", 700, 120)
+    assert path.exists() and path.stem.endswith(f"_v{CHUNKER_VERSION}_{get_token_counter().name}")
+    assert load_chunks(tmp_path, "u1", 700, 120)[0].chunk_id == "u1::chunk::0"
+
+
+def test_chunks_rebuild_when_pages_change(tmp_path, monkeypatch):
+    calls = _count_chunking(monkeypatch)
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "old text"}])
+    assert get_upload_chunks(tmp_path, "u1")[0].text == "old text"
+
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "new text"}, {"page": 2, "text": "more"}])
+    assert get_upload_chunks(tmp_path, "u1")[0].text == "new text\nmore"
+    assert len(calls) == 2
+
+
+def test_missing_pages_raise(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        get_upload_chunks(tmp_path, "nope")
+
+
+def test_persisted_chunks_load_back_as_spans(tmp_path):
+    pages = [{"page": 1, "text": "alpha beta " * 30}, {"page": 2, "text": "gamma " * 30}]
+    save_extracted_pages(tmp_path, "u1", pages)
+    built = get_upload_chunks(tmp_path, "u1")
+
+    loaded = load_chunks(tmp_path, "u1", 700, 120)
+    assert loaded == built
+    assert loaded[0].span != (0, 0, 0)
+
+
+def test_chunks_go_to_the_configured_chunks_dir(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "storage_backend", "file")
+    monkeypatch.setattr(settings, "chunks_dir", str(tmp_path / "elsewhere"))
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Net income 5 " * 50}])
+    get_upload_chunks(tmp_path, "u1")
+
+    path = chunks_path(tmp_path, "u1", 700, 120)
+    assert path.parent == tmp_path / "elsewhere" / "u1" and path.exists()
+    assert not (tmp_path / "chunks").exists()
+
+
+def test_only_the_default_chunking_is_persisted(tmp_path, monkeypatch):
+    calls = _count_chunking(monkeypatch)
+    save_extracted_pages(tmp_path, "u1", [{"page": 1, "text": "Net income 5 " * 50}])
+
+    assert get_upload_chunks(tmp_path, "u1", 64, 8) == get_upload_chunks(tmp_path, "u1", 64, 8)
+    assert calls == ["u1"]  # cached in memory...
+    assert not chunks_path(tmp_path, "u1", 64, 8).exists()  # ...but never written
+    get_upload_index(tmp_path, "u1", 64, 8)
+    assert not (tmp_path / "indexes").exists()
@@ -25,3 +25,11 @@ def test_upload_extract_then_chunks(client, tmp_path, monkeypatch):
     assert data["upload_id"] == upload_id
     assert data["chunk_count"] >= 1
     assert "chunks" in data
+
+
+def test_chunks_reject_out_of_range_chunking(client):
+    for query in ("max_tokens=10", "max_tokens=100000", "max_tokens=200&overlap_tokens=200"):
+        r = client.get(f"/uploads/does-not-exist/chunks?{query}")
+        assert r.status_code == 422, query
+    r = client.post("/ask/does-not-exist", json={"question": "revenue?", "max_tokens": 200, "overlap_tokens": 300})
+    assert r.status_code == 422
@@ -0,0 +1,65 @@
+import json
+import os
+
+from app.cli import main
+from app.core.config import settings
+
+
+def test_cli_ingests_directory_and_skips_on_rerun(tmp_path, make_pdf, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "extract_workers", settings.extract_workers)
+    monkeypatch.setattr(settings, "extract_isolated", settings.extract_isolated)
+    monkeypatch.setenv("EXTRACT_WORKERS", "3")
+
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "q1.pdf").write_bytes(make_pdf(["Net sales 100\nNet income 10"], name="a.pdf").read_bytes())
+    (inbox / "q2.pdf").write_bytes(make_pdf(["Net sales 200\nNet income 20", "Notes"], name="b.pdf").read_bytes())
+
+    storage = tmp_path / "storage"
+    argv = [
+        "ingest",
+        str(inbox),
+        "--workers", "1",
+        "--no-isolation",
+        "--storage-dir", str(storage),
+        "--upload-dir", str(storage / "uploads"),
+    ]
+
+    assert main(argv) == 0
+    out = capsys.readouterr().out
+    assert "2 ingested, 0 skipped, 0 failed" in out
+    assert "pages/sec" in out and "docs/sec" in out
+
+    metrics = sorted(
+        json.loads(p.read_text(encoding="utf-8"))["metrics"]["net_income"]
+        for p in (storage / "metrics").glob("*.json")
+    )
+    assert metrics == [10.0, 20.0]
+
+    assert main(argv) == 0
+    assert "0 ingested, 2 skipped" in capsys.readouterr().out
+    assert os.environ["EXTRACT_WORKERS"] == "3"  # the caller's environment is left alone
+
+
+def test_cli_reports_no_matches(tmp_path, capsys):
+    assert main(["ingest", str(tmp_path / "nothing-*.pdf")]) == 2
+
+
+def test_cli_ingests_duplicate_bytes_in_one_batch_once(tmp_path, make_pdf, monkeypatch, capsys):
+    monkeypatch.setattr(settings, "extract_workers", settings.extract_workers)
+    monkeypatch.setattr(settings, "extract_isolated", settings.extract_isolated)
+
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    data = make_pdf(["Net sales 100\nNet income 10"], name="a.pdf").read_bytes()
+    (inbox / "q1.pdf").write_bytes(data)
+    (inbox / "q1-copy.pdf").write_bytes(data)
+
+    storage = tmp_path / "storage"
+    argv = ["ingest", str(inbox), "--workers", "1", "--no-isolation", "--storage-dir", str(storage),
+            "--upload-dir", str(storage / "uploads")]
+    assert main(argv) == 0
+    out = capsys.readouterr().out
+    assert "1 ingested, 1 skipped, 0 failed" in out and "same bytes as" in out
+    assert len(list((storage / "uploads").glob("*.pdf"))) == 1
+    assert json.loads((storage / "uploads" / "stats.json").read_text())["uploads"] == 1
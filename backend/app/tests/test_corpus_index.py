@@ -0,0 +1,96 @@
+from app.core.config import settings
+from app.services import corpus_index
+from app.services.chunk_store import get_upload_chunks, source_fingerprint
+from app.services.chunking import Chunk
+from app.services.corpus_index import add_upload, corpus_stats, load_manifest, search_corpus
+from app.services.parsing import save_extracted_pages
+
+
+def _chunks(upload_id, *texts):
+    return [
+        Chunk(f"{upload_id}::chunk::{i}", upload_id, i + 1, i + 2, len(t.split()), t)
+        for i, t in enumerate(texts)
+    ]
+
+
+def test_search_ranks_chunks_across_uploads(tmp_path):
+    add_upload(tmp_path, "a", _chunks("a", "net sales grew", "We reached a tax settlement with the IRS."))
+    add_upload(tmp_path, "b", _chunks("b", "tax settlement tax settlement reached", "lorem ipsum"))
+    add_upload(tmp_path, "c", _chunks("c", "net income was flat"))
+
+    found = search_corpus(tmp_path, "tax settlement", top_k=5)
+    assert found["uploads"] == 3
+    assert found["chunks"] == 5
+    assert [(h["upload_id"], h["chunk_id"]) for h in found["hits"]] == [("b", "b::chunk::0"), ("a", "a::chunk::1")]
+    assert found["hits"][1]["page_start"] == 2 and found["hits"][1]["page_end"] == 3
+    assert found["hits"][1]["text_preview"] == "We reached a tax settlement with the IRS."
+
+    only_a = search_corpus(tmp_path, "tax settlement", upload_ids=["a"])
+    assert [h["upload_id"] for h in only_a["hits"]] == ["a"]
+    assert search_corpus(tmp_path, "goodwill impairment")["hits"] == []
+    assert search_corpus(tmp_path, "   ")["hits"] == []
+
+
+
+def test_search_matches_terms_like_ask(tmp_path):
+    add_upload(tmp_path, "a", _chunks("a", "We reached a tax settlement with the IRS.", "net sales grew"))
+
+    hits = search_corpus(tmp_path, "tax settlements")["hits"]
+    assert [h["chunk_id"] for h in hits] == ["a::chunk::0"]
+    assert [h["chunk_id"] for h in search_corpus(tmp_path, "Net Sale")["hits"]] == ["a::chunk::1"]
+
+def test_reindexing_replaces_upload_even_across_sealed_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(corpus_index, "SHARD_MAX_UPLOADS", 2)
+    add_upload(tmp_path, "a", _chunks("a", "old litigation reserve"))
+    add_upload(tmp_path, "b", _chunks("b", "net sales"))  # fills and seals shard 0
+    add_upload(tmp_path, "a", _chunks("a", "new tax settlement"))  # lands in shard 1
+
+    manifest = load_manifest(tmp_path)
+    assert [(s["id"], s["sealed"]) for s in manifest["shards"]] == [(0, True), (1, False)]
+    assert manifest["uploads"]["a"]["shard"] == 1
+    assert not list((tmp_path / "corpus" / "shard-00000").glob("seg-*.json"))
+
+    assert search_corpus(tmp_path, "litigation")["hits"] == []
+    assert [h["upload_id"] for h in search_corpus(tmp_path, "settlement")["hits"]] == ["a"]
+    assert corpus_stats(tmp_path) == {"uploads": 2, "chunks": 2, "shards": 2, "sealed_shards": 1}
+
+
+def test_reextracted_uploads_are_left_out_until_reindexed(tmp_path):
+    def index(upload_id, text):
+        save_extracted_pages(tmp_path, upload_id, [{"page": 1, "text": text}])
+        add_upload(tmp_path, upload_id, get_upload_chunks(tmp_path, upload_id), source_fingerprint(tmp_path, upload_id))
+
+    index("a", "The company reached a tax settlement.")
+    index("b", "Another tax settlement was recorded.")
+    assert {h["upload_id"] for h in search_corpus(tmp_path, "settlement")["hits"]} == {"a", "b"}
+
+    save_extracted_pages(tmp_path, "a", [{"page": 1, "text": "Net sales grew."}])  # re-extracted, not re-indexed
+    found = search_corpus(tmp_path, "settlement")
+    assert [h["upload_id"] for h in found["hits"]] == ["b"]
+    assert found["stale_uploads"] == ["a"] and found["uploads"] == 1
+
+    index("a", "Net sales grew.")
+    found = search_corpus(tmp_path, "settlement")
+    assert [h["upload_id"] for h in found["hits"]] == ["b"] and found["stale_uploads"] == []
+    assert [h["upload_id"] for h in search_corpus(tmp_path, "net sales")["hits"]] == ["a"]
+
+
+def test_search_api_after_ingest(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(["Net income 42", "The company reached a tax settlement in 2023."]).read_bytes()
+    upload_id = client.post("/ingest", files={"file": ("a.pdf", pdf, "application/pdf")}).json()["upload_id"]
+
+    r = client.get("/search", params={"q": "tax settlement"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["uploads_searched"] == 1
+    hit = data["results"][0]
+    assert hit["upload_id"] == upload_id
+    assert hit["page_end"] == 2
+    assert "tax settlement" in hit["text_preview"]
+    assert data["stale_uploads"] == []
+
+    assert client.post("/search/index/missing").status_code == 404
+    assert client.post(f"/search/index/{upload_id}").json()["corpus"]["uploads"] == 1
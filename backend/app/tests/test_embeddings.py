@@ -0,0 +1,75 @@
+import numpy as np
+
+from app.services.artifact_cache import get_artifact_cache
+from app.services.chunking import Chunk
+from app.services.embeddings import VectorIndex, expand_query, fuse_rankings, get_upload_vectors
+from app.services.parsing import save_extracted_pages
+from app.services.qa import answer_numbers_first
+
+TEXTS = [
+    "Table of contents. Part I financial information. Item 1 financial statements.",
+    "Total net sales increased due to higher iPhone and services revenue in the quarter.",
+    "Net income was 23,636 compared with 19,881 a year ago; earnings per share rose.",
+    "Net cash generated by operating activities; payments for acquisition of property.",
+    "Provision for income taxes and the effective tax rate for the quarter.",
+]
+
+
+def _chunks(texts=TEXTS):
+    return [Chunk(f"u::chunk::{i}", "u", i + 1, i + 1, len(t.split()), t) for i, t in enumerate(texts)]
+
+
+def test_query_expansion_maps_analyst_phrasing_to_line_items():
+    assert "net income" in expand_query("What was the bottom line?")
+    assert "revenue net sales" in expand_query("How did the top line do")
+    assert expand_query("gross margin") == "gross margin"
+
+
+def test_paraphrased_queries_find_the_matching_chunk():
+    vectors = VectorIndex.build(_chunks())
+
+    assert vectors.search("what was the bottom line this quarter?")[0][0] == 2
+    assert vectors.search("top line growth")[0][0] == 1
+    assert vectors.search("what was the tax bill")[0][0] == 4
+    assert vectors.search("zebra giraffe") == []
+
+
+def test_batched_search_matches_single_queries():
+    vectors = VectorIndex.build(_chunks())
+    queries = ["bottom line", "capex", "revenue"]
+    assert vectors.search_many(queries, top_k=3) == [vectors.search(q, top_k=3) for q in queries]
+
+
+def test_vectors_round_trip_as_float16():
+    vectors = VectorIndex.build(_chunks())
+    loaded = VectorIndex.from_bytes(vectors.to_bytes("stamp"))
+
+    assert VectorIndex.read_meta(vectors.to_bytes("stamp"))["source"] == "stamp"
+    assert loaded.matrix.dtype == np.float32
+    assert np.allclose(loaded.matrix, vectors.matrix, atol=1e-3)
+    assert [d for d, _ in loaded.search("earnings")] == [d for d, _ in vectors.search("earnings")]
+
+
+def test_reciprocal_rank_fusion_prefers_chunks_in_both_rankings():
+    lexical = [(3, 40.0), (1, 12.0), (0, 5.0)]
+    dense = [(1, 0.9), (4, 0.8)]
+    assert fuse_rankings([lexical, dense], top_k=3) == [1, 3, 4]
+    assert fuse_rankings([[], []], top_k=3) == []
+
+
+def test_answer_cites_paraphrase_matches():
+    # "bottom line" isn't a metric trigger, so there are no keywords: citations come from the vectors
+    out = answer_numbers_first(
+        upload_id="u", question="How was the bottom line?", metrics={}, pages=[], chunks=_chunks()
+    )
+    assert out["citations"][0]["chunk_id"] == "u::chunk::2"
+
+
+def test_upload_vectors_are_persisted(tmp_path, monkeypatch):
+    save_extracted_pages(tmp_path, "u1", [{"page": i + 1, "text": t} for i, t in enumerate(TEXTS)])
+    built = get_upload_vectors(tmp_path, "u1")
+
+    get_artifact_cache().clear()
+    monkeypatch.setattr(VectorIndex, "build", classmethod(lambda cls, chunks: 1 / 0))  # must load, not rebuild
+    loaded = get_upload_vectors(tmp_path, "u1")
+    assert loaded.matrix.shape == built.matrix.shape
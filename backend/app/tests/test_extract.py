@@ -19,3 +19,70 @@ def test_upload_then_extract(client, tmp_path, monkeypatch):
 
     ex = client.post(f"/extract/{upload_id}")
     assert ex.status_code == 200
+
+
+def test_extract_reports_backend_summary(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(["Net sales 1,234", "Net income 56"]).read_bytes()
+    up = client.post("/upload", files={"file": ("a.pdf", pdf, "application/pdf")})
+    upload_id = up.json()["upload_id"]
+
+    ex = client.post(f"/extract/{upload_id}")
+    assert ex.status_code == 200
+    data = ex.json()
+    assert data["num_pages"] == 2
+    assert data["extraction"]["backend"] == settings.extract_backend
+    assert data["extraction"]["fallback_pages"] == 0
+
+
+def test_extract_statements_first_returns_metrics_then_completes(client, tmp_path, monkeypatch, make_pdf):
+    import time
+
+    from app.services.parsing import load_extracted_pages
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(
+        [
+            "Cover page",
+            "CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS\nTotal net sales 1,000\nNet income 200",
+            "Risk factors and exhibits",
+        ]
+    ).read_bytes()
+    upload_id = client.post("/upload", files={"file": ("a.pdf", pdf, "application/pdf")}).json()["upload_id"]
+
+    ex = client.post(f"/extract/{upload_id}?statements_first=true")
+    assert ex.status_code == 200
+    data = ex.json()
+    assert data["statement_pages"] == [2]
+    assert data["remaining_pages"] == [1, 3]
+    assert data["metrics"]["net_income"] == 200.0
+
+    job_id = data["remaining_job"]["job_id"]
+    deadline = time.time() + 10
+    while client.get(f"/jobs/{job_id}").json()["status"] not in ("succeeded", "failed"):
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+    pages = load_extracted_pages(tmp_path, upload_id)
+    assert [p["page"] for p in pages] == [1, 2, 3]
+    assert pages[2]["text"] == "Risk factors and exhibits"
+
+    assert client.post(f"/extract/{upload_id}?statements_first=true&background=true").status_code == 422
+
+
+def test_statements_first_failed_extraction_leaves_every_page_remaining(tmp_path, monkeypatch, make_pdf):
+    from app.services import pipeline
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    make_pdf(["Cover page", "STATEMENTS OF OPERATIONS\nNet income 200", "Notes"], name="uploads/u1.pdf")
+    # every backend failed: extract_pages hands back the empty page-1 placeholder
+    monkeypatch.setattr(pipeline, "extract_pages", lambda *a, **k: ([{"page": 1, "text": ""}], {}))
+
+    data = pipeline.run_statements_first(str(tmp_path), str(uploads), "u1")
+    assert data["statement_pages"] == [2]
+    assert data["remaining_pages"] == [1, 2, 3]
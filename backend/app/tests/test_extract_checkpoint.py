@@ -0,0 +1,63 @@
+import pytest
+
+from app.services import pdf_parser
+from app.services.parsing import load_partial_pages, partial_pages_path
+from app.services.pipeline import ExtractionInterruptedError, extract_pages
+
+
+def _flaky_reader(fail_on_page, calls):
+    real = pdf_parser._BACKENDS["pdfplumber"]
+
+    class Reader(real):
+        def page_text(self, n):
+            calls.append(n)
+            if n == fail_on_page:
+                raise RuntimeError("worker died")
+            return super().page_text(n)
+
+    return Reader
+
+
+def test_interrupted_extraction_resumes_from_checkpoint(tmp_path, make_pdf, monkeypatch):
+    pdf_path = make_pdf([f"page {i} text" for i in range(1, 6)])
+    monkeypatch.setattr("app.core.config.settings.extract_workers", 1)
+    monkeypatch.setattr("app.core.config.settings.extract_isolated", False)
+
+    # simulate a crash while page 4 is being parsed (outside per-page error handling)
+    real_iter = pdf_parser._iter_page_range
+
+    def crashing_iter(path, page_numbers, backend):
+        for page in real_iter(path, page_numbers, backend):
+            if page["page"] == 4:
+                raise MemoryError("worker restarted")
+            yield page
+
+    monkeypatch.setattr(pdf_parser, "_iter_page_range", crashing_iter)
+    with pytest.raises(ExtractionInterruptedError) as exc:
+        extract_pages(str(tmp_path), "u1", pdf_path, backend="pdfplumber")
+    assert exc.value.pages_done == 3
+    assert [p["page"] for p in load_partial_pages(tmp_path, "u1")] == [1, 2, 3]
+
+    # retry: only pages 4-5 are parsed again
+    calls = []
+    monkeypatch.setattr(pdf_parser, "_iter_page_range", real_iter)
+    monkeypatch.setitem(pdf_parser._BACKENDS, "pdfplumber", _flaky_reader(None, calls))
+    pages, summary = extract_pages(str(tmp_path), "u1", pdf_path, backend="pdfplumber")
+
+    assert calls == [4, 5]
+    assert [p["page"] for p in pages] == [1, 2, 3, 4, 5]
+    assert summary["resumed_pages"] == 3
+    assert not partial_pages_path(tmp_path, "u1").exists()
+
+
+def test_failed_page_is_recorded_without_failing_document(tmp_path, make_pdf, monkeypatch):
+    pdf_path = make_pdf(["page 1", "page 2", "page 3"])
+    monkeypatch.setattr("app.core.config.settings.extract_workers", 1)
+    monkeypatch.setattr("app.core.config.settings.extract_isolated", False)
+    monkeypatch.setitem(pdf_parser._BACKENDS, "pdfplumber", _flaky_reader(2, []))
+
+    pages, summary = extract_pages(str(tmp_path), "u2", pdf_path, backend="pdfplumber")
+
+    assert [p["text"] for p in pages] == ["page 1", "", "page 3"]
+    assert "worker died" in pages[1]["error"]
+    assert summary["failed_pages"] == [2]
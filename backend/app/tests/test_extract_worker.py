@@ -0,0 +1,130 @@
+import math
+import os
+import time
+
+import pytest
+
+from app.services.extract_worker import IsolatedExtractor
+from app.services.pdf_parser import PDFParseError, PDFParseMemoryError, PDFParseTimeoutError
+
+
+@pytest.fixture()
+def extractor():
+    ex = IsolatedExtractor(workers=1, timeout_s=30, max_rss_mb=0, max_docs=2)
+    yield ex
+    ex.shutdown()
+
+
+def test_runs_tasks_and_recycles_workers(extractor):
+    assert extractor.run(math.factorial, 5) == 120
+    assert extractor.run(math.factorial, 3) == 6
+    assert extractor.run(math.factorial, 4) == 24
+
+    stats = extractor.stats()
+    assert stats["documents"] == 3
+    assert stats["recycled"] == 1
+    assert stats["started"] == 2
+    assert stats["peak_rss_mb"] > 0
+
+
+def test_task_errors_are_reraised_and_worker_survives(extractor):
+    with pytest.raises(ValueError):
+        extractor.run(int, "not-a-number")
+    assert extractor.run(math.factorial, 3) == 6
+    assert extractor.stats()["kills"] == 0
+
+
+def test_timeout_kills_worker(extractor):
+    with pytest.raises(PDFParseTimeoutError):
+        extractor.run(time.sleep, 10, timeout_s=0.5)
+
+    stats = extractor.stats()
+    assert stats["timeouts"] == 1
+    assert stats["kills"] == 1
+    # a fresh worker takes over
+    assert extractor.run(math.factorial, 3) == 6
+
+
+def test_parser_crash_is_not_a_memory_kill(extractor):
+    with pytest.raises(PDFParseError) as exc:
+        extractor.run(os.abort)  # SIGABRT, like a C parser choking on a malformed PDF
+    assert not isinstance(exc.value, PDFParseMemoryError)
+
+    stats = extractor.stats()
+    assert stats["crashes"] == 1
+    assert stats["memory_kills"] == 0
+    assert extractor.run(math.factorial, 3) == 6
+
+
+def test_rss_cap_kills_worker():
+    ex = IsolatedExtractor(workers=1, timeout_s=30, max_rss_mb=1)
+    try:
+        with pytest.raises(PDFParseMemoryError):
+            ex.run(time.sleep, 10)
+        assert ex.stats()["memory_kills"] == 1
+    finally:
+        ex.shutdown()
+
+
+def test_extract_reports_timeout_as_504(client, tmp_path, monkeypatch, make_pdf):
+    from app.api import extract as extract_api
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    def timed_out(*args, **kwargs):
+        raise PDFParseTimeoutError("extraction timed out after 1s")
+
+    monkeypatch.setattr(extract_api, "run_extraction", timed_out)
+
+    pdf = make_pdf(["Net income 1"]).read_bytes()
+    upload_id = client.post("/upload", files={"file": ("a.pdf", pdf, "application/pdf")}).json()["upload_id"]
+
+    r = client.post(f"/extract/{upload_id}")
+    assert r.status_code == 504
+    assert "timed out" in r.json()["error"]["message"]
+
+
+def test_extract_reports_worker_crash_as_422(client, tmp_path, monkeypatch, make_pdf):
+    from app.api import extract as extract_api
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    def crashed(*args, **kwargs):
+        raise PDFParseError("extraction worker crashed (exit code -11)")
+
+    monkeypatch.setattr(extract_api, "run_extraction", crashed)
+
+    pdf = make_pdf(["Net income 1"]).read_bytes()
+    upload_id = client.post("/upload", files={"file": ("a.pdf", pdf, "application/pdf")}).json()["upload_id"]
+
+    r = client.post(f"/extract/{upload_id}")
+    assert r.status_code == 422
+    assert "crashed" in r.json()["error"]["message"]
+
+
+def test_statements_first_opens_the_pdf_only_in_the_sandbox(tmp_path, monkeypatch, make_pdf):
+    from app.core.config import settings
+    from app.services import pipeline
+
+    class Recorder:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, fn, *args):
+            self.calls.append(fn.__name__)
+            return fn(*args)
+
+    recorder = Recorder()
+    monkeypatch.setattr(settings, "extract_isolated", True)
+    monkeypatch.setattr(pipeline, "get_isolated_extractor", lambda: recorder)
+
+    (tmp_path / "uploads").mkdir()
+    make_pdf(["Cover", "STATEMENTS OF OPERATIONS\nNet income 2"], name="uploads/u1.pdf")
+    data = pipeline.run_statements_first(str(tmp_path), str(tmp_path / "uploads"), "u1")
+
+    assert data["remaining_pages"] == [1]
+    assert recorder.calls == ["locate_statement_pages", "_extract_pages_local", "count_pages"]
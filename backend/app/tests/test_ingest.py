@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.chunk_store import load_chunks
+
+
+def test_ingest_runs_full_pipeline_in_one_request(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(["Net sales 123,456\nNet income 7,890", "Total assets 9,999"]).read_bytes()
+    r = client.post("/ingest", files={"file": ("a.pdf", pdf, "application/pdf")})
+    assert r.status_code == 200
+
+    data = r.json()
+    upload_id = data["upload_id"]
+    assert data["ingested"] is True
+    assert data["num_pages"] == 2
+    assert data["metrics"]["revenue"] == 123456.0
+    assert data["chunk_count"] >= 1
+    for path in data["saved"].values():
+        assert Path(path).exists()
+    assert load_chunks(tmp_path, upload_id, 700, 120)[0].page_start == 1
+
+    ask = client.post(f"/ask/{upload_id}", json={"question": "What is net income?"})
+    assert ask.status_code == 200
+    assert ask.json()["computed"]["net_income"] == 7890.0
+
+
+def test_ingest_same_bytes_reuses_stored_artifacts(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(["Net income 42"]).read_bytes()
+    first = client.post("/ingest", files={"file": ("a.pdf", pdf, "application/pdf")}).json()
+    second = client.post("/ingest", files={"file": ("a.pdf", pdf, "application/pdf")}).json()
+
+    assert second["upload_id"] == first["upload_id"]
+    assert second["ingested"] is False
+    assert second["metrics"]["net_income"] == 42.0
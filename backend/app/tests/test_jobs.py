@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.jobs import FAILED, SUCCEEDED, JobQueueFullError, JobScheduler
+
+
+def _wait_for(client, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_scheduler_runs_higher_priority_first():
+    scheduler = JobScheduler(workers=1, executor="thread")
+    gate = threading.Event()
+    order = []
+
+    scheduler.submit("block", gate.wait)
+    low = scheduler.submit("low", order.append, "low", priority=20)
+    high = scheduler.submit("high", order.append, "high", priority=1)
+    gate.set()
+
+    deadline = time.time() + 5
+    while scheduler.get(low.job_id).status != SUCCEEDED and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.shutdown()
+
+    assert order == ["high", "low"]
+    assert scheduler.get(high.job_id).status == SUCCEEDED
+
+
+def test_scheduler_records_failures_and_rejects_when_full():
+    scheduler = JobScheduler(workers=1, executor="thread", max_queue=1)
+    gate = threading.Event()
+
+    scheduler.submit("block", gate.wait)
+    time.sleep(0.05)  # let the dispatcher pick up the blocking job
+    bad = scheduler.submit("bad", int, "not-a-number")
+    with pytest.raises(JobQueueFullError):
+        scheduler.submit("overflow", int, "1")
+    gate.set()
+
+    deadline = time.time() + 5
+    while scheduler.get(bad.job_id).status != FAILED and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.shutdown()
+
+    assert "ValueError" in scheduler.get(bad.job_id).error
+
+
+def test_background_extract_and_metrics_return_202_and_poll(client, tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf = make_pdf(["Net sales 123,456\nNet income 7,890"]).read_bytes()
+    upload_id = client.post("/upload", files={"file": ("a.pdf", pdf, "application/pdf")}).json()["upload_id"]
+
+    ex = client.post(f"/extract/{upload_id}?background=true")
+    assert ex.status_code == 202
+    assert ex.json()["status"] in ("queued", "running", "succeeded")
+    job = _wait_for(client, ex.json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["result"]["num_pages"] == 1
+
+    m = client.post(f"/metrics/{upload_id}?background=true")
+    assert m.status_code == 202
+    job = _wait_for(client, m.json()["job_id"])
+    assert job["result"]["metrics"]["net_income"] == 7890.0
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
@@ -0,0 +1,81 @@
+import random
+
+from app.services.chunk_index import ChunkIndex
+from app.services.chunking import Chunk
+from app.services.matcher import PhraseMatcher, count_phrases, get_matcher, match_terms
+from app.services.qa import _rank_chunks_by_keywords
+
+
+def _naive_scan(phrases, text):
+    terms = match_terms(text)
+    out = {}
+    for phrase in phrases:
+        p = match_terms(phrase)
+        i, count, first = 0, 0, None
+        while i + len(p) <= len(terms):
+            if terms[i:i + len(p)] == p:
+                count += 1
+                first = i if first is None else first
+                i += len(p)
+            else:
+                i += 1
+        if count:
+            out[phrase] = (count, first)
+    return out
+
+
+def test_finds_overlapping_and_nested_phrases_in_one_pass():
+    phrases = ["income taxes", "provision for income taxes", "for income", "income before provision", "net"]
+    text = "Income before provision for income taxes; provision for income taxes, net"
+
+    assert PhraseMatcher(phrases).scan(text) == {
+        "income before provision": (1, 0),
+        "for income": (2, 3),
+        "income taxes": (2, 4),
+        "provision for income taxes": (2, 2),
+        "net": (1, 12),
+    }
+
+
+def test_matches_naive_scan_on_random_text():
+    rng = random.Random(3)
+    vocab = ["net", "income", "taxes", "for", "provision", "cash", "(", ")", ","]
+    for _ in range(200):
+        phrases = [" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 3))) for _ in range(6)]
+        text = " ".join(rng.choice(vocab) for _ in range(40))
+        expected = _naive_scan(dict.fromkeys(phrases), text)
+        assert PhraseMatcher(phrases).scan(text) == expected
+        assert count_phrases(match_terms(text), phrases) == expected
+
+
+def test_matcher_is_compiled_once_per_phrase_set():
+    assert get_matcher(("net cash", "cash used")) is get_matcher(["net cash", "cash used"])
+    assert get_matcher(("a",)) is not get_matcher(("b",))
+
+
+def test_scan_ranking_matches_index_ranking():
+    rng = random.Random(5)
+    vocab = "net income provision for income taxes operating revenue cash lorem ipsum".split()
+    chunks = [
+        Chunk(f"u::chunk::{i}", "u", 1, 1, 0, " ".join(rng.choice(vocab) for _ in range(rng.randint(5, 80))))
+        for i in range(40)
+    ]
+    keywords = ["provision for income taxes", "net income", "operating", "revenue cash"]
+
+    scanned = _rank_chunks_by_keywords(chunks, keywords, top_k=10)
+    indexed = _rank_chunks_by_keywords(chunks, keywords, top_k=10, index=ChunkIndex.build(chunks))
+    assert [c.chunk_id for c in scanned] == [c.chunk_id for c in indexed]
+
+
+def test_keywords_match_plural_forms():
+    chunks = [
+        Chunk("u::chunk::0", "u", 1, 1, 0, "Products and services overview"),
+        Chunk("u::chunk::1", "u", 2, 2, 0, "Total revenues 1,000\nIncome taxes 40"),
+    ]
+    assert match_terms("Total revenues, business") == ["total", "revenue", ",", "business"]
+
+    for index in (None, ChunkIndex.build(chunks)):
+        ranked = _rank_chunks_by_keywords(chunks, ["revenue"], 1, index=index)
+        assert [c.chunk_id for c in ranked] == ["u::chunk::1"]
+        ranked = _rank_chunks_by_keywords(chunks, ["income taxes", "net sales"], 1, index=index)
+        assert [c.chunk_id for c in ranked] == ["u::chunk::1"]
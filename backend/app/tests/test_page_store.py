@@ -0,0 +1,45 @@
+from app.services.artifact_store import FileArtifactStore
+from app.services.page_store import MappedPage, open_page_blob, write_page_blob
+from app.services.parsing import extracted_pages_path, load_extracted_pages, save_extracted_pages
+
+PAGES = [
+    {"page": 1, "text": "Net sales 1,234 — “quoted”"},
+    {"page": 2, "text": "", "backend": "pdfplumber", "error": "unreadable"},
+    {"page": 3, "text": "Total assets 9,999\n" * 20},
+]
+
+
+def test_page_blob_roundtrip_with_lazy_views(tmp_path):
+    path = write_page_blob(tmp_path / "u1.pages", PAGES)
+    pages = open_page_blob(path)
+
+    assert all(isinstance(p, MappedPage) for p in pages)
+    assert pages == PAGES
+    assert pages[2].text_bytes == len(PAGES[2]["text"].encode("utf-8"))
+    assert pages[1]["error"] == "unreadable"
+    assert pages[0].get("missing") is None
+
+
+def test_views_survive_the_file_being_replaced(tmp_path):
+    path = write_page_blob(tmp_path / "u1.pages", PAGES)
+    old = open_page_blob(path)
+
+    write_page_blob(path, [{"page": 1, "text": "rewritten"}])
+
+    assert old[0]["text"] == PAGES[0]["text"]
+    assert open_page_blob(path)[0]["text"] == "rewritten"
+
+
+def test_file_store_switches_between_blob_and_compressed_json(tmp_path):
+    store = FileArtifactStore(tmp_path)
+
+    saved = save_extracted_pages(tmp_path, "u1", PAGES, codec="none")
+    assert saved == store.page_blob_path("u1")
+    assert not extracted_pages_path(tmp_path, "u1").exists()
+    assert isinstance(load_extracted_pages(tmp_path, "u1")[0], MappedPage)
+
+    # resaving mapped pages (e.g. merging a second extraction pass) works in both forms
+    loaded = load_extracted_pages(tmp_path, "u1")
+    save_extracted_pages(tmp_path, "u1", loaded, codec="gzip")
+    assert not store.page_blob_path("u1").exists()
+    assert load_extracted_pages(tmp_path, "u1") == PAGES
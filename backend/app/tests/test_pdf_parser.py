@@ -0,0 +1,93 @@
+from app.services.pdf_parser import (
+    _needs_fallback,
+    _page_ranges,
+    extract_text_by_page,
+    locate_statement_pages,
+    summarize_extraction,
+)
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    ranges = _page_ranges(num_pages=20, workers=4, pages_per_task=3)
+    assert ranges[0] == (1, 3)
+    assert ranges[-1] == (19, 20)
+    covered = [p for s, e in ranges for p in range(s, e + 1)]
+    assert covered == list(range(1, 21))
+
+
+def test_page_ranges_small_doc_spreads_across_workers():
+    assert _page_ranges(num_pages=4, workers=4, pages_per_task=8) == [(1, 1), (2, 2), (3, 3), (4, 4)]
+
+
+def test_parallel_extraction_matches_inline(make_pdf):
+    pdf_path = make_pdf([f"Page {i} body\nNet sales {i},000" for i in range(1, 8)])
+
+    inline = extract_text_by_page(pdf_path, workers=1)
+    parallel = extract_text_by_page(pdf_path, workers=2, pages_per_task=2)
+
+    assert [p["page"] for p in parallel] == list(range(1, 8))
+    assert parallel == inline
+    assert "Net sales 3,000" in parallel[2]["text"]
+
+
+def test_fast_backend_records_backend_per_page(make_pdf):
+    pdf_path = make_pdf(["Net sales 1,234", "Total assets 9,999"])
+
+    pages = extract_text_by_page(pdf_path, workers=1, backend="pypdfium2")
+
+    assert [p["backend"] for p in pages] == ["pypdfium2", "pypdfium2"]
+    assert pages[0]["text"] == "Net sales 1,234"
+    assert summarize_extraction(pages, "pypdfium2")["fallback_pages"] == 0
+
+
+def test_needs_fallback_heuristics():
+    assert _needs_fallback("")
+    assert _needs_fallback("���� ab")
+    assert _needs_fallback("CONDENSED CONSOLIDATED BALANCE SHEETS\nTotal assets")
+    assert not _needs_fallback("CONDENSED CONSOLIDATED BALANCE SHEETS\nTotal assets 9,999")
+    assert not _needs_fallback("Management's discussion of results")
+
+
+def test_blank_fast_path_pages_fall_back_to_pdfplumber(make_pdf, monkeypatch):
+    from app.services import pdf_parser
+
+    pdf_path = make_pdf(["Net sales 1,234", "Total assets 9,999"])
+    class BlankReader:
+        def __init__(self, path):
+            pass
+
+        def page_text(self, n):
+            return ""
+
+        def close(self):
+            pass
+
+    monkeypatch.setitem(pdf_parser._BACKENDS, "pypdfium2", BlankReader)
+
+    pages = extract_text_by_page(pdf_path, workers=1, backend="pypdfium2")
+
+    assert [p["backend"] for p in pages] == ["pdfplumber", "pdfplumber"]
+    assert pages[1]["text"] == "Total assets 9,999"
+    summary = summarize_extraction(pages, "pypdfium2")
+    assert summary["fallback_pages"] == 2
+    assert summary["pages_by_backend"] == {"pdfplumber": 2}
+
+
+def test_locate_statement_pages_finds_statement_headers(make_pdf):
+    pdf_path = make_pdf(
+        [
+            "Cover page",
+            "CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS\nNet sales 1,000",
+            "Management's discussion",
+            "CONDENSED CONSOLIDATED BALANCE SHEETS\nTotal assets 9,999",
+            "CONDENSED CONSOLIDATED STATEMENTS OF CASH FLOWS\nNet cash 5",
+        ]
+    )
+    assert locate_statement_pages(pdf_path) == [2, 4]
+
+
+def test_extract_subset_of_pages(make_pdf):
+    pdf_path = make_pdf([f"page {i}" for i in range(1, 7)])
+    pages = extract_text_by_page(pdf_path, workers=1, page_numbers=[5, 2, 3])
+    assert [p["page"] for p in pages] == [2, 3, 5]
+    assert pages[2]["text"] == "page 5"
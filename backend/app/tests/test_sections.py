@@ -0,0 +1,88 @@
+from app.core.config import settings
+from app.services.artifact_cache import get_artifact_cache
+from app.services.chunk_index import ChunkIndex
+from app.services.chunk_store import get_upload_chunks
+from app.services.chunking import chunk_pages
+from app.services.metrics_store import save_metrics
+from app.services.parsing import save_extracted_pages
+from app.services.qa import build_citations_for_keywords
+from app.services.sections import classify_text, section_scores
+from app.services.tokens import WhitespaceTokenCounter
+
+WS = WhitespaceTokenCounter()
+
+PAGES = [
+    {"page": 1, "text": "CONDENSED CONSOLIDATED STATEMENTS OF OPERATIONS\nTotal net sales 100\nOperating income 30\nNet income 20"},
+    {"page": 2, "text": "CONDENSED CONSOLIDATED BALANCE SHEETS\nTotal assets 900\nTotal liabilities 400\nNet income 20"},
+    {"page": 3, "text": "CONDENSED CONSOLIDATED STATEMENTS OF CASH FLOWS\nNet income 20\nCash generated by operating activities 50"},
+    {"page": 4, "text": "Risk factors: the Company faces competition."},
+]
+
+# a notes page (no header) that contains a balance sheet marker only as a substring
+NOTES_PAGE = (
+    "Note 9 – Income Taxes\n"
+    "The following table shows the significant components of deferred tax assets. Noncurrent liabilities "
+    "include gross unrecognized tax benefits of $15.2 billion; other noncurrent liabilities were $9.3 billion. "
+    "Tax credit carryforwards are measured at fair value."
+)
+
+
+def test_classify_text():
+    assert classify_text("Net cash used in operating activities; payments for taxes") == "cash_flow"
+    assert classify_text("LIABILITIES AND SHAREHOLDERS’ EQUITY\nTotal liabilities 5") == "balance_sheet"
+    assert classify_text("CONDENSED CONSOLIDATED STATEMENTS OF SHAREHOLDERS’ EQUITY\nBeginning balances") == "equity"
+    assert classify_text("Provision for income taxes 12\nOperating income 40") == "operations"
+    assert classify_text("Notes to Condensed Consolidated Financial Statements") == "notes"
+    assert classify_text("Net income") == "other"  # a single weak marker is not enough
+
+
+def test_markers_match_whole_terms():
+    scores = section_scores(NOTES_PAGE)
+    assert scores[1] == 0  # "current liabilities" only occurs inside "noncurrent liabilities"
+    assert classify_text(NOTES_PAGE) == "notes"
+    assert classify_text("Condensed Consolidated Balance Sheets\nInventories 5") == "balance_sheet"
+
+
+def test_chunks_carry_their_section_and_keep_it_when_persisted(tmp_path):
+    chunks = chunk_pages("u", PAGES, max_tokens=20, overlap_tokens=0, meta={"source": "pdf"}, counter=WS)
+    assert [c.meta["section"] for c in chunks] == ["operations", "balance_sheet", "cash_flow", "other"]
+    assert chunks[0].meta["source"] == "pdf"
+
+    save_extracted_pages(tmp_path, "u", PAGES)
+    built = get_upload_chunks(tmp_path, "u")
+    get_artifact_cache().clear()
+    loaded = get_upload_chunks(tmp_path, "u")
+    assert [c.meta for c in loaded] == [c.meta for c in built]
+    assert loaded[0].meta == {"source": "pdf", "section": "operations"}
+
+
+def test_index_filters_sections_before_scoring():
+    chunks = chunk_pages("u", PAGES, max_tokens=20, overlap_tokens=0, counter=WS)
+    index = ChunkIndex.build(chunks)
+
+    assert {doc for doc, _ in index.search(["net income"], top_k=5)} == {0, 1, 2}
+    assert [doc for doc, _ in index.search(["net income"], top_k=5, sections=["operations", "other"])] == [0]
+    assert index.in_sections(["cash_flow"]) == {2}
+
+    cites = build_citations_for_keywords(
+        upload_id="u", pages=PAGES, keywords=["net income"], top_k=5, chunks=chunks, sections=["operations"]
+    )
+    assert [c["page_start"] for c in cites] == [1]
+    no_match = build_citations_for_keywords(
+        upload_id="u", pages=PAGES, keywords=["goodwill"], top_k=5, chunks=chunks, index=index, sections=["other"]
+    )
+    assert [c["page_start"] for c in no_match] == [4]
+
+
+def test_ask_compare_cites_only_income_statement_chunks(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    metrics = {"revenue": 100, "gross_profit": 60, "operating_income": 30, "net_income": 20}
+    for uid in ("b", "c"):
+        save_metrics(tmp_path, uid, {"upload_id": uid, "metrics": metrics})
+        save_extracted_pages(tmp_path, uid, PAGES)
+
+    req = {"question": "Why did net income change?", "compare_upload_id": "c", "max_tokens": 64, "overlap_tokens": 0}
+    r = client.post("/ask/b", json=req)
+    assert r.status_code == 200
+    cites = r.json()["citations"]
+    assert cites and all(c["page_start"] in (1, 4) for c in cites)
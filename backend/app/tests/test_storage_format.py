@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.services.parsing import extracted_pages_path, load_extracted_pages, save_extracted_pages
+from app.services.storage_format import FORMAT_MAGIC, dumps_artifact, loads_artifact, read_artifact, write_artifact
+
+PAGES = [{"page": 1, "text": "Net sales 1,234 — “quoted”"}, {"page": 2, "text": "Total assets 9,999\n" * 50}]
+
+
+@pytest.mark.parametrize("codec", ["none", "gzip", "zstd"])
+def test_roundtrip_for_every_codec(codec):
+    assert loads_artifact(dumps_artifact(PAGES, codec)) == PAGES
+
+
+def test_uncompressed_artifacts_are_plain_compact_json(tmp_path):
+    path = write_artifact(tmp_path / "m.json", {"a": 1, "b": [1, 2]})
+    raw = path.read_text(encoding="utf-8")
+    assert json.loads(raw) == {"a": 1, "b": [1, 2]}
+    assert "\n" not in raw and " " not in raw
+
+
+def test_compressed_artifact_has_versioned_header_and_is_smaller(tmp_path):
+    plain = dumps_artifact(PAGES, "none")
+    packed = dumps_artifact(PAGES, "gzip")
+    assert packed.startswith(FORMAT_MAGIC + bytes([1]))
+    assert len(packed) < len(plain)
+
+
+def test_reader_accepts_legacy_pretty_json(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps(PAGES, ensure_ascii=False, indent=2), encoding="utf-8")
+    assert read_artifact(path) == PAGES
+
+
+def test_newer_format_version_is_rejected():
+    data = FORMAT_MAGIC + bytes([99, 0]) + b"[]"
+    with pytest.raises(ValueError):
+        loads_artifact(data)
+
+
+def test_extracted_pages_compression_setting(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "storage_compression", "gzip")
+    save_extracted_pages(tmp_path, "u1", PAGES)
+
+    assert extracted_pages_path(tmp_path, "u1").read_bytes().startswith(FORMAT_MAGIC)
+    assert load_extracted_pages(tmp_path, "u1") == PAGES
@@ -0,0 +1,75 @@
+import pytest
+
+from app.services.llm import build_variance_prompt
+from app.services.tokens import (
+    BPETokenCounter,
+    CachedTokenCounter,
+    WhitespaceTokenCounter,
+    get_token_counter,
+    truncate_to_tokens,
+)
+
+
+def test_bpe_counts_numbers_and_punctuation_as_separate_tokens():
+    bpe = BPETokenCounter()
+    assert bpe.count("Net sales") == 2
+    # "$", "(", "1", ",", "234", ")" -- one word, six tokens
+    assert bpe.count("$(1,234)") == 6
+    assert bpe.count("1234567") == 3  # digit groups of up to 3
+    assert bpe.count("a" * 20) == 3  # long words take several tokens
+    assert bpe.count("Umsatzerlöse") == bpe.count("Umsatzerlose")  # non-ASCII path agrees
+    assert bpe.count("") == 0
+
+
+def test_cached_counter_memoizes_long_texts_only():
+    calls = []
+
+    class Recording(WhitespaceTokenCounter):
+        def count(self, text):
+            calls.append(text)
+            return super().count(text)
+
+    cached = CachedTokenCounter(Recording(), max_entries=2, min_len=10)
+    long_text = "word " * 20
+
+    assert cached.count(long_text) == cached.count(long_text) == 20
+    assert cached.count("short") == cached.count("short") == 1
+    assert calls == [long_text, "short", "short"]
+    assert cached.stats()["hits"] == 1
+
+    cached.count("other " * 5)
+    cached.count("third " * 5)  # evicts long_text (max_entries=2)
+    cached.count(long_text)
+    assert calls.count(long_text) == 2
+
+
+def test_get_token_counter_by_name():
+    assert get_token_counter("bpe") is get_token_counter("bpe")
+    assert isinstance(get_token_counter("bpe"), CachedTokenCounter)
+    assert isinstance(get_token_counter("whitespace"), WhitespaceTokenCounter)
+    with pytest.raises(ValueError):
+        get_token_counter("nope")
+
+
+def test_truncate_to_tokens_cuts_at_a_word_boundary():
+    bpe = BPETokenCounter()
+    text = "Revenue grew 12% to $4,321 million driven by services and wearables"
+    cut = truncate_to_tokens(text, 8, bpe)
+
+    assert bpe.count(cut) <= 8
+    assert text.startswith(cut) and text[len(cut)] == " "
+    assert truncate_to_tokens(text, 1000, bpe) == text
+    assert truncate_to_tokens(text, 0, bpe) == ""
+
+
+def test_variance_prompt_stays_within_budget():
+    variance = {"drivers": [{"metric": f"line item {i}", "delta": i * 1_000_003} for i in range(500)]}
+
+    prompt = build_variance_prompt(variance=variance, question="Why did margin fall?", max_tokens=400)
+
+    assert get_token_counter().count(prompt) <= 400
+    assert "Why did margin fall?" in prompt
+    assert "line item 0" in prompt and "line item 499" not in prompt
+
+    small = build_variance_prompt(variance={"a": 1}, question="q", max_tokens=400)
+    assert "{'a': 1}" in small
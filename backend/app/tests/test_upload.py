@@ -1,10 +1,87 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 
 client = TestClient(app)
 
-def test_upload_pdf_returns_upload_id():
+def test_upload_pdf_returns_upload_id(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
     pdf_bytes = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
     r = client.post("/upload", files={"file": ("test.pdf", pdf_bytes, "application/pdf")})
     assert r.status_code == 200
     assert "upload_id" in r.json()
+
+
+def test_upload_returns_size_and_sha256(tmp_path, monkeypatch):
+    import hashlib
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+
+    pdf_bytes = b"%PDF-1.4\n" + b"0" * 5000 + b"\n%%EOF\n"
+    r = client.post("/upload", files={"file": ("test.pdf", pdf_bytes, "application/pdf")})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["size_bytes"] == len(pdf_bytes)
+    assert data["sha256"] == hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def test_upload_over_limit_is_rejected_and_cleaned_up(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "max_upload_mb", 0)
+
+    pdf_bytes = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+    r = client.post("/upload", files={"file": ("test.pdf", pdf_bytes, "application/pdf")})
+    assert r.status_code == 413
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_reupload_same_bytes_returns_existing_upload_id(tmp_path, monkeypatch, backend):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "storage_backend", backend)
+
+    pdf_bytes = b"%PDF-1.4\nsame filing\n%%EOF\n"
+    first = client.post("/upload", files={"file": ("q1.pdf", pdf_bytes, "application/pdf")}).json()
+    second = client.post("/upload", files={"file": ("q1-again.pdf", pdf_bytes, "application/pdf")}).json()
+    other = client.post("/upload", files={"file": ("q2.pdf", pdf_bytes + b"x", "application/pdf")}).json()
+
+    assert first["deduplicated"] is False
+    assert second["deduplicated"] is True
+    assert second["upload_id"] == first["upload_id"]
+    assert other["upload_id"] != first["upload_id"]
+    assert len(list((tmp_path / "uploads").glob("*.pdf"))) == 2
+
+    stats = client.get("/stats/uploads").json()
+    assert stats["uploads"] == 3
+    assert stats["dedup_hits"] == 1
+    assert stats["unique_uploads"] == 2
+    assert stats["dedup_hit_rate"] == round(1 / 3, 4)
+
+
+def _record_many(upload_dir, n):
+    from app.services.uploads import record_upload
+
+    for _ in range(n):
+        record_upload(upload_dir, deduplicated=False)
+
+
+def test_upload_stats_survive_concurrent_processes(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+
+    from app.services.uploads import load_upload_stats
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_record_many, [str(tmp_path)] * 4, [25] * 4))
+    assert load_upload_stats(tmp_path)["uploads"] == 100
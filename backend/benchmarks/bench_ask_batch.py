@@ -0,0 +1,46 @@
+"""
+20 dashboard questions against one 500-page filing: answer_numbers_first once per
+question (each call chunks the pages and builds its own vectors, as a caller
+without the upload's stored artifacts would) vs answer_numbers_first_many (chunks,
+index and vectors once, all questions embedded in one matrix product).
+
+    cd backend && python -m benchmarks.bench_ask_batch
+"""
+from __future__ import annotations
+
+from app.services.qa import answer_numbers_first, answer_numbers_first_many
+
+from benchmarks.bench_chunking import _best_ms, _synthetic_pages
+
+QUESTIONS = [
+    "What is net income?", "What was revenue?", "What were net sales?", "What is gross margin?",
+    "What was operating income?", "What were income taxes?", "What is the tax expense?",
+    "What was other income/expense?", "What was pretax income?", "What was the bottom line?",
+    "How profitable was the quarter?", "What drove gross profit?", "What was operating profit?",
+    "What were net earnings?", "What was the provision for income taxes?", "What was cost of sales?",
+    "What were operating expenses?", "How did research and development change?",
+    "What was income before taxes?", "What were total net sales?",
+]
+METRICS = {"net_income": 200.0, "revenue": 1000.0, "gross_profit": 600.0, "operating_income": 300.0}
+
+
+def main() -> None:
+    pages = _synthetic_pages()
+
+    def one_by_one():
+        return [answer_numbers_first(upload_id="u", question=q, metrics=METRICS, pages=pages) for q in QUESTIONS]
+
+    def batch():
+        return answer_numbers_first_many(upload_id="u", questions=QUESTIONS, metrics=METRICS, pages=pages)
+
+    assert [r["computed"] for r in one_by_one()] == [r["computed"] for r in batch()]
+    single_ms = _best_ms(one_by_one, repeat=1)
+    batch_ms = _best_ms(batch, repeat=3)
+    print(
+        f"{len(QUESTIONS)} questions, {len(pages)} pages: one call per question {single_ms:8.1f} ms   "
+        f"batch {batch_ms:8.1f} ms   x{single_ms / batch_ms:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Chunking throughput on a 500-page filing: original buffer/flush chunker vs the
+single-tokenization generator (chunking.iter_chunks), plus the largest chunk each
+produces (the current chunker splits pages that don't fit on line/sentence boundaries).
+
+    cd backend && python -m benchmarks.bench_chunking
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Dict, List
+
+from app.services.chunking import Chunk, chunk_pages
+from app.services.tokens import WhitespaceTokenCounter
+
+WS = WhitespaceTokenCounter()  # same unit as the original chunker
+WORDS = "net sales revenue cost of sales gross margin operating expenses research development total".split()
+
+
+def _synthetic_pages(num_pages: int = 500, lines_per_page: int = 60) -> List[Dict[str, Any]]:
+    rng = random.Random(7)
+    pages = []
+    for i in range(1, num_pages + 1):
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(6)) + f" {rng.randint(100, 99_999):,} {rng.randint(100, 99_999):,}"
+            for _ in range(lines_per_page)
+        ]
+        pages.append({"page": i, "text": "\n".join(lines)})
+    return pages
+
+
+def _original_chunk_pages(upload_id, pages, max_tokens=700, overlap_tokens=120, meta=None) -> List[Chunk]:
+    meta = meta or {}
+    chunks: List[Chunk] = []
+    buf_parts: List[str] = []
+    buf_tokens = 0
+    start_page = None
+    chunk_idx = 0
+
+    def count(text: str) -> int:
+        return max(1, len(text.split()))
+
+    def flush(end_page: int):
+        nonlocal chunk_idx, buf_parts, buf_tokens, start_page
+        if not buf_parts or start_page is None:
+            return
+        text = "\n".join(buf_parts).strip()
+        chunks.append(Chunk(f"{upload_id}::chunk::{chunk_idx}", upload_id, start_page, end_page, count(text), text, meta))
+        chunk_idx += 1
+        words = text.split()
+        keep = words[-overlap_tokens:] if overlap_tokens > 0 else []
+        buf_parts = [" ".join(keep)] if keep else []
+        buf_tokens = count(buf_parts[0]) if buf_parts else 0
+        start_page = end_page
+
+    for p in pages:
+        page_num = int(p["page"])
+        page_text = (p.get("text") or "").strip()
+        if start_page is None:
+            start_page = page_num
+        page_tokens = count(page_text)
+        if buf_tokens + page_tokens > max_tokens and buf_parts:
+            flush(page_num)
+        buf_parts.append(page_text)
+        buf_tokens += page_tokens
+
+    if start_page is not None:
+        flush(int(pages[-1]["page"]))
+    return chunks
+
+
+def _best_ms(fn, repeat: int = 10) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    pages = _synthetic_pages()
+    for max_tokens, overlap in ((700, 120), (300, 60), (120, 30)):
+        old_max = max(c.token_count for c in _original_chunk_pages("u", pages, max_tokens, overlap))
+        new_max = max(c.token_count for c in chunk_pages("u", pages, max_tokens, overlap, counter=WS))
+        old = _best_ms(lambda: _original_chunk_pages("u", pages, max_tokens, overlap))
+        new = _best_ms(lambda: chunk_pages("u", pages, max_tokens, overlap, counter=WS))
+        print(
+            f"max_tokens={max_tokens:<4} overlap={overlap:<4} original {old:8.2f} ms (largest {old_max:>4})"
+            f"   streaming {new:8.2f} ms (largest {new_max:>4})   x{old / new:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+"Which filings mention a tax settlement?" over 200 ingested filings (100 pages
+each): one chunk index per upload, loaded from disk and searched upload by upload,
+vs the sharded corpus index (cold: shards read from disk; warm: shards in memory).
+Also the cost of adding one more upload to the corpus.
+
+    cd backend && python -m benchmarks.bench_corpus
+"""
+from __future__ import annotations
+
+import random
+import tempfile
+import time
+
+from app.services import corpus_index
+from app.services.artifact_store import get_store
+from app.services.chunk_index import ChunkIndex, save_index
+from app.services.chunk_store import chunks_key, save_chunks, source_fingerprint
+from app.services.chunking import chunk_pages
+from app.services.corpus_index import add_upload, search_corpus
+from app.services.parsing import save_extracted_pages
+
+from benchmarks.bench_chunking import WORDS, WS, _best_ms
+
+NUM_UPLOADS = 200
+PAGES = 100
+QUERY = "tax settlement"
+
+
+def _pages(rng: random.Random, mention: bool):
+    vocab = WORDS + [f"term{rng.randint(0, 5000)}" for _ in range(40)]
+    pages = []
+    for i in range(1, PAGES + 1):
+        lines = [" ".join(rng.choice(vocab) for _ in range(8)) for _ in range(40)]
+        if mention and i == PAGES // 2:
+            lines.append("The Company reached a tax settlement with the taxing authority.")
+        pages.append({"page": i, "text": "\n".join(lines)})
+    return pages
+
+
+def main() -> None:
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as storage:
+        ids = [f"up{i:04d}" for i in range(NUM_UPLOADS)]
+        ingest_ms = []
+        for n, uid in enumerate(ids):
+            pages = _pages(rng, mention=n % 25 == 0)
+            chunks = chunk_pages(uid, pages, counter=WS)
+            save_extracted_pages(storage, uid, pages)
+            save_chunks(storage, uid, chunks, 700, 120)
+            save_index(storage, uid, ChunkIndex.build(chunks), 700, 120)
+            t0 = time.perf_counter()
+            add_upload(storage, uid, chunks, source=source_fingerprint(storage, uid))
+            ingest_ms.append((time.perf_counter() - t0) * 1000)
+
+        store, key = get_store(storage), chunks_key(700, 120)
+
+        def per_upload():
+            hits = []
+            for uid in ids:
+                index = ChunkIndex.from_payload(store.load_index(uid, key))
+                hits.extend((uid, doc, s) for doc, s in index.search([QUERY], top_k=10))
+            return sorted(hits, key=lambda h: -h[2])[:10]
+
+        def cold():
+            corpus_index._shards.clear()
+            return search_corpus(storage, QUERY)
+
+        per_upload_ms = _best_ms(per_upload, repeat=1)
+        cold_ms = _best_ms(cold, repeat=3)
+        warm_ms = _best_ms(lambda: search_corpus(storage, QUERY), repeat=20)
+        found = search_corpus(storage, QUERY)
+        uploads_hit = sorted({h["upload_id"] for h in found["hits"]})
+
+        print(f"{NUM_UPLOADS} uploads, {found['chunks']} chunks; '{QUERY}' found in {len(uploads_hit)} uploads")
+        print(
+            f"per-upload index scan {per_upload_ms:8.1f} ms   corpus cold {cold_ms:8.1f} ms   "
+            f"corpus warm {warm_ms:8.2f} ms"
+        )
+        print(
+            f"corpus append per upload: median {sorted(ingest_ms)[len(ingest_ms) // 2]:.1f} ms, "
+            f"max {max(ingest_ms):.1f} ms (includes shard compaction)"
+        )
+
+
+if __name__ == "__main__":
+    main()
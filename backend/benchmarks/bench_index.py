@@ -0,0 +1,70 @@
+"""
+Keyword ranking over a 500-page filing's chunks: the original linear scan
+(normalize every chunk, str.count per keyword, per query) vs the chunk index
+(built once at ingest, then BM25 over postings per query; phrase matches are
+memoized per index, so repeated keyword lists skip the position checks).
+
+    cd backend && python -m benchmarks.bench_index
+"""
+from __future__ import annotations
+
+import re
+import time
+
+from app.services.chunk_index import ChunkIndex
+from app.services.chunking import chunk_pages
+
+from benchmarks.bench_chunking import _best_ms, _synthetic_pages
+
+KEYWORDS = [
+    "other income/(expense), net",
+    "provision for income taxes",
+    "income before provision for income taxes",
+    "operating income",
+    "net income",
+    "statements of operations",
+    "gross margin",
+]
+
+
+def _normalize(s: str) -> str:
+    return re.sub(r"\s+", " ", s.strip().lower())
+
+
+def _linear_rank(chunks, keywords, top_k=3):
+    kws = [_normalize(k) for k in keywords]
+    scored = []
+    for c in chunks:
+        text = _normalize(c.text)
+        score = 0.0
+        for kw in kws:
+            count = text.count(kw)
+            if count:
+                score += count * 10
+                score += max(0, 5 - (text.find(kw) / 500))
+        if score > 0:
+            scored.append((score, c))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [c for _, c in scored[:top_k]]
+
+
+def main() -> None:
+    chunks = chunk_pages("u", _synthetic_pages())
+    t0 = time.perf_counter()
+    index = ChunkIndex.build(chunks)
+    build_ms = (time.perf_counter() - t0) * 1000
+    payload = index.to_payload()
+    load_ms = _best_ms(lambda: ChunkIndex.from_payload(payload), repeat=5)
+
+    linear = _best_ms(lambda: _linear_rank(chunks, KEYWORDS), repeat=5)
+    cold = _best_ms(lambda: ChunkIndex.from_payload(payload).search(KEYWORDS), repeat=5) - load_ms
+    warm = _best_ms(lambda: index.search(KEYWORDS), repeat=50)
+    print(f"{len(chunks)} chunks, {len(index.postings)} terms, index build {build_ms:.1f} ms (once, at ingest)")
+    print(
+        f"query ({len(KEYWORDS)} keywords): linear scan {linear:8.2f} ms   "
+        f"index first query {cold:8.3f} ms   repeated keywords {warm:8.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
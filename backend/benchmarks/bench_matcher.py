@@ -0,0 +1,53 @@
+"""
+Finding N keyword phrases in every chunk of a 500-page filing: one str.count +
+str.find per phrase per chunk (the original ranking scan) vs one phrase-matcher
+pass per chunk for all phrases. The per-phrase scan grows with N; the matcher doesn't.
+Over already-tokenized chunks (as in qa._keyword_scores): count_phrases vs the
+matcher, which sets matcher.AUTOMATON_MIN_PHRASES.
+
+    cd backend && python -m benchmarks.bench_matcher
+"""
+from __future__ import annotations
+
+import random
+import re
+
+from app.services.chunking import chunk_pages
+from app.services.matcher import PhraseMatcher, count_phrases, get_matcher, match_terms
+
+from benchmarks.bench_chunking import WORDS, _best_ms, _synthetic_pages
+
+
+def _phrases(n: int):
+    rng = random.Random(11)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + f" x{i}" * (i % 2) for i in range(n)]
+
+
+def _per_phrase(texts, phrases):
+    out = []
+    for text in texts:
+        text = re.sub(r"\s+", " ", text.strip().lower())
+        out.append({p: (text.count(p), text.find(p)) for p in phrases if p in text})
+    return out
+
+
+def main() -> None:
+    texts = [c.text for c in chunk_pages("u", _synthetic_pages())]
+    terms = [match_terms(t) for t in texts]
+    for n in (4, 8, 16, 32, 128):
+        phrases = _phrases(n)
+        matcher = get_matcher(phrases)
+        scan = _best_ms(lambda: _per_phrase(texts, phrases), repeat=3)
+        ac = _best_ms(lambda: [matcher.scan(t) for t in texts], repeat=3)
+        compile_ms = _best_ms(lambda: PhraseMatcher(phrases), repeat=3)
+        ac_terms = _best_ms(lambda: [matcher.scan_terms(t) for t in terms], repeat=3)
+        counted = _best_ms(lambda: [count_phrases(t, phrases) for t in terms], repeat=3)
+        print(
+            f"{n:>4} phrases x {len(texts)} chunks: per-phrase scan {scan:8.1f} ms   "
+            f"matcher {ac:8.1f} ms   (compile {compile_ms:.2f} ms, once)   "
+            f"tokenized: count_phrases {counted:8.1f} ms   matcher {ac_terms:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
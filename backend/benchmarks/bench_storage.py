@@ -0,0 +1,57 @@
+"""
+Disk footprint + load time: legacy pretty JSON vs storage format v1 codecs.
+
+    cd backend && python -m benchmarks.bench_storage
+"""
+from __future__ import annotations
+
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.storage_format import read_artifact, write_artifact
+
+WORDS = "net sales revenue cost of sales gross margin operating expenses research development total".split()
+
+
+def _synthetic_pages(num_pages: int = 300, lines_per_page: int = 60):
+    rng = random.Random(7)
+    pages = []
+    for i in range(1, num_pages + 1):
+        lines = [
+            " ".join(rng.choice(WORDS) for _ in range(6)) + f" {rng.randint(100, 99_999):,} {rng.randint(100, 99_999):,}"
+            for _ in range(lines_per_page)
+        ]
+        pages.append({"page": i, "text": "\n".join(lines), "backend": "pypdfium2"})
+    return pages
+
+
+def _time_loads(fn, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    pages = _synthetic_pages()
+    with tempfile.TemporaryDirectory() as d:
+        legacy = Path(d) / "legacy.json"
+        legacy.write_text(json.dumps(pages, ensure_ascii=False, indent=2), encoding="utf-8")
+        rows = [("legacy indent=2", legacy.stat().st_size, _time_loads(lambda: json.loads(legacy.read_text("utf-8"))))]
+
+        for codec in ("none", "gzip", "zstd"):
+            path = write_artifact(Path(d) / f"v1-{codec}.bin", pages, codec)
+            rows.append((f"v1 {codec}", path.stat().st_size, _time_loads(lambda p=path: read_artifact(p))))
+
+    print(f"{'format':<18}{'bytes':>12}{'load ms':>10}")
+    for name, size, ms in rows:
+        print(f"{name:<18}{size:>12,}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
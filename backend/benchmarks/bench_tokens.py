@@ -0,0 +1,48 @@
+"""
+Token counting on a 500-page filing: whitespace words vs the offline BPE estimate,
+cold (first count) and warm (memoized by text hash, as on re-chunking), plus
+chunking end to end with each counter and how far words under-count table text.
+
+    cd backend && python -m benchmarks.bench_tokens
+"""
+from __future__ import annotations
+
+from app.services.chunking import chunk_pages
+from app.services.tokens import BPETokenCounter, CachedTokenCounter, WhitespaceTokenCounter
+
+from benchmarks.bench_chunking import _best_ms, _synthetic_pages
+
+
+def main() -> None:
+    pages = _synthetic_pages()
+    texts = [p["text"] for p in pages]
+    ws = WhitespaceTokenCounter()
+    bpe = BPETokenCounter()
+
+    words = sum(ws.count(t) for t in texts)
+    tokens = sum(bpe.count(t) for t in texts)
+    print(f"{len(texts)} pages: {words} words, {tokens} BPE tokens (x{tokens / words:.2f})")
+
+    ws_ms = _best_ms(lambda: [ws.count(t) for t in texts])
+    bpe_ms = _best_ms(lambda: [bpe.count(t) for t in texts])
+    cold_ms = _best_ms(lambda: [CachedTokenCounter(bpe).count(t) for t in texts])
+    cached = CachedTokenCounter(bpe)
+    for t in texts:
+        cached.count(t)
+    warm_ms = _best_ms(lambda: [cached.count(t) for t in texts])
+    print(f"count   whitespace {ws_ms:7.2f} ms   bpe {bpe_ms:7.2f} ms   bpe memo cold {cold_ms:7.2f} ms   warm {warm_ms:7.2f} ms")
+
+    for max_tokens, overlap in ((700, 120), (300, 60)):
+        ws_chunks = chunk_pages("u", pages, max_tokens, overlap, counter=ws)
+        bpe_chunks = chunk_pages("u", pages, max_tokens, overlap, counter=cached)
+        ws_ms = _best_ms(lambda: chunk_pages("u", pages, max_tokens, overlap, counter=ws))
+        bpe_ms = _best_ms(lambda: chunk_pages("u", pages, max_tokens, overlap, counter=cached))
+        over = sum(1 for c in ws_chunks if bpe.count(c.text) > max_tokens)
+        print(
+            f"chunk max_tokens={max_tokens:<4} whitespace {ws_ms:7.2f} ms ({len(ws_chunks)} chunks, "
+            f"{over} over budget in BPE tokens)   bpe {bpe_ms:7.2f} ms ({len(bpe_chunks)} chunks)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Hashed-embedding retrieval over a 500-page filing's chunks: building the vectors
+(once, at ingest), one query, and a batch of queries scored in one matrix product.
+
+    cd backend && python -m benchmarks.bench_vectors
+"""
+from __future__ import annotations
+
+import time
+
+from app.services.chunking import chunk_pages
+from app.services.embeddings import VectorIndex
+
+from benchmarks.bench_chunking import _best_ms, _synthetic_pages
+
+QUERIES = [
+    "what was the bottom line", "top line growth", "gross margin", "operating expenses",
+    "research and development spend", "tax bill", "capex", "cost of sales",
+] * 3
+
+
+def main() -> None:
+    chunks = chunk_pages("u", _synthetic_pages())
+    t0 = time.perf_counter()
+    vectors = VectorIndex.build(chunks)
+    build_ms = (time.perf_counter() - t0) * 1000
+    size_kb = len(vectors.to_bytes()) / 1024
+
+    one = _best_ms(lambda: vectors.search(QUERIES[0]), repeat=50)
+    loop = _best_ms(lambda: [vectors.search(q) for q in QUERIES], repeat=10)
+    batch = _best_ms(lambda: vectors.search_many(QUERIES), repeat=10)
+    print(f"{len(chunks)} chunks: build {build_ms:.1f} ms (once, at ingest), {size_kb:.0f} KiB on disk")
+    print(f"1 query {one:.3f} ms   {len(QUERIES)} queries: one by one {loop:.2f} ms   batched {batch:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
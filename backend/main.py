@@ -1 +1,7 @@
 from app.main import app
+
+if __name__ == "__main__":
+    # `python main.py ingest <dir|glob|file>...` -- see app/cli.py
+    from app.cli import main
+
+    raise SystemExit(main())
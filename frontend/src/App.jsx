@@ -10,12 +10,11 @@ const API_BASE = import.meta.env.VITE_API_BASE_URL || "";
  * - Toggle in header
  * - Preloads base/compare metrics, variance, answer, citations
  * - Disables upload + pipeline buttons while demo is ON
- * - When demo is OFF: normal backend flow (upload -> extract -> metrics -> variance -> ask)
+ * - When demo is OFF: normal backend flow (ingest -> variance -> ask)
  *
  * Backend routes assumed:
- * - POST /upload (multipart field: file) -> { upload_id }
- * - POST /extract/{upload_id}
- * - POST /metrics/{upload_id}
+ * - POST /ingest (multipart field: file) -> { upload_id, metrics }
+ *   (upload + extract + metrics + chunks in one request)
  * - POST /variance/{base}/{compare}
  * - POST /ask/{base} with JSON { question, compare_upload_id }
  * - GET /health (or POST /health depending on your API; here we use GET)
@@ -224,10 +223,10 @@ async function postNoBody(url) {
   return res.json();
 }
 
-async function uploadPDF(file) {
+async function ingestPDF(file) {
   const fd = new FormData();
   fd.append("file", file);
-  const res = await fetch(`${API_BASE}/upload`, { method: "POST", body: fd });
+  const res = await fetch(`${API_BASE}/ingest`, { method: "POST", body: fd });
 
   if (!res.ok) {
     const txt = await res.text();
@@ -590,17 +589,12 @@ export default function App() {
     const setState = which === "base" ? setBase : setCompare;
 
     try {
+      // one round trip: upload + extract + metrics + chunk indexing
       setState((s) => ({ ...s, status: "uploading" }));
-      const up = await uploadPDF(file);
-      const uploadId = up.upload_id || up.uploadId;
+      const m = await ingestPDF(file);
+      const uploadId = m.upload_id || m.uploadId;
 
-      setState((s) => ({ ...s, uploadId, status: "extracting" }));
-      await postNoBody(`/extract/${uploadId}`);
-
-      setState((s) => ({ ...s, status: "metrics" }));
-      const m = await postNoBody(`/metrics/${uploadId}`);
-
-      setState((s) => ({ ...s, metrics: m.metrics || null, status: "ready" }));
+      setState((s) => ({ ...s, uploadId, metrics: m.metrics || null, status: "ready" }));
     } catch (e) {
       setState((s) => ({ ...s, status: "error" }));
       setError(String(e?.message || e));